@@ -1,30 +1,71 @@
-from fastapi import APIRouter, Depends
-from typing import Optional, List, Dict, Any
+from dataclasses import asdict
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional, List, Dict, Any, Iterator, Literal
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from starlette.responses import StreamingResponse
-import csv
-import io
 
-from app.deps import get_db
+from app.audit_chain import verify_range
+from app.audit_rollups import stats
+from app.audit_segments import segment_store
+from app.config import AUDIT_HASH_CHAIN, AUDIT_ROLLUPS
+from app.deps import get_async_audit_read_db, get_audit_read_db
+from app.exports import (
+    COLUMNAR_FORMATS,
+    EXPORT_BATCH_SIZE,
+    ExportResponse,
+    arrow_schema,
+    iter_columnar,
+    iter_csv,
+    json_cell,
+)
 from app.models import AuditLog
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page, set_page_headers
+from .routes_consent import _parse_date_range
 
 router = APIRouter()
 
 
-@router.get("/", summary="List audit events")
-def list_audit(
+def _audit_event_out(a) -> Dict[str, Any]:
+    """JSON form of an audit event (AuditLog row or segment AuditEvent)."""
+    return {
+        "id": a.id,
+        "consent_id": a.consent_id,
+        "timestamp": a.timestamp.isoformat()
+        if getattr(a, "timestamp", None)
+        else None,
+        "action": a.action,
+        "actor": a.actor,
+        "details": a.details,
+        # BFSI context fields
+        "product_id": getattr(a, "product_id", None),
+        "purpose": getattr(a, "purpose", None),
+        "source_channel": getattr(a, "source_channel", None),
+        "actor_type": getattr(a, "actor_type", None),
+        "application_number": getattr(a, "application_number", None),
+        "mobile_number": getattr(a, "mobile_number", None),
+        "evidence_ref": getattr(a, "evidence_ref", None),
+        "tenant_id": getattr(a, "tenant_id", None),
+    }
+
+
+def _filtered_audit_query(
+    db: Session,
+    *,
     consent_id: Optional[str] = None,
     mobile_number: Optional[str] = None,
     application_number: Optional[str] = None,
-    db: Session = Depends(get_db),
-) -> List[Dict[str, Any]]:
-    """
-    List audit events.
-
-    - If consent_id is provided, filter by that consent_id.
-    - If mobile_number / application_number are provided, filter by those.
-    - If multiple filters are provided, all are applied (AND).
-    """
+    action: Optional[str] = None,
+    actor_type: Optional[str] = None,
+    source_channel: Optional[str] = None,
+    product_id: Optional[str] = None,
+    purpose: Optional[str] = None,
+    start_dt: Optional[datetime] = None,
+    end_dt: Optional[datetime] = None,
+):
+    """All audit filters are optional and combined with AND."""
     q = db.query(AuditLog)
 
     if consent_id:
@@ -33,111 +74,280 @@ def list_audit(
         q = q.filter(AuditLog.mobile_number == mobile_number)
     if application_number:
         q = q.filter(AuditLog.application_number == application_number)
+    if action:
+        q = q.filter(AuditLog.action == action)
+    if actor_type:
+        q = q.filter(AuditLog.actor_type == actor_type)
+    if source_channel:
+        q = q.filter(AuditLog.source_channel == source_channel)
+    if product_id:
+        q = q.filter(AuditLog.product_id == product_id)
+    if purpose:
+        q = q.filter(AuditLog.purpose == purpose)
+    if start_dt:
+        q = q.filter(AuditLog.timestamp >= start_dt)
+    if end_dt:
+        q = q.filter(AuditLog.timestamp <= end_dt)
 
-    rows = q.order_by(AuditLog.timestamp.asc()).all()
-
-    out = []
-    for a in rows:
-        out.append(
-            {
-                "id": a.id,
-                "consent_id": a.consent_id,
-                "timestamp": a.timestamp.isoformat()
-                if getattr(a, "timestamp", None)
-                else None,
-                "action": a.action,
-                "actor": a.actor,
-                "details": a.details,
-                # BFSI context fields
-                "product_id": getattr(a, "product_id", None),
-                "purpose": getattr(a, "purpose", None),
-                "source_channel": getattr(a, "source_channel", None),
-                "actor_type": getattr(a, "actor_type", None),
-                "application_number": getattr(a, "application_number", None),
-                "mobile_number": getattr(a, "mobile_number", None),
-                "evidence_ref": getattr(a, "evidence_ref", None),
-            }
-        )
-    return out
+    return q
 
 
-@router.get("/export.csv", summary="Export audit as CSV")
-def export_audit_csv(
+def _audit_filters(
     consent_id: Optional[str] = None,
     mobile_number: Optional[str] = None,
     application_number: Optional[str] = None,
-    db: Session = Depends(get_db),
-):
+    action: Optional[str] = None,
+    actor_type: Optional[str] = None,
+    source_channel: Optional[str] = None,
+    product_id: Optional[str] = None,
+    purpose: Optional[str] = None,
+    start_date: Optional[str] = Query(None, description="YYYY-MM-DD (inclusive)"),
+    end_date: Optional[str] = Query(None, description="YYYY-MM-DD (inclusive)"),
+) -> Dict[str, Any]:
+    """Audit filter query parameters, as keyword arguments for _filtered_audit_query / segment_store."""
+    start_dt, end_dt = _parse_date_range(start_date, end_date)
+    return dict(
+        consent_id=consent_id,
+        mobile_number=mobile_number,
+        application_number=application_number,
+        action=action,
+        actor_type=actor_type,
+        source_channel=source_channel,
+        product_id=product_id,
+        purpose=purpose,
+        start_dt=start_dt,
+        end_dt=end_dt,
+    )
+
+
+@router.get("/", summary="List audit events (oldest first, keyset-paginated)")
+async def list_audit(
+    response: Response,
+    filters: Dict[str, Any] = Depends(_audit_filters),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_audit_read_db),
+) -> List[Dict[str, Any]]:
     """
-    Export audit events to CSV.
+    List audit events ordered by (timestamp, id).
 
-    Same filters as list_audit:
-    - consent_id (optional)
-    - mobile_number (optional)
-    - application_number (optional)
+    - Every filter is optional; multiple filters are applied with AND.
+    - When more events exist, the X-Next-Cursor response header carries the
+      cursor for the next page; pass it back as ?cursor=...
     """
-    q = db.query(AuditLog)
 
-    if consent_id:
-        q = q.filter(AuditLog.consent_id == consent_id)
-    if mobile_number:
-        q = q.filter(AuditLog.mobile_number == mobile_number)
-    if application_number:
-        q = q.filter(AuditLog.application_number == application_number)
+    def page(sync_db: Session):
+        q = _filtered_audit_query(sync_db, **filters)
+        return keyset_page(
+            q,
+            ts_col=AuditLog.timestamp,
+            id_col=AuditLog.id,
+            cursor=cursor,
+            limit=limit,
+        )
+
+    if segment_store is not None:
+        # AUDIT_STORAGE=segments (app/audit_segments.py): file IO, off the event loop
+        rows, next_cursor = await run_in_threadpool(segment_store.page, cursor=cursor, limit=limit, **filters)
+    else:
+        rows, next_cursor = await db.run_sync(page)
+    set_page_headers(response, next_cursor)
+
+    return [_audit_event_out(a) for a in rows]
+
+
+AUDIT_CSV_COLUMNS = [
+    "id",
+    "consent_id",
+    "timestamp",
+    "action",
+    "actor",
+    "product_id",
+    "purpose",
+    "source_channel",
+    "actor_type",
+    "application_number",
+    "mobile_number",
+    "evidence_ref",
+    "details",
+]
+
+
+def _audit_csv_row(a) -> list:
+    return [
+        a.id,
+        a.consent_id,
+        a.timestamp.isoformat() if a.timestamp else "",
+        a.action or "",
+        a.actor or "",
+        a.product_id or "",
+        a.purpose or "",
+        a.source_channel or "",
+        a.actor_type or "",
+        a.application_number or "",
+        a.mobile_number or "",
+        a.evidence_ref or "",
+        json_cell(a.details),
+    ]
+
+
+def _iter_audit_export_rows(db: Session, filters: Dict[str, Any]) -> Iterator[Any]:
+    """Matching audit rows in (timestamp, id) order, fetched in server-side batches."""
+    if segment_store is not None:
+        yield from segment_store.scan(**filters)
+        return
 
-    rows = q.order_by(AuditLog.timestamp.asc()).all()
-
-    output = io.StringIO()
-
-    writer = csv.writer(output)
-    writer.writerow(
-        [
-            "id",
-            "consent_id",
-            "timestamp",
-            "action",
-            "actor",
-            "product_id",
-            "purpose",
-            "source_channel",
-            "actor_type",
-            "application_number",
-            "mobile_number",
-            "evidence_ref",
-            "details",
-        ]
+    columns = [getattr(AuditLog, name) for name in AUDIT_CSV_COLUMNS]
+    stmt = (
+        _filtered_audit_query(db, **filters)
+        .with_entities(*columns)
+        .order_by(AuditLog.timestamp.asc(), AuditLog.id.asc())
+        .statement.execution_options(yield_per=EXPORT_BATCH_SIZE)
     )
-    for a in rows:
-        writer.writerow(
-            [
-                a.id,
-                a.consent_id,
-                (
-                    a.timestamp.isoformat()
-                    if getattr(a, "timestamp", None)
-                    else ""
-                ),
-                a.action or "",
-                a.actor or "",
-                getattr(a, "product_id", "") or "",
-                getattr(a, "purpose", "") or "",
-                getattr(a, "source_channel", "") or "",
-                getattr(a, "actor_type", "") or "",
-                getattr(a, "application_number", "") or "",
-                getattr(a, "mobile_number", "") or "",
-                getattr(a, "evidence_ref", "") or "",
-                (
-                    a.details
-                    if isinstance(a.details, str)
-                    else ("" if a.details is None else str(a.details))
-                ),
-            ]
-        )
+    result = db.execute(stmt)
+    try:
+        yield from result
+    finally:
+        result.close()
+
+
+AUDIT_COLUMNAR_COLUMNS = [
+    ("id", "string"),
+    ("consent_id", "string"),
+    ("timestamp", "timestamp"),
+    ("action", "category"),
+    ("actor", "string"),
+    ("product_id", "category"),
+    ("purpose", "category"),
+    ("source_channel", "category"),
+    ("actor_type", "category"),
+    ("application_number", "string"),
+    ("mobile_number", "string"),
+    ("evidence_ref", "string"),
+    ("details", "string"),
+]
+
+
+def _audit_columnar_row(a) -> tuple:
+    return tuple(getattr(a, name) for name, _ in AUDIT_COLUMNAR_COLUMNS[:-1]) + (json_cell(a.details) or None,)
+
+
+def _audit_export_chunks(db: Session, fmt: str, filters: Dict[str, Any]) -> Iterator[bytes]:
+    """The encoded audit export (csv / parquet / arrow), chunk by chunk."""
+    rows = _iter_audit_export_rows(db, filters)
+    if fmt == "csv":
+        return iter_csv(rows, AUDIT_CSV_COLUMNS, _audit_csv_row, label="audit export")
+    return iter_columnar(rows, AUDIT_COLUMNAR_COLUMNS, _audit_columnar_row, fmt=fmt, label="audit export")
+
 
-    output.seek(0)
+@router.get("/export.csv", summary="Export audit as CSV")
+def export_audit_csv(
+    filters: Dict[str, Any] = Depends(_audit_filters),
+    db: Session = Depends(get_audit_read_db),
+):
+    """
+    Export audit events to CSV, oldest first.
 
-    return StreamingResponse(
-        output,
+    Same filters as list_audit (without pagination). Rows are read from a
+    server-side cursor EXPORT_BATCH_SIZE at a time and each batch is sent as
+    soon as it is encoded; a client disconnect closes the cursor.
+    """
+    return ExportResponse(
+        _audit_export_chunks(db, "csv", filters),
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=audit_export.csv"},
     )
+
+
+@router.get("/export.{fmt}", summary="Export audit as Parquet or an Arrow IPC stream")
+def export_audit_columnar(
+    fmt: Literal["parquet", "arrow"],
+    filters: Dict[str, Any] = Depends(_audit_filters),
+    db: Session = Depends(get_audit_read_db),
+):
+    """
+    Columnar variant of export.csv (same filters and order): one Parquet row
+    group / Arrow record batch per COLUMNAR_BATCH_SIZE events, action /
+    product / purpose / channel / actor type dictionary-encoded.
+    """
+    try:
+        arrow_schema(AUDIT_COLUMNAR_COLUMNS)
+    except RuntimeError as e:  # pyarrow not installed
+        raise HTTPException(status_code=501, detail=str(e))
+    media_type, extension = COLUMNAR_FORMATS[fmt]
+    return ExportResponse(
+        _audit_export_chunks(db, fmt, filters),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=audit_export.{extension}"},
+    )
+
+
+@router.get("/stats", summary="Audit event counts, in total or per hour / day / month (pre-aggregated)")
+def audit_stats(
+    group_by: List[Literal["tenant_id", "product_id", "purpose", "action", "source_channel", "actor_type"]] = Query(
+        [], description="Dimensions to count by (repeatable)"
+    ),
+    interval: Optional[Literal["hour", "day", "month"]] = Query(None, description="Time series bucket; omit for totals"),
+    tenant_id: Optional[str] = None,
+    product_id: Optional[str] = None,
+    purpose: Optional[str] = None,
+    action: Optional[str] = None,
+    source_channel: Optional[str] = None,
+    actor_type: Optional[str] = None,
+    start_date: Optional[str] = Query(None, description="YYYY-MM-DD (inclusive)"),
+    end_date: Optional[str] = Query(None, description="YYYY-MM-DD (inclusive)"),
+    db: Session = Depends(get_audit_read_db),
+) -> Dict[str, Any]:
+    """
+    Counts for dashboards, read from the audit_rollups table (see
+    app/audit_rollups.py) instead of the events themselves, so the cost
+    depends on the number of buckets and groups, not on audit volume.
+
+    `rows` holds one entry per (bucket,) group with its `events` count;
+    dimensions missing on an event are counted under "".
+    """
+    if not AUDIT_ROLLUPS:
+        raise HTTPException(status_code=409, detail="Audit rollups are not enabled (AUDIT_ROLLUPS)")
+    start_dt, end_dt = _parse_date_range(start_date, end_date)
+    group_by = list(dict.fromkeys(group_by))
+    rows = stats(
+        db,
+        interval=interval,
+        group_by=group_by,
+        start_dt=start_dt,
+        end_dt=end_dt,
+        tenant_id=tenant_id,
+        product_id=product_id,
+        purpose=purpose,
+        action=action,
+        source_channel=source_channel,
+        actor_type=actor_type,
+    )
+    return {
+        "interval": interval,
+        "group_by": group_by,
+        "total": sum(row["events"] for row in rows),
+        "rows": rows,
+    }
+
+
+@router.get("/verify", summary="Verify the audit hash chain over a date range")
+def verify_audit_chain(
+    start_date: Optional[str] = Query(None, description="YYYY-MM-DD (inclusive)"),
+    end_date: Optional[str] = Query(None, description="YYYY-MM-DD (inclusive)"),
+    db: Session = Depends(get_audit_read_db),
+) -> Dict[str, Any]:
+    """
+    Recompute the hash chain for audit events in the range, starting from the
+    nearest checkpoint before it (see app/audit_chain.py).
+
+    `verified` is false when a row was altered, deleted or reordered; the
+    failure_* fields point at the first broken link.
+    """
+    if not AUDIT_HASH_CHAIN or segment_store is not None:
+        raise HTTPException(
+            status_code=409,
+            detail="Audit hash chain is not enabled (needs AUDIT_HASH_CHAIN and AUDIT_STORAGE=sql)",
+        )
+    start_dt, end_dt = _parse_date_range(start_date, end_date)
+    return asdict(verify_range(db.connection(), start_dt, end_dt))
@@ -1,16 +1,43 @@
 # backend/app/api/v1/routes_consent.py
-from fastapi import APIRouter, HTTPException, Depends, Response, Query
-from pydantic import BaseModel, Field
-from typing import Optional, Dict, List
-from uuid import uuid4
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import AsyncIterator, Iterator, Literal, Optional, Dict, List, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime
-import csv
-import io
-
-from sqlalchemy import func
-from app.deps import get_db, get_actor
+import itertools
+import json
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from app.audit import SNAPSHOT_FIELDS, audit_row, write_audit_rows
+from app.audit_segments import segment_store
+from app.config import AUDIT_DATABASE_URL
+from app.consent_index import CHECK_FORMATS, CheckEncoder, consent_index
+from app.consent_state import lookup, record_grants, refresh_keys, state_key
+from app.database import AuditReadSessionLocal
+from app.deps import get_actor, get_async_db, get_async_read_db, get_db, get_read_db
+from app.exports import (
+    COLUMNAR_FORMATS,
+    EXPORT_BATCH_SIZE,
+    ExportResponse,
+    arrow_schema,
+    iter_columnar,
+    iter_csv,
+    json_cell,
+)
+from app.ids import new_id
+from app.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    estimate_total,
+    keyset_page,
+    set_page_headers,
+)
 from app.models import Consent, AuditLog, ConsentTemplate
+from app.template_cache import template_resolver
 
 router = APIRouter()
 
@@ -108,6 +135,58 @@ class ConsentTemplateCreate(BaseModel):
     body_text: Optional[str] = None
     is_active: Optional[bool] = True
 
+class BulkItemError(BaseModel):
+    index: int                 # 0-based position in the submitted array / NDJSON line
+    error: str
+
+
+class BulkGrantResult(BaseModel):
+    received: int
+    inserted: int          # committed
+    failed: int
+    errors: List[BulkItemError]
+    errors_truncated: bool = False
+    # atomic=false only: a chunk failed to write and was rolled back. Items
+    # before failed_at are settled (inserted or reported in errors); resend
+    # the upload from item failed_at on.
+    failed_at: Optional[int] = None
+    chunk_error: Optional[str] = None
+
+class BulkRevokeRequest(BaseModel):
+    # Selectors are combined with AND; at least one is required.
+    subject_id: Optional[str] = None
+    mobile_number: Optional[str] = None
+    application_number: Optional[str] = None
+    consent_ids: Optional[List[str]] = None
+    reason: Optional[str] = "user_action"
+
+
+class BulkRevokeResult(BaseModel):
+    revoked: int
+    consent_ids: List[str]
+
+
+# Keys per POST /consents/check call
+CHECK_MAX_KEYS = 10000
+
+
+class ConsentCheckKey(BaseModel):
+    subject_id: str
+    purpose: str = Field(..., description="data_use_case / purpose the consent was granted for")
+    product_id: Optional[str] = None
+    tenant_id: Optional[str] = None
+
+
+class ConsentCheckOut(ConsentCheckKey):
+    consented: bool
+    status: Optional[str] = None           # granted / revoked; None when never consented
+    consent_id: Optional[str] = None
+    updated_at: Optional[datetime] = None
+
+
+class ConsentCheckBatch(BaseModel):
+    keys: List[ConsentCheckKey] = Field(..., max_length=CHECK_MAX_KEYS)
+
 # ============================
 # Helpers
 # ============================
@@ -134,6 +213,169 @@ def _row_to_out(c: Consent) -> ConsentOut:
     )
 
 
+def _parse_date_range(
+    start_date: Optional[str],
+    end_date: Optional[str],
+) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """Parse inclusive YYYY-MM-DD bounds; end_date covers the whole day."""
+    start_dt: Optional[datetime] = None
+    end_dt: Optional[datetime] = None
+    try:
+        if start_date:
+            start_dt = datetime.strptime(start_date, "%Y-%m-%d")
+        if end_date:
+            # end of day inclusive
+            end_dt = datetime.strptime(end_date, "%Y-%m-%d").replace(hour=23, minute=59, second=59, microsecond=999999)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Invalid date format. Use YYYY-MM-DD.")
+    return start_dt, end_dt
+
+
+def _consent_export_query(
+    db: Session,
+    *,
+    subject_id: Optional[str] = None,
+    start_dt: Optional[datetime] = None,
+    end_dt: Optional[datetime] = None,
+):
+    """
+    Build the consent export query.
+
+    The date range is applied as a semi-join (`consents.id IN (SELECT consent_id
+    FROM audit_logs WHERE timestamp ...)`) evaluated by the database against the
+    (timestamp, consent_id) index, so no audit ids ever travel through Python
+    and we never hit the bound-parameter limit.
+    """
+    q = db.query(
+        Consent.id,
+        Consent.subject_id,
+        Consent.purpose,
+        Consent.status,
+        Consent.source,
+        Consent.meta,
+        Consent.tenant_id,
+        Consent.product_id,
+        Consent.source_channel,
+        Consent.actor_type,
+        Consent.created_at,
+    )
+
+    if subject_id:
+        q = q.filter(Consent.subject_id == subject_id)
+
+    if start_dt or end_dt:
+        q = q.filter(Consent.id.in_(_audited_consent_ids(start_dt, end_dt)))
+
+    return q
+
+
+def _audited_consent_ids(start_dt: Optional[datetime], end_dt: Optional[datetime]):
+    """SELECT consent_id FROM audit_logs with a timestamp in [start_dt, end_dt]."""
+    in_range = select(AuditLog.consent_id)
+    if start_dt:
+        in_range = in_range.where(AuditLog.timestamp >= start_dt)
+    if end_dt:
+        in_range = in_range.where(AuditLog.timestamp <= end_dt)
+    return in_range
+
+
+def _consent_export_rows(
+    db: Session,
+    subject_id: Optional[str],
+    start_dt: Optional[datetime],
+    end_dt: Optional[datetime],
+):
+    """Rows of _consent_export_query, streamed in server-side batches."""
+    if (AUDIT_DATABASE_URL or segment_store is not None) and (start_dt or end_dt):
+        return _iter_consents_audited_elsewhere(db, subject_id=subject_id, start_dt=start_dt, end_dt=end_dt)
+
+    # Pull plain column tuples in server-side batches and encode them
+    # incrementally instead of materialising every row + the whole file.
+    q = _consent_export_query(db, subject_id=subject_id, start_dt=start_dt, end_dt=end_dt)
+    return q.yield_per(EXPORT_BATCH_SIZE)
+
+
+def _iter_consents_audited_elsewhere(
+    db: Session,
+    *,
+    subject_id: Optional[str],
+    start_dt: Optional[datetime],
+    end_dt: Optional[datetime],
+):
+    """
+    Export rows when audit events live outside the main database
+    (AUDIT_DATABASE_URL, or segment files with AUDIT_STORAGE=segments): no
+    semi-join across stores, so stream the distinct consent ids from the
+    audit store and look the consents up one batch of ids at a time.
+    """
+    if segment_store is not None:
+        ids = segment_store.consent_ids(start_dt, end_dt)
+        while True:
+            chunk = list(itertools.islice(ids, EXPORT_BATCH_SIZE))
+            if not chunk:
+                return
+            yield from _consent_export_query(db, subject_id=subject_id).filter(Consent.id.in_(chunk))
+
+    with AuditReadSessionLocal() as audit_db:
+        ids = audit_db.execute(
+            _audited_consent_ids(start_dt, end_dt).distinct().execution_options(yield_per=EXPORT_BATCH_SIZE)
+        ).scalars()
+        for chunk in ids.partitions():
+            yield from _consent_export_query(db, subject_id=subject_id).filter(Consent.id.in_(chunk))
+
+
+CONSENT_CSV_COLUMNS = ["id", "subject_id", "data_use_case", "status", "source", "meta_json"]
+
+CONSENT_COLUMNAR_COLUMNS = [
+    ("id", "string"),
+    ("subject_id", "string"),
+    ("tenant_id", "category"),
+    ("product_id", "category"),
+    ("data_use_case", "category"),
+    ("status", "category"),
+    ("source", "category"),
+    ("source_channel", "category"),
+    ("actor_type", "category"),
+    ("created_at", "timestamp"),
+    ("meta_json", "string"),
+]
+
+
+def _consent_csv_row(c) -> list:
+    return [c.id, c.subject_id, c.purpose, c.status, c.source or "", json_cell(c.meta)]
+
+
+def _consent_columnar_row(c) -> tuple:
+    return (
+        c.id,
+        c.subject_id,
+        c.tenant_id,
+        c.product_id,
+        c.purpose,
+        c.status,
+        c.source,
+        c.source_channel,
+        c.actor_type,
+        c.created_at,
+        json_cell(c.meta) or None,
+    )
+
+
+def _consent_export_chunks(
+    db: Session,
+    fmt: str,
+    *,
+    subject_id: Optional[str] = None,
+    start_dt: Optional[datetime] = None,
+    end_dt: Optional[datetime] = None,
+) -> Iterator[bytes]:
+    """The encoded consents export (csv / parquet / arrow), chunk by chunk."""
+    rows = _consent_export_rows(db, subject_id, start_dt, end_dt)
+    if fmt == "csv":
+        return iter_csv(rows, CONSENT_CSV_COLUMNS, _consent_csv_row, label="consents export")
+    return iter_columnar(rows, CONSENT_COLUMNAR_COLUMNS, _consent_columnar_row, fmt=fmt, label="consents export")
+
+
 # ============================
 # Routes
 # ============================
@@ -149,7 +391,7 @@ def export_consents_csv(
     subject_id: Optional[str] = Query(None, description="Filter by subject_id"),
     start_date: Optional[str] = Query(None, description="YYYY-MM-DD (inclusive) - compared against audit timestamps"),
     end_date: Optional[str] = Query(None, description="YYYY-MM-DD (inclusive) - compared against audit timestamps"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     Exports consents as CSV.
@@ -157,86 +399,62 @@ def export_consents_csv(
     - If only subject_id is provided, we export consents for that subject.
     - If nothing provided, we export all consents.
     """
-    q = db.query(Consent)
-
-    if subject_id:
-        q = q.filter(Consent.subject_id == subject_id)
-
-    # If date filters present, restrict by audit events in range
-    # We use AuditLog.timestamp (common in your project) to filter.
-    # If your column name differs, update here.
-    if start_date or end_date:
-        # Parse bounds
-        start_dt: Optional[datetime] = None
-        end_dt: Optional[datetime] = None
-        try:
-            if start_date:
-                start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-            if end_date:
-                # end of day inclusive
-                end_dt = datetime.strptime(end_date, "%Y-%m-%d").replace(hour=23, minute=59, second=59, microsecond=999999)
-        except ValueError:
-            raise HTTPException(status_code=422, detail="Invalid date format. Use YYYY-MM-DD.")
-
-        # Join with AuditLog to find consents that have at least one event in range
-        aq = db.query(AuditLog.consent_id)
-        if start_dt:
-            aq = aq.filter(AuditLog.timestamp >= start_dt)
-        if end_dt:
-            aq = aq.filter(AuditLog.timestamp <= end_dt)
-        consent_ids_in_range = {row[0] for row in aq.distinct().all()}
-
-        if consent_ids_in_range:
-            q = q.filter(Consent.id.in_(consent_ids_in_range))
-        else:
-            # No results in range -> return an empty CSV, not a 404
-            output = io.StringIO()
-            writer = csv.writer(output)
-            writer.writerow(["id", "subject_id", "data_use_case", "status", "source", "meta_json"])
-            return Response(
-                content=output.getvalue(),
-                media_type="text/csv",
-                headers={"Content-Disposition": 'attachment; filename="consents.csv"'},
-            )
-
-    rows: List[Consent] = q.all()
-
-    # Build CSV (empty CSV is OK; don't 404)
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["id", "subject_id", "data_use_case", "status", "source", "meta_json"])
-    for c in rows:
-        meta_str = ""
-        try:
-            # write meta as JSON-esque string
-            meta_str = "" if c.meta is None else str(c.meta)
-        except Exception:
-            meta_str = ""
-        writer.writerow([c.id, c.subject_id, c.purpose, c.status, c.source or "", meta_str])
-
-    return Response(
-        content=output.getvalue(),
+    # No results in range -> still a header-only CSV, not a 404
+    start_dt, end_dt = _parse_date_range(start_date, end_date)
+    return ExportResponse(
+        _consent_export_chunks(db, "csv", subject_id=subject_id, start_dt=start_dt, end_dt=end_dt),
         media_type="text/csv",
         headers={"Content-Disposition": 'attachment; filename="consents.csv"'},
     )
 
 
+@router.get(
+    "/export.{fmt}",
+    summary="Export consents as Parquet or an Arrow IPC stream (same filters as export.csv)",
+    response_class=Response,
+)
+def export_consents_columnar(
+    fmt: Literal["parquet", "arrow"],
+    subject_id: Optional[str] = Query(None, description="Filter by subject_id"),
+    start_date: Optional[str] = Query(None, description="YYYY-MM-DD (inclusive) - compared against audit timestamps"),
+    end_date: Optional[str] = Query(None, description="YYYY-MM-DD (inclusive) - compared against audit timestamps"),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Columnar variant of export.csv for full-history extracts: one Parquet row
+    group / Arrow record batch per COLUMNAR_BATCH_SIZE consents, low-cardinality
+    columns dictionary-encoded, streamed as each batch is encoded.
+    """
+    try:
+        arrow_schema(CONSENT_COLUMNAR_COLUMNS)
+    except RuntimeError as e:  # pyarrow not installed
+        raise HTTPException(status_code=501, detail=str(e))
+    start_dt, end_dt = _parse_date_range(start_date, end_date)
+
+    media_type, extension = COLUMNAR_FORMATS[fmt]
+    return ExportResponse(
+        _consent_export_chunks(db, fmt, subject_id=subject_id, start_dt=start_dt, end_dt=end_dt),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="consents.{extension}"'},
+    )
+
+
 @router.post(
     "/",
     response_model=ConsentOut,
     status_code=201,
     summary="Grant consent",
 )
-def grant_consent(
+async def grant_consent(
     payload: ConsentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     actor: str = Depends(get_actor),  # header X-Actor, defaults to 'web_form'
 ):
     use_case = payload.resolved_use_case()
     if not use_case:
         raise HTTPException(status_code=422, detail="data_use_case (or purpose) is required")
 
-    consent_id = str(uuid4())
+    consent_id = new_id()
     consent = Consent(
     id=consent_id,
     subject_id=payload.subject_id,
@@ -257,50 +475,434 @@ def grant_consent(
     evidence_ref=getattr(payload, "evidence_ref", None),
 )
     db.add(consent)
+    # No ORM relationship links the two models, so flush the consent first;
+    # databases that enforce FKs (PostgreSQL) reject the audit row otherwise.
+    await db.flush()
+
+    # BFSI context snapshot from the consent row; keep existing details behavior
+    await db.run_sync(
+        write_audit_rows,
+        [audit_row(consent, action="granted", actor=actor, details=payload.meta)],
+    )
+    await db.run_sync(record_grants, [consent])
 
+    await db.commit()
 
-    db.add(
-        AuditLog(
-            id=str(uuid4()),
-            consent_id=consent_id,
-            action="granted",
-            actor=actor,
-
-            # BFSI context snapshot from the consent row
-            product_id=consent.product_id,
-            purpose=consent.purpose,
-            source_channel=getattr(consent, "source_channel", None),
-            actor_type=getattr(consent, "actor_type", None),
-            application_number=getattr(consent, "application_number", None),
-            mobile_number=getattr(consent, "mobile_number", None),
-            evidence_ref=getattr(consent, "evidence_ref", None),
-
-            # Keep existing details behavior
-            details=payload.meta,
-        )
+    return _row_to_out(consent)
+
+
+BULK_DEFAULT_CHUNK_SIZE = 1000
+BULK_MAX_CHUNK_SIZE = 10000
+BULK_MAX_REPORTED_ERRORS = 1000
+
+
+def _bulk_consent_values(item: Dict) -> Dict:
+    """Validate one bulk item and return Consent column values (raises ValueError)."""
+    payload = ConsentCreate(**item)
+    use_case = payload.resolved_use_case()
+    if not use_case:
+        raise ValueError("data_use_case (or purpose) is required")
+    return {
+        "id": new_id(),
+        "subject_id": payload.subject_id,
+        "purpose": use_case,
+        "status": "granted",
+        "source": payload.source,
+        "meta": payload.meta,
+        "tenant_id": payload.tenant_id,
+        "product_id": payload.product_id,
+        "source_channel": payload.source_channel,
+        "actor_type": payload.actor_type,
+        "application_number": payload.application_number,
+        "mobile_number": payload.mobile_number,
+        "version": payload.version,
+        "evidence_ref": payload.evidence_ref,
+    }
+
+
+def _insert_consent_chunk(db: Session, consents: List[Dict], actor: str) -> None:
+    db.execute(insert(Consent), consents)
+    write_audit_rows(
+        db,
+        (audit_row(c, action="granted", actor=actor, details=c["meta"]) for c in consents),
     )
+    record_grants(db, consents)
 
 
+def _commit_consent_chunk(db: Session, consents: List[Dict], actor: str) -> None:
+    _insert_consent_chunk(db, consents, actor)
     db.commit()
 
-    return _row_to_out(consent)
+
+async def _iter_bulk_items(request: Request) -> AsyncIterator[object]:
+    """Yield raw items from an NDJSON stream (read incrementally) or a JSON array."""
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        pending = b""
+        async for chunk in request.stream():
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield line
+        if pending.strip():
+            yield pending
+        return
+
+    try:
+        items = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Body must be a JSON array or NDJSON")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=422, detail="Body must be a JSON array or NDJSON")
+    for item in items:
+        yield item
+
+
+@router.post(
+    "/bulk",
+    response_model=BulkGrantResult,
+    summary="Grant many consents in one transaction (JSON array or NDJSON of ConsentCreate)",
+    responses={207: {"model": BulkGrantResult, "description": "atomic=false: committed up to a failed chunk"}},
+)
+async def bulk_grant_consents(
+    request: Request,
+    response: Response,
+    chunk_size: int = Query(BULK_DEFAULT_CHUNK_SIZE, ge=1, le=BULK_MAX_CHUNK_SIZE),
+    atomic: bool = Query(True, description="false: commit each chunk on its own"),
+    db: Session = Depends(get_db),
+    actor: str = Depends(get_actor),
+):
+    """
+    Bulk variant of grant_consent for migrations / back-fills.
+
+    - Items are validated one by one; invalid items are reported by index and skipped.
+    - Valid items are inserted (consent + 'granted' audit event) with executemany
+      in chunks of `chunk_size`, all inside one transaction committed at the end.
+    - atomic=false: each chunk commits on its own (very large uploads, whose
+      single commit would hold the audit hash chain head for all of it). If a
+      chunk fails it is rolled back and the upload stops with 207: `inserted`
+      consents stay committed and `failed_at` is the item to resume from.
+    """
+    received = 0
+    inserted = 0
+    errors: List[BulkItemError] = []
+    n_failed = 0
+    pending: List[Dict] = []
+    pending_start = 0  # index of the first item in `pending`
+    write_chunk = _insert_consent_chunk if atomic else _commit_consent_chunk
+
+    def result(**fields) -> BulkGrantResult:
+        return BulkGrantResult(
+            received=received,
+            inserted=inserted,
+            failed=n_failed,
+            errors=errors,
+            errors_truncated=n_failed > len(errors),
+            **fields,
+        )
+
+    try:
+        async for raw in _iter_bulk_items(request):
+            index = received
+            received += 1
+            try:
+                item = json.loads(raw) if isinstance(raw, bytes) else raw
+                if not isinstance(item, dict):
+                    raise ValueError("item must be a JSON object")
+                values = _bulk_consent_values(item)
+            except (ValueError, ValidationError) as e:
+                n_failed += 1
+                if len(errors) < BULK_MAX_REPORTED_ERRORS:
+                    errors.append(BulkItemError(index=index, error=str(e)))
+                continue
+            if not pending:
+                pending_start = index
+            pending.append(values)
+
+            if len(pending) >= chunk_size:
+                await run_in_threadpool(write_chunk, db, pending, actor)
+                inserted += len(pending)
+                pending = []
+
+        if pending:
+            await run_in_threadpool(write_chunk, db, pending, actor)
+            inserted += len(pending)
+        if atomic:
+            await run_in_threadpool(db.commit)
+    except SQLAlchemyError as e:
+        await run_in_threadpool(db.rollback)
+        if atomic:
+            raise
+        response.status_code = 207
+        return result(failed_at=pending_start, chunk_error=e.__class__.__name__)
+    except Exception:
+        await run_in_threadpool(db.rollback)
+        raise
+
+    return result()
+
+
+# Consent columns read back from the revoking UPDATE to build audit rows
+# and refresh consent_state
+_REVOKE_RETURNING = (Consent.id, Consent.subject_id) + tuple(getattr(Consent, f) for f in SNAPSHOT_FIELDS)
+# Keeps explicit id lists well under SQLite's bound-parameter limit
+REVOKE_ID_CHUNK_SIZE = 500
+
+
+def _revoke_where(db: Session, conditions: List) -> List:
+    """
+    Set-based revoke of every *granted* consent matching `conditions`.
+
+    Returns the revoked rows' id + audit snapshot columns. Uses UPDATE ... RETURNING
+    where the dialect supports it, otherwise selects the ids first (same transaction).
+    """
+    conditions = [Consent.status == "granted", *conditions]
+
+    if db.get_bind().dialect.update_returning:
+        stmt = (
+            update(Consent)
+            .where(*conditions)
+            .values(status="revoked")
+            .returning(*_REVOKE_RETURNING)
+        )
+        return db.execute(stmt, execution_options={"synchronize_session": False}).all()
+
+    rows = db.query(*_REVOKE_RETURNING).filter(*conditions).all()
+    ids = [r.id for r in rows]
+    for i in range(0, len(ids), REVOKE_ID_CHUNK_SIZE):
+        db.execute(
+            update(Consent)
+            .where(Consent.id.in_(ids[i:i + REVOKE_ID_CHUNK_SIZE]))
+            .values(status="revoked"),
+            execution_options={"synchronize_session": False},
+        )
+    return rows
+
+
+@router.post(
+    "/bulk-revoke",
+    response_model=BulkRevokeResult,
+    summary="Revoke all granted consents for a subject / mobile / application number / id list",
+)
+async def bulk_revoke_consents(
+    payload: BulkRevokeRequest,
+    db: AsyncSession = Depends(get_async_db),
+    actor: str = Depends(get_actor),
+):
+    """
+    Customer-wide withdrawal in one transaction.
+
+    Matching consents are flipped with a single UPDATE (chunked only for long
+    explicit id lists) and one 'revoked' audit event per consent is written with
+    executemany. Consents that are already revoked are left untouched.
+    """
+    conditions = []
+    if payload.subject_id:
+        conditions.append(Consent.subject_id == payload.subject_id)
+    if payload.mobile_number:
+        conditions.append(Consent.mobile_number == payload.mobile_number)
+    if payload.application_number:
+        conditions.append(Consent.application_number == payload.application_number)
+    if not conditions and not payload.consent_ids:
+        raise HTTPException(
+            status_code=422,
+            detail="Provide at least one of subject_id, mobile_number, application_number, consent_ids",
+        )
+
+    revoked = []
+    if payload.consent_ids:
+        ids = list(dict.fromkeys(payload.consent_ids))
+        for i in range(0, len(ids), REVOKE_ID_CHUNK_SIZE):
+            chunk = ids[i:i + REVOKE_ID_CHUNK_SIZE]
+            revoked += await db.run_sync(_revoke_where, conditions + [Consent.id.in_(chunk)])
+    else:
+        revoked = await db.run_sync(_revoke_where, conditions)
+
+    details = {"reason": payload.reason or "user_action", "bulk": True}
+    await db.run_sync(
+        write_audit_rows,
+        [audit_row(r._mapping, action="revoked", actor=actor, details=details) for r in revoked],
+    )
+    await db.run_sync(refresh_keys, [state_key(r._mapping) for r in revoked])
+    await db.commit()
+
+    return BulkRevokeResult(revoked=len(revoked), consent_ids=[r.id for r in revoked])
 
 
 @router.get(
     "/",
     response_model=List[ConsentOut],
-    summary="List consents",
+    summary="List consents (newest first, keyset-paginated)",
 )
-def list_consents(
+async def list_consents(
+    response: Response,
     subject_id: Optional[str] = None,
-    db: Session = Depends(get_db),
+    tenant_id: Optional[str] = None,
+    product_id: Optional[str] = None,
+    status: Optional[str] = None,
+    purpose: Optional[str] = None,
+    source_channel: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    include_total: bool = Query(False, description="Also return an approximate X-Total-Estimate header"),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    q = db.query(Consent)
-    if subject_id:
-        q = q.filter(Consent.subject_id == subject_id)
-    rows = q.all()
+    """
+    List consents ordered by (created_at, id) descending.
+
+    - All filters are optional and combined with AND.
+    - When more rows exist, the X-Next-Cursor response header carries the cursor
+      for the next page; pass it back as ?cursor=...
+    """
+    def page(sync_db: Session):
+        q = sync_db.query(Consent)
+        if subject_id:
+            q = q.filter(Consent.subject_id == subject_id)
+        if tenant_id:
+            q = q.filter(Consent.tenant_id == tenant_id)
+        if product_id:
+            q = q.filter(Consent.product_id == product_id)
+        if status:
+            q = q.filter(Consent.status == status)
+        if purpose:
+            q = q.filter(Consent.purpose == purpose)
+        if source_channel:
+            q = q.filter(Consent.source_channel == source_channel)
+
+        rows, next_cursor = keyset_page(
+            q,
+            ts_col=Consent.created_at,
+            id_col=Consent.id,
+            cursor=cursor,
+            limit=limit,
+            descending=True,
+        )
+        return rows, next_cursor, estimate_total(q) if include_total else None
+
+    rows, next_cursor, total = await db.run_sync(page)
+    set_page_headers(response, next_cursor, total)
     return [_row_to_out(c) for c in rows]
 
+def _check_results(db: Session, keys: List[ConsentCheckKey]) -> List[ConsentCheckOut]:
+    state_keys = [state_key(k.model_dump()) for k in keys]
+    found = lookup(db, state_keys)
+    out = []
+    for k, key in zip(keys, state_keys):
+        row = found.get(key)
+        out.append(
+            ConsentCheckOut(
+                **k.model_dump(),
+                consented=row is not None and row.status == "granted",
+                status=row.status if row is not None else None,
+                consent_id=row.consent_id if row is not None else None,
+                updated_at=row.updated_at if row is not None else None,
+            )
+        )
+    return out
+
+
+@router.get(
+    "/check",
+    response_model=ConsentCheckOut,
+    summary="Does the subject currently consent to this purpose (and product)?",
+)
+async def check_consent(
+    subject_id: str,
+    purpose: str,
+    product_id: Optional[str] = None,
+    tenant_id: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    Answered from consent_state with one primary-key lookup (see app/consent_state.py).
+
+    Keys match exactly: a consent granted without product_id is checked with
+    product_id omitted.
+    """
+    key = ConsentCheckKey(subject_id=subject_id, purpose=purpose, product_id=product_id, tenant_id=tenant_id)
+    return (await db.run_sync(_check_results, [key]))[0]
+
+
+@router.post(
+    "/check",
+    response_model=List[ConsentCheckOut],
+    summary="Check many (subject, purpose, product, tenant) keys at once",
+)
+async def check_consents(
+    payload: ConsentCheckBatch,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Batch variant of GET /check; results come back in request order."""
+    return await db.run_sync(_check_results, payload.keys)
+
+class _DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body is produced while the request body is still
+    being read. The stock one (ASGI < 2.4 servers, TestClient) also listens for
+    disconnects on receive(), which would swallow the request body messages;
+    here the body reader sees the disconnect itself (ClientDisconnect).
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def _iter_id_batches(request: Request) -> AsyncIterator[List[bytes]]:
+    """Subject ids of a newline-separated body, one list per received chunk (read incrementally)."""
+    pending = b""
+    async for chunk in request.stream():
+        pending += chunk.replace(b"\r", b"")
+        *lines, pending = pending.split(b"\n")
+        if lines:
+            yield lines
+    if pending:
+        yield [pending]
+
+
+@router.post(
+    "/check/stream",
+    summary="Allow/deny for a stream of subject ids (one per line) against one purpose",
+    response_class=_DuplexStreamingResponse,
+)
+async def check_consent_stream(
+    request: Request,
+    purpose: str,
+    product_id: Optional[str] = None,
+    tenant_id: Optional[str] = None,
+    format: str = Query("text", pattern="^(" + "|".join(CHECK_FORMATS) + ")$"),
+    db: Session = Depends(get_read_db),
+):
+    """
+    For campaign-sized lists: the body is subject ids, one per line (send a file
+    with e.g. `curl --data-binary @subjects.txt`); the response streams one
+    result per input line, in order, while the body is still being read.
+
+      format=text    "1" (granted) or "0" per line
+      format=bitmap  one bit per subject, most significant bit first
+
+    Answered from the in-process index of app/consent_index.py, which can lag
+    writes by CONSENT_INDEX_REFRESH_SECONDS. Blank lines are answered "0".
+    """
+    granted = await run_in_threadpool(
+        consent_index.granted, db, tenant_id=tenant_id, product_id=product_id, purpose=purpose
+    )
+    encoder = CheckEncoder(granted, format)
+
+    async def body() -> AsyncIterator[bytes]:
+        async for ids in _iter_id_batches(request):
+            out = encoder.feed(ids)
+            if out:
+                yield out
+        tail = encoder.finish()
+        if tail:
+            yield tail
+
+    media_type = "text/plain" if format == "text" else "application/octet-stream"
+    return _DuplexStreamingResponse(body(), media_type=media_type)
+
 # ============================
 # Consent Template management
 # ============================
@@ -310,11 +912,11 @@ def list_consents(
     response_model=List[ConsentTemplateOut],
     summary="List consent templates",
 )
-def list_consent_templates(
-    db: Session = Depends(get_db),
+async def list_consent_templates(
+    db: AsyncSession = Depends(get_async_read_db),
 ):
     q = (
-        db.query(ConsentTemplate)
+        select(ConsentTemplate)
         .order_by(
             ConsentTemplate.tenant_id,
             ConsentTemplate.product_id,
@@ -323,7 +925,7 @@ def list_consent_templates(
             ConsentTemplate.version,
         )
     )
-    return q.all()
+    return (await db.scalars(q)).all()
 
 
 @router.post(
@@ -332,26 +934,27 @@ def list_consent_templates(
     status_code=201,
     summary="Create a new consent template version",
 )
-def create_consent_template(
+async def create_consent_template(
     payload: ConsentTemplateCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     # Determine next version based on existing templates for this combination
     max_version = (
-        db.query(func.max(ConsentTemplate.version))
-        .filter(
-            ConsentTemplate.tenant_id == payload.tenant_id,
-            ConsentTemplate.product_id == payload.product_id,
-            ConsentTemplate.purpose == payload.purpose,
-            ConsentTemplate.template_type == payload.template_type,
+        await db.scalar(
+            select(func.max(ConsentTemplate.version))
+            .where(
+                ConsentTemplate.tenant_id == payload.tenant_id,
+                ConsentTemplate.product_id == payload.product_id,
+                ConsentTemplate.purpose == payload.purpose,
+                ConsentTemplate.template_type == payload.template_type,
+            )
         )
-        .scalar()
     ) or 0
 
     next_version = max_version + 1
 
     tmpl = ConsentTemplate(
-        id=str(uuid4()),
+        id=new_id(),
         tenant_id=payload.tenant_id,
         product_id=payload.product_id,
         purpose=payload.purpose,
@@ -363,21 +966,31 @@ def create_consent_template(
     )
 
     db.add(tmpl)
-    db.commit()
-    db.refresh(tmpl)
+    await db.commit()
+    # New versions must be visible to ingestion on this worker right away
+    template_resolver.invalidate()
+    await db.refresh(tmpl)
     return tmpl
 
 
+@router.get(
+    "/templates/cache-stats",
+    summary="Active template cache counters (this worker)",
+)
+async def template_cache_stats():
+    return template_resolver.stats()
+
+
 @router.get(
     "/{consent_id}",
     response_model=ConsentOut,
     summary="Get consent by ID",
 )
-def get_consent(
+async def get_consent(
     consent_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    c = db.query(Consent).filter(Consent.id == consent_id).first()
+    c = await db.scalar(select(Consent).where(Consent.id == consent_id))
     if not c:
         raise HTTPException(status_code=404, detail="Consent not found")
     return _row_to_out(c)
@@ -388,40 +1001,24 @@ def get_consent(
     response_model=ConsentOut,
     summary="Revoke consent",
 )
-def revoke_consent(
+async def revoke_consent(
     consent_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     actor: str = Depends(get_actor),
 ):
-    c = db.query(Consent).filter(Consent.id == consent_id).first()
+    c = await db.scalar(select(Consent).where(Consent.id == consent_id))
     if not c:
         raise HTTPException(status_code=404, detail="Consent not found")
 
     c.status = "revoked"
+    await db.flush()  # consent_state is recomputed from the consents table
 
-    db.add(
-        AuditLog(
-            id=str(uuid4()),
-            consent_id=consent_id,
-            action="revoked",
-            actor=actor,
-
-            # BFSI context snapshot at time of revocation
-            product_id=c.product_id,
-            purpose=c.purpose,
-            source_channel=getattr(c, "source_channel", None),
-            actor_type=getattr(c, "actor_type", None),
-            application_number=getattr(c, "application_number", None),
-            mobile_number=getattr(c, "mobile_number", None),
-            evidence_ref=getattr(c, "evidence_ref", None),
-
-            details={"reason": "user_action"},
-        )
+    # BFSI context snapshot at time of revocation
+    await db.run_sync(
+        write_audit_rows,
+        [audit_row(c, action="revoked", actor=actor, details={"reason": "user_action"})],
     )
+    await db.run_sync(refresh_keys, [state_key(c)])
 
-
-
-    
-
-    db.commit()
+    await db.commit()
     return _row_to_out(c)
@@ -0,0 +1,183 @@
+# backend/app/api/v1/routes_exports.py
+from datetime import datetime
+from typing import Dict, Literal, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, Field
+
+from app.export_jobs import EXPORT_KINDS, ExportJob, describe, export_jobs
+from app.exports import ExportResponse, arrow_schema
+from .routes_consent import _parse_date_range
+
+router = APIRouter()
+
+# ============================
+# Pydantic Schemas
+# ============================
+
+class ExportJobCreate(BaseModel):
+    kind: Literal["consents", "audit"]
+    format: Literal["csv", "parquet", "arrow"] = "csv"
+    # Same filters as GET /consents/export.csv or /audit/export.csv
+    filters: Dict[str, Optional[str]] = Field(default_factory=dict, example={"start_date": "2025-01-01"})
+
+
+class ExportJobOut(BaseModel):
+    id: str
+    kind: str
+    format: str
+    filters: Dict[str, str]
+    status: str                       # queued | running | done | failed
+    chunk_bytes: int
+    chunks: int                       # chunks written so far (GET .../chunks/{n})
+    bytes_written: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    download_url: str
+    deduplicated: bool = False        # joined an identical job already in progress
+
+
+def _job_out(request: Request, job: ExportJob, deduplicated: bool = False) -> ExportJobOut:
+    return ExportJobOut(
+        **describe(job),
+        download_url=str(request.url_for("download_export_job", job_id=job.id)),
+        deduplicated=deduplicated,
+    )
+
+
+def _get_job(job_id: str) -> ExportJob:
+    job = export_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    A single "bytes=start-end" / "bytes=start-" / "bytes=-suffix" range as
+    inclusive (start, end); None when unsatisfiable or not a single byte range.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first == "":
+            suffix = int(last)
+            if suffix <= 0:
+                return None
+            return max(size - suffix, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start < 0 or start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+# ============================
+# Routes
+# ============================
+
+@router.post(
+    "/",
+    response_model=ExportJobOut,
+    status_code=202,
+    summary="Start a background export (or join an identical one in progress)",
+)
+async def create_export_job(payload: ExportJobCreate, request: Request):
+    """
+    Runs the export on the server's export pool and writes it to disk in
+    numbered chunks; poll GET /exports/{id}, then fetch download_url (Range
+    requests supported, so an interrupted download resumes). Submitting the
+    same kind, format and filters while a job for them is queued or running
+    returns that job instead of starting another.
+    """
+    allowed = EXPORT_KINDS[payload.kind]
+    unknown = sorted(set(payload.filters) - set(allowed))
+    if unknown:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown filters for {payload.kind} exports: {', '.join(unknown)} (allowed: {', '.join(allowed)})",
+        )
+    _parse_date_range(payload.filters.get("start_date"), payload.filters.get("end_date"))
+    if payload.format != "csv":
+        try:
+            arrow_schema([])
+        except RuntimeError as e:  # pyarrow not installed
+            raise HTTPException(status_code=501, detail=str(e))
+
+    job, created = await run_in_threadpool(export_jobs.submit, payload.kind, payload.format, payload.filters)
+    return _job_out(request, job, deduplicated=not created)
+
+
+@router.get("/{job_id}", response_model=ExportJobOut, summary="Export job status and progress")
+def get_export_job(job_id: str, request: Request):
+    return _job_out(request, _get_job(job_id))
+
+
+@router.get(
+    "/{job_id}/chunks/{n}",
+    summary="Download one numbered chunk of an export (available as soon as it is written)",
+    response_class=Response,
+)
+def download_export_chunk(job_id: str, n: int):
+    """
+    Chunks are chunk_bytes long (the last one shorter) and concatenate to the
+    export file; chunk n exists once the job's `chunks` count exceeds n.
+    """
+    job = _get_job(job_id)
+    path = export_jobs.chunk_path(job, n)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Chunk {n} has not been written")
+    return FileResponse(path, media_type="application/octet-stream")
+
+
+@router.get(
+    "/{job_id}/download",
+    summary="Download a finished export (supports Range / If-Range)",
+    response_class=Response,
+)
+def download_export_job(job_id: str, request: Request):
+    job = _get_job(job_id)
+    if job.status == "failed":
+        raise HTTPException(status_code=409, detail=f"Export job failed: {job.error}")
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Export job is {job.status}")
+
+    size = job.bytes_written
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": job.etag,
+        "Content-Disposition": f'attachment; filename="{job.filename}"',
+    }
+    start, end, status_code = 0, size - 1, 200
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and size and (if_range is None or if_range == job.etag):
+        byte_range = _parse_range(range_header, size)
+        if byte_range is None:
+            raise HTTPException(
+                status_code=416,
+                detail="Requested range not satisfiable",
+                headers={"Content-Range": f"bytes */{size}"},
+            )
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    headers["Content-Length"] = str(end - start + 1)
+    return ExportResponse(
+        export_jobs.iter_range(job, start, end),
+        status_code=status_code,
+        media_type=job.media_type,
+        headers=headers,
+    )
@@ -1,13 +1,18 @@
 from datetime import datetime, timedelta
 from typing import Dict, Optional
-from uuid import uuid4
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.deps import get_db        # <-- match routes_consent.py style
-from app.models import OtpTransaction, Consent, AuditLog, ConsentTemplate
+from app.audit import audit_row, write_audit_rows
+from app.consent_state import record_grants
+from app.deps import get_async_db  # <-- match routes_consent.py style
+from app.ids import new_id
+from app.models import Consent
+from app.otp_store import OtpTxn, otp_store
+from app.template_cache import ActiveTemplate, template_resolver
 from .routes_consent import ConsentOut, _row_to_out  # reuse existing response schema + mapper
 
 
@@ -94,22 +99,41 @@ class BranchConsentRequest(BaseModel):
     meta: Optional[Dict] = None
 
 
+class CustomerVerifyAndConsentRequest(CustomerConsentRequest):
+    transaction_id: str = Field(..., description="OTP transaction id from customer.login-initiate")
+    otp: str = Field(..., example="123456")
+
+
+class BranchVerifyAndConsentRequest(BranchConsentRequest):
+    transaction_id: str = Field(..., description="OTP transaction id from branch.initiate")
+    otp: str = Field(..., example="123456")
+
+
 # --------- Helper functions ---------
 
 
-def _create_otp_transaction(
-    db: Session,
+async def _create_otp_transaction(
+    db: AsyncSession,
     *,
     mobile_number: str,
     channel: str,
     application_number: Optional[str] = None,
-) -> OtpTransaction:
+) -> OtpTxn:
     """Create a new OTP transaction in SIMULATED mode."""
-    transaction_id = f"{channel}-{int(datetime.utcnow().timestamp())}"
+    retry_after = await otp_store.hit_rate_limit(mobile_number)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many OTP requests for this mobile number",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    # Unique per call (the old per-second timestamp collided on the unique index)
+    transaction_id = f"{channel}-{new_id()}"
 
     expires_at = datetime.utcnow() + timedelta(minutes=OTP_EXPIRY_MINUTES)
 
-    otp_txn = OtpTransaction(
+    otp_txn = OtpTxn(
         transaction_id=transaction_id,
         mobile_number=mobile_number,
         channel=channel,
@@ -118,25 +142,20 @@ def _create_otp_transaction(
         expires_at=expires_at,
         created_at=datetime.utcnow(),
     )
-    db.add(otp_txn)
-    db.commit()
-    db.refresh(otp_txn)
+    await otp_store.create(db, otp_txn)
+    await db.commit()
     return otp_txn
 
 
-def _validate_otp_transaction(
-    db: Session,
+async def _check_otp(
+    db: AsyncSession,
     *,
     transaction_id: str,
     otp: str,
     expected_channel: Optional[str] = None,
-) -> OtpTransaction:
-    """Validate OTP for a transaction in SIMULATED mode."""
-    otp_txn = (
-        db.query(OtpTransaction)
-        .filter(OtpTransaction.transaction_id == transaction_id)
-        .first()
-    )
+) -> OtpTxn:
+    """Check an OTP against its transaction in SIMULATED mode, without marking it used."""
+    otp_txn = await otp_store.get(db, transaction_id)
 
     if not otp_txn:
         raise HTTPException(
@@ -168,30 +187,50 @@ def _validate_otp_transaction(
             detail="Incorrect OTP",
         )
 
-    # Mark as verified
+    return otp_txn
+
+
+async def _mark_otp_verified(db: AsyncSession, otp_txn: OtpTxn) -> None:
+    # A concurrent verify of the same OTP loses here
     otp_txn.verified_at = datetime.utcnow()
-    db.add(otp_txn)
-    db.commit()
-    db.refresh(otp_txn)
+    if not await otp_store.mark_verified(db, otp_txn.transaction_id, otp_txn.verified_at):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="OTP already used",
+        )
+
+
+async def _validate_otp_transaction(
+    db: AsyncSession,
+    *,
+    transaction_id: str,
+    otp: str,
+    expected_channel: Optional[str] = None,
+) -> OtpTxn:
+    """Validate OTP for a transaction in SIMULATED mode."""
+    otp_txn = await _check_otp(
+        db,
+        transaction_id=transaction_id,
+        otp=otp,
+        expected_channel=expected_channel,
+    )
+    await _mark_otp_verified(db, otp_txn)
+    await db.commit()
 
     return otp_txn
 
 
-def _get_verified_otp_txn_for_consent(
-    db: Session,
+async def _get_verified_otp_txn_for_consent(
+    db: AsyncSession,
     *,
     transaction_id: str,
     expected_channel: str,
-) -> OtpTransaction:
+) -> OtpTxn:
     """
     Fetch an OTP transaction that has already passed OTP verification
     and is ready to be used for consent creation.
     """
-    otp_txn = (
-        db.query(OtpTransaction)
-        .filter(OtpTransaction.transaction_id == transaction_id)
-        .first()
-    )
+    otp_txn = await otp_store.get(db, transaction_id)
 
     if not otp_txn:
         raise HTTPException(
@@ -220,13 +259,26 @@ def _get_verified_otp_txn_for_consent(
     return otp_txn
 
 
+async def _link_otp_to_consent(db: AsyncSession, otp_txn: OtpTxn, consent_id: str) -> None:
+    """
+    Claim the OTP transaction for this consent before the consent commits.
+    SqlOtpStore claims inside the request transaction; memory/redis claim
+    immediately, so a failed commit leaves the OTP used (the customer starts over).
+    """
+    if not await otp_store.link_consent(db, otp_txn.transaction_id, consent_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Consent already created for this transaction",
+        )
+
+
 def _get_active_template(
     db: Session,
     *,
     tenant_id: Optional[str],
     product_id: Optional[str],
     purpose: str,
-) -> ConsentTemplate:
+) -> ActiveTemplate:
     """
     Pick the active consent template for (tenant, product, purpose).
 
@@ -244,17 +296,14 @@ def _get_active_template(
             detail="product_id is required to resolve consent template",
         )
 
-    q = db.query(ConsentTemplate).filter(
-        ConsentTemplate.product_id == product_id,
-        ConsentTemplate.purpose == purpose,
-        ConsentTemplate.is_active == True,  # noqa: E712
+    # Served from the per-worker template cache (see app/template_cache.py)
+    template = template_resolver.resolve(
+        db,
+        tenant_id=tenant_id,
+        product_id=product_id,
+        purpose=purpose,
     )
 
-    if tenant_id:
-        q = q.filter(ConsentTemplate.tenant_id == tenant_id)
-
-    template = q.order_by(ConsentTemplate.version.desc()).first()
-
     if not template:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -264,6 +313,68 @@ def _get_active_template(
     return template
 
 
+async def _add_ingested_consent(
+    db: AsyncSession,
+    *,
+    otp_txn: OtpTxn,
+    template: ActiveTemplate,
+    payload,
+    source: str,
+    source_channel: str,
+    actor_type: str,
+    actor: str,
+) -> Consent:
+    """
+    Add the consent, its 'granted' audit row and the OTP link to the request
+    transaction; the caller commits. Every column of the response is set
+    here, so the caller can return it without refreshing.
+
+    subject_id: otp_txn.application_number (fallback to mobile_number)
+    evidence_ref: otp_txn.transaction_id
+    """
+    # Subject id strategy: application_number (as you requested)
+    subject_id = otp_txn.application_number or otp_txn.mobile_number
+    if not subject_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot derive subject_id (no application_number or mobile_number on OTP transaction)",
+        )
+
+    consent = Consent(
+        id=new_id(),
+        subject_id=subject_id,
+        # We store the use case/purpose in the `purpose` column as done in routes_consent
+        purpose=payload.purpose,
+        status="granted",
+        source=source,
+        meta=payload.meta,
+        tenant_id=payload.tenant_id,
+        product_id=payload.product_id,
+        source_channel=source_channel,
+        actor_type=actor_type,
+        application_number=otp_txn.application_number,
+        mobile_number=otp_txn.mobile_number,
+        template_id=template.id,
+        version=template.version,
+        evidence_ref=otp_txn.transaction_id,
+    )
+
+    db.add(consent)
+    await db.flush()  # consent row goes in before its audit row
+
+    # Write a 'granted' audit log for ingestion-based consent
+    await db.run_sync(
+        write_audit_rows,
+        [audit_row(consent, action="granted", actor=actor, details=payload.meta)],
+    )
+    await db.run_sync(record_grants, [consent])
+
+    # Link otp transaction to this consent
+    await _link_otp_to_consent(db, otp_txn, consent.id)
+
+    return consent
+
+
 # --------- Customer ingestion endpoints ---------
 
 
@@ -272,15 +383,15 @@ def _get_active_template(
     response_model=CustomerLoginInitiateResponse,
     status_code=status.HTTP_200_OK,
 )
-def customer_login_initiate(
+async def customer_login_initiate(
     payload: CustomerLoginInitiateRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Start a customer login / consent flow: generate OTP in SIMULATED mode.
     In future, this will call SMS gateway instead of returning otp.
     """
-    otp_txn = _create_otp_transaction(
+    otp_txn = await _create_otp_transaction(
         db,
         mobile_number=payload.mobile_number,
         channel="customer_login",
@@ -298,15 +409,15 @@ def customer_login_initiate(
     response_model=CustomerVerifyOtpResponse,
     status_code=status.HTTP_200_OK,
 )
-def customer_verify_otp(
+async def customer_verify_otp(
     payload: CustomerVerifyOtpRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Verify OTP for a customer login flow.
     For now, this only validates OTP & marks the otp_transaction as verified.
     """
-    otp_txn = _validate_otp_transaction(
+    otp_txn = await _validate_otp_transaction(
         db,
         transaction_id=payload.transaction_id,
         otp=payload.otp,
@@ -325,9 +436,9 @@ def customer_verify_otp(
     response_model=ConsentOut,
     status_code=status.HTTP_201_CREATED,
 )
-def customer_create_consent(
+async def customer_create_consent(
     payload: CustomerConsentRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Create a consent after a customer OTP flow has been verified.
@@ -336,82 +447,74 @@ def customer_create_consent(
     evidence_ref: otp_txn.transaction_id
     Template version & template_id: derived from ConsentTemplate.
     """
-    otp_txn = _get_verified_otp_txn_for_consent(
+    otp_txn = await _get_verified_otp_txn_for_consent(
         db,
         transaction_id=payload.transaction_id,
         expected_channel="customer_login",
     )
-
-    # Subject id strategy: application_number (as you requested)
-    subject_id = otp_txn.application_number or otp_txn.mobile_number
-    if not subject_id:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cannot derive subject_id (no application_number or mobile_number on OTP transaction)",
-        )
-
-    # Resolve tenant/product/purpose for template lookup
-    tenant_id = payload.tenant_id
-    product_id = payload.product_id
-    purpose = payload.purpose
-
-    template = _get_active_template(
-        db,
-        tenant_id=tenant_id,
-        product_id=product_id,
-        purpose=purpose,
+    template = await db.run_sync(
+        _get_active_template,
+        tenant_id=payload.tenant_id,
+        product_id=payload.product_id,
+        purpose=payload.purpose,
     )
 
-    consent_id = str(uuid4())
-
-    consent = Consent(
-        id=consent_id,
-        subject_id=subject_id,
-        # We store the use case/purpose in the `purpose` column as done in routes_consent
-        purpose=purpose,
-        status="granted",
+    consent = await _add_ingested_consent(
+        db,
+        otp_txn=otp_txn,
+        template=template,
+        payload=payload,
         source="web_ingestion_customer",
-        meta=payload.meta,
-        tenant_id=tenant_id,
-        product_id=product_id,
         source_channel="web_app_customer",
         actor_type="customer",
-        application_number=otp_txn.application_number,
-        mobile_number=otp_txn.mobile_number,
-        template_id=template.id,
-        version=template.version,
-        evidence_ref=otp_txn.transaction_id,
+        actor="customer_ingestion",  # label; can be changed later if needed
     )
+    await db.commit()
 
-    db.add(consent)
-    db.flush()  # get consent.id without full commit yet
+    return _row_to_out(consent)
 
-    # Write a 'granted' audit log for ingestion-based consent
-    db.add(
-        AuditLog(
-            id=str(uuid4()),
-            consent_id=consent.id,
-            action="granted",
-            actor="customer_ingestion",  # label; can be changed later if needed
-
-            product_id=consent.product_id,
-            purpose=consent.purpose,
-            source_channel=getattr(consent, "source_channel", None),
-            actor_type=getattr(consent, "actor_type", None),
-            application_number=getattr(consent, "application_number", None),
-            mobile_number=getattr(consent, "mobile_number", None),
-            evidence_ref=getattr(consent, "evidence_ref", None),
-
-            details=payload.meta,
-        )
-    )
 
-    # Link otp transaction to this consent
-    otp_txn.consent_id = consent.id
-    db.add(otp_txn)
+@router.post(
+    "/customer/verify-and-consent",
+    response_model=ConsentOut,
+    status_code=status.HTTP_201_CREATED,
+)
+async def customer_verify_and_consent(
+    payload: CustomerVerifyAndConsentRequest,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    verify-otp + consent in one request and one transaction: the OTP is marked
+    verified, and the consent, its audit row and the OTP link are written,
+    in a single commit. A failure anywhere leaves the OTP unverified
+    (with OTP_STORE=sql), so the customer can simply retry.
+    """
+    otp_txn = await _check_otp(
+        db,
+        transaction_id=payload.transaction_id,
+        otp=payload.otp,
+        expected_channel="customer_login",
+    )
+    # Resolved before the OTP is claimed, so a bad product/purpose doesn't use it up
+    template = await db.run_sync(
+        _get_active_template,
+        tenant_id=payload.tenant_id,
+        product_id=payload.product_id,
+        purpose=payload.purpose,
+    )
+    await _mark_otp_verified(db, otp_txn)
 
-    db.commit()
-    db.refresh(consent)
+    consent = await _add_ingested_consent(
+        db,
+        otp_txn=otp_txn,
+        template=template,
+        payload=payload,
+        source="web_ingestion_customer",
+        source_channel="web_app_customer",
+        actor_type="customer",
+        actor="customer_ingestion",
+    )
+    await db.commit()
 
     return _row_to_out(consent)
 
@@ -424,15 +527,15 @@ def customer_create_consent(
     response_model=BranchInitiateResponse,
     status_code=status.HTTP_200_OK,
 )
-def branch_initiate(
+async def branch_initiate(
     payload: BranchInitiateRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Start a branch officer–initiated consent flow.
     For now, we only generate OTP for the customer's mobile in SIMULATED mode.
     """
-    otp_txn = _create_otp_transaction(
+    otp_txn = await _create_otp_transaction(
         db,
         mobile_number=payload.mobile_number,
         channel="branch_consent",
@@ -450,15 +553,15 @@ def branch_initiate(
     response_model=BranchVerifyOtpResponse,
     status_code=status.HTTP_200_OK,
 )
-def branch_verify_otp(
+async def branch_verify_otp(
     payload: BranchVerifyOtpRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Verify OTP for a branch officer–initiated consent flow.
     This does NOT create the consent record; that is done by branch/consent.
     """
-    otp_txn = _validate_otp_transaction(
+    otp_txn = await _validate_otp_transaction(
         db,
         transaction_id=payload.transaction_id,
         otp=payload.otp,
@@ -479,9 +582,9 @@ def branch_verify_otp(
     response_model=ConsentOut,
     status_code=status.HTTP_201_CREATED,
 )
-def branch_create_consent(
+async def branch_create_consent(
     payload: BranchConsentRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Create a consent after a branch-initiated OTP flow has been verified.
@@ -491,77 +594,70 @@ def branch_create_consent(
     source_channel: web_app_branch_officer
     Template version & template_id: derived from ConsentTemplate.
     """
-    otp_txn = _get_verified_otp_txn_for_consent(
+    otp_txn = await _get_verified_otp_txn_for_consent(
         db,
         transaction_id=payload.transaction_id,
         expected_channel="branch_consent",
     )
+    template = await db.run_sync(
+        _get_active_template,
+        tenant_id=payload.tenant_id,
+        product_id=payload.product_id,
+        purpose=payload.purpose,
+    )
 
-    subject_id = otp_txn.application_number or otp_txn.mobile_number
-    if not subject_id:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cannot derive subject_id (no application_number or mobile_number on OTP transaction)",
-        )
+    consent = await _add_ingested_consent(
+        db,
+        otp_txn=otp_txn,
+        template=template,
+        payload=payload,
+        source="web_ingestion_branch",
+        source_channel="web_app_branch_officer",
+        actor_type="branch_officer",
+        actor=payload.branch_officer_id,  # so audit shows *who* initiated it
+    )
+    await db.commit()
+
+    return _row_to_out(consent)
 
-    tenant_id = payload.tenant_id
-    product_id = payload.product_id
-    purpose = payload.purpose
 
-    template = _get_active_template(
+@router.post(
+    "/branch/verify-and-consent",
+    response_model=ConsentOut,
+    status_code=status.HTTP_201_CREATED,
+)
+async def branch_verify_and_consent(
+    payload: BranchVerifyAndConsentRequest,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Branch equivalent of customer/verify-and-consent: verify-otp + consent
+    in a single transaction.
+    """
+    otp_txn = await _check_otp(
         db,
-        tenant_id=tenant_id,
-        product_id=product_id,
-        purpose=purpose,
+        transaction_id=payload.transaction_id,
+        otp=payload.otp,
+        expected_channel="branch_consent",
     )
+    template = await db.run_sync(
+        _get_active_template,
+        tenant_id=payload.tenant_id,
+        product_id=payload.product_id,
+        purpose=payload.purpose,
+    )
+    await _mark_otp_verified(db, otp_txn)
 
-    consent_id = str(uuid4())
-
-    consent = Consent(
-        id=consent_id,
-        subject_id=subject_id,
-        purpose=purpose,
-        status="granted",
+    consent = await _add_ingested_consent(
+        db,
+        otp_txn=otp_txn,
+        template=template,
+        payload=payload,
         source="web_ingestion_branch",
-        meta=payload.meta,
-        tenant_id=tenant_id,
-        product_id=product_id,
         source_channel="web_app_branch_officer",
         actor_type="branch_officer",
-        application_number=otp_txn.application_number,
-        mobile_number=otp_txn.mobile_number,
-        template_id=template.id,
-        version=template.version,
-        evidence_ref=otp_txn.transaction_id,
+        actor=payload.branch_officer_id,
     )
-
-    db.add(consent)
-    db.flush()
-
-    # Audit 'granted' via branch ingestion
-    db.add(
-        AuditLog(
-            id=str(uuid4()),
-            consent_id=consent.id,
-            action="granted",
-            actor=payload.branch_officer_id,  # so audit shows *who* initiated it
-
-            product_id=consent.product_id,
-            purpose=consent.purpose,
-            source_channel=getattr(consent, "source_channel", None),
-            actor_type=getattr(consent, "actor_type", None),
-            application_number=getattr(consent, "application_number", None),
-            mobile_number=getattr(consent, "mobile_number", None),
-            evidence_ref=getattr(consent, "evidence_ref", None),
-
-            details=payload.meta,
-        )
-    )
-
-    otp_txn.consent_id = consent.id
-    db.add(otp_txn)
-
-    db.commit()
-    db.refresh(consent)
+    await db.commit()
 
     return _row_to_out(consent)
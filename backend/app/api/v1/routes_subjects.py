@@ -0,0 +1,210 @@
+# backend/app/api/v1/routes_subjects.py
+import hashlib
+import json
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.audit_segments import segment_store
+from app.deps import get_async_audit_read_db, get_async_read_db
+from app.models import AuditLog, Consent
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page
+from .routes_audit import _audit_event_out
+from .routes_consent import ConsentOut, _row_to_out
+
+router = APIRouter()
+
+# ============================
+# Pydantic Schemas
+# ============================
+
+class ConsentTimelineOut(ConsentOut):
+    created_at: Optional[datetime] = None
+    # Audit events of this consent, oldest first (same fields as GET /audit)
+    events: List[Dict[str, Any]] = []
+
+
+# ============================
+# Helpers
+# ============================
+
+def _page_keys(db: Session, column, value: str, cursor: Optional[str], limit: int):
+    """(id, updated_at) of the consents on the page: the identifier index plus one row lookup each."""
+    # (identifier, created_at, id) indexes: one range scan, already in page order
+    q = db.query(Consent.id, Consent.updated_at).filter(column == value)
+    return keyset_page(q, ts_col=Consent.created_at, id_col=Consent.id, cursor=cursor, limit=limit, descending=True)
+
+
+def _consents_by_id(db: Session, consent_ids: List[str]) -> List[Consent]:
+    rows = {c.id: c for c in db.query(Consent).filter(Consent.id.in_(consent_ids))} if consent_ids else {}
+    return [rows[consent_id] for consent_id in consent_ids if consent_id in rows]
+
+
+def _event_versions(db: Session, consent_ids: List[str]) -> Tuple[int, Optional[datetime]]:
+    """(count, newest timestamp) of the page's audit events, off ix_audit_logs_consent_id_timestamp."""
+    if not consent_ids:
+        return 0, None
+    count, newest = db.execute(
+        select(func.count(), func.max(AuditLog.timestamp)).where(AuditLog.consent_id.in_(consent_ids))
+    ).one()
+    return count, newest
+
+
+def _events_by_consent(db: Session, consent_ids: List[str]) -> Dict[str, List[Any]]:
+    """Audit events of every consent on the page in one query (ix_audit_logs_consent_id_timestamp)."""
+    events: Dict[str, List[Any]] = defaultdict(list)
+    if not consent_ids:
+        return events
+    rows = db.execute(
+        select(AuditLog)
+        .where(AuditLog.consent_id.in_(consent_ids))
+        .order_by(AuditLog.consent_id, AuditLog.timestamp, AuditLog.id)
+    ).scalars()
+    for row in rows:
+        events[row.consent_id].append(row)
+    return events
+
+
+def _segment_events_by_consent(consent_ids: List[str]) -> Dict[str, List[Any]]:
+    # AUDIT_STORAGE=segments: one pass over the segments whose consent_id bloom
+    # filter matches any consent on the page, already in (timestamp, id) order
+    events: Dict[str, List[Any]] = defaultdict(list)
+    for event in segment_store.scan(consent_id=frozenset(consent_ids)):
+        events[event.consent_id].append(event)
+    return events
+
+
+def _timeline_etag(cursor: Optional[str], limit: int, keys, next_cursor: Optional[str], versions) -> str:
+    # Every consent change bumps updated_at and writes an audit event, so the
+    # page keys plus the event count / newest timestamp identify the body
+    state = [cursor, limit, next_cursor, [(k.id, k.updated_at) for k in keys], *versions]
+    digest = hashlib.sha256(json.dumps(state, separators=(",", ":"), default=str).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison (RFC 9110): W/"x" matches "x"
+    return "*" in candidates or etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+
+
+async def _timeline(
+    request: Request,
+    column,
+    value: str,
+    cursor: Optional[str],
+    limit: int,
+    db: AsyncSession,
+    audit_db: AsyncSession,
+) -> Response:
+    keys, next_cursor = await db.run_sync(_page_keys, column, value, cursor, limit)
+    consent_ids = [k.id for k in keys]
+    if segment_store is not None:
+        # Segments have no cheap aggregate: the one scan feeds both the validator and the body
+        events = await run_in_threadpool(_segment_events_by_consent, consent_ids)
+        scanned = [e.timestamp for page_events in events.values() for e in page_events]
+        versions = (len(scanned), max(scanned, default=None))
+    else:
+        events = None
+        versions = await audit_db.run_sync(_event_versions, consent_ids)
+
+    # Checked before the page is loaded: a client re-polling an unchanged
+    # timeline costs two index lookups and gets a bodiless 304. A change
+    # landing after this point only makes the ETag older than the body, so
+    # the next poll gets the full page again.
+    etag = _timeline_etag(cursor, limit, keys, next_cursor, versions)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    consents = await db.run_sync(_consents_by_id, consent_ids)
+    if events is None:
+        events = await audit_db.run_sync(_events_by_consent, consent_ids)
+    body = [
+        ConsentTimelineOut(
+            **_row_to_out(c).model_dump(),
+            created_at=c.created_at,
+            events=[_audit_event_out(e) for e in events.get(c.id, [])],
+        )
+        for c in consents
+    ]
+    content = json.dumps(jsonable_encoder(body), separators=(",", ":")).encode("utf-8")
+    return Response(content, media_type="application/json", headers=headers)
+
+
+# ============================
+# Routes
+# ============================
+
+_TIMELINE_DOC = """
+Consents of one customer, newest first, each with its audit events (oldest
+first): the page of consents and all their events come from indexed
+queries over the whole page, instead of one GET /audit call per consent.
+
+- Keyset-paginated over consents: when more exist, X-Next-Cursor carries
+  the cursor for the next page; pass it back as ?cursor=...
+- Responses carry an ETag; send it back as If-None-Match to get 304 Not
+  Modified while the page is unchanged (checked before the page is built).
+"""
+
+
+@router.get(
+    "/{subject_id}/timeline",
+    response_model=List[ConsentTimelineOut],
+    summary="Consents and audit events of a subject",
+    description=_TIMELINE_DOC,
+)
+async def subject_timeline(
+    subject_id: str,
+    request: Request,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_read_db),
+    audit_db: AsyncSession = Depends(get_async_audit_read_db),
+):
+    return await _timeline(request, Consent.subject_id, subject_id, cursor, limit, db, audit_db)
+
+
+@router.get(
+    "/by-mobile/{mobile_number}/timeline",
+    response_model=List[ConsentTimelineOut],
+    summary="Consents and audit events of a mobile number",
+    description=_TIMELINE_DOC,
+)
+async def mobile_timeline(
+    mobile_number: str,
+    request: Request,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_read_db),
+    audit_db: AsyncSession = Depends(get_async_audit_read_db),
+):
+    return await _timeline(request, Consent.mobile_number, mobile_number, cursor, limit, db, audit_db)
+
+
+@router.get(
+    "/by-application/{application_number}/timeline",
+    response_model=List[ConsentTimelineOut],
+    summary="Consents and audit events of an application number",
+    description=_TIMELINE_DOC,
+)
+async def application_timeline(
+    application_number: str,
+    request: Request,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_read_db),
+    audit_db: AsyncSession = Depends(get_async_audit_read_db),
+):
+    return await _timeline(request, Consent.application_number, application_number, cursor, limit, db, audit_db)
@@ -0,0 +1,103 @@
+# backend/app/audit.py
+# Building and writing AuditLog rows.
+#
+# Every audit event snapshots the consent's BFSI context at the time of the
+# event; audit_row() does that from either a Consent instance or a plain dict
+# of consent column values (bulk paths never build ORM objects).
+#
+# All request paths record events through write_audit_rows(), which either
+# inserts them directly or hands them to the outbox (AUDIT_WRITE_MODE, see
+# app/audit_outbox.py). Direct inserts extend the hash chain
+# (AUDIT_HASH_CHAIN, see app/audit_chain.py) and the rollups (AUDIT_ROLLUPS,
+# see app/audit_rollups.py) in the same transaction, but only as it commits:
+# both update rows every writer shares (the chain head, the current hour's
+# counts), and their locks are then held for the COMMIT alone instead of
+# for the rest of the request.
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, Mapping, Optional, Union
+
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from app.audit_chain import chain_rows
+from app.audit_rollups import record_rollups
+from app.config import AUDIT_HASH_CHAIN, AUDIT_ROLLUPS, AUDIT_WRITE_MODE
+from app.ids import new_id
+from app.models import AuditLog, Consent
+
+# Session.info key for rows inserted in this transaction, not yet chained / counted
+_UNLINKED = "audit_unlinked_rows"
+
+# Consent columns copied onto each audit event
+SNAPSHOT_FIELDS = (
+    "product_id",
+    "purpose",
+    "source_channel",
+    "actor_type",
+    "application_number",
+    "mobile_number",
+    "evidence_ref",
+    "tenant_id",
+)
+
+
+def audit_row(
+    consent: Union[Consent, Mapping[str, Any]],
+    *,
+    action: str,
+    actor: Optional[str],
+    details: Optional[Dict] = None,
+) -> Dict[str, Any]:
+    """Column values for one AuditLog row about `consent`."""
+    if isinstance(consent, Mapping):
+        get = consent.get
+    else:
+        get = lambda field: getattr(consent, field, None)  # noqa: E731
+
+    row = {
+        "id": new_id(),
+        "consent_id": get("id"),
+        "action": action,
+        "actor": actor,
+        "details": details,
+        # Set here rather than by the server default: the chain hashes it
+        "timestamp": datetime.utcnow(),
+    }
+    for field in SNAPSHOT_FIELDS:
+        row[field] = get(field)
+    return row
+
+
+def write_audit_rows(db: Session, rows: Iterable[Dict[str, Any]]) -> None:
+    """Record audit rows in the caller's transaction (one executemany)."""
+    rows = list(rows)
+    if not rows:
+        return
+    if AUDIT_WRITE_MODE == "outbox":
+        from app.audit_outbox import audit_writer
+
+        audit_writer.record(db, rows)
+    else:
+        db.execute(insert(AuditLog), rows)
+        if AUDIT_HASH_CHAIN or AUDIT_ROLLUPS:
+            db.info.setdefault(_UNLINKED, []).extend(rows)
+
+
+@event.listens_for(Session, "before_commit")
+def _link_before_commit(session: Session) -> None:
+    rows = session.info.pop(_UNLINKED, None)
+    if not rows:
+        return
+    conn = session.connection()
+    if AUDIT_HASH_CHAIN:
+        chain_rows(conn, rows)
+    if AUDIT_ROLLUPS:
+        record_rollups(conn, rows)
+
+
+# Rolled back (or closed): the rows are gone, nothing to link
+@event.listens_for(Session, "after_transaction_end")
+def _discard_unlinked(session: Session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_UNLINKED, None)
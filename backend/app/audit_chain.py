@@ -0,0 +1,315 @@
+# backend/app/audit_chain.py
+"""
+Tamper-evident hash chain over audit_logs (AUDIT_HASH_CHAIN).
+
+Every audit row written gets a link in audit_chain:
+
+    seq         1, 2, 3, ... in write order, no gaps
+    chain_hash  sha256(previous chain_hash || sha256(canonical row))
+
+so changing, deleting or reordering any row changes every later hash. The
+chain head (last seq and hash) is one audit_chain_head row; extending the
+chain locks it until the transaction ends, so chain writes are serialized:
+
+  AUDIT_WRITE_MODE=sync    each audit-writing transaction links its rows in
+                           before_commit (app/audit.py), so it holds the head
+                           only while linking and committing; concurrent
+                           commits queue on the head, the rest of each request
+                           (and of other uncommitted requests) runs in
+                           parallel. A bulk grant holds it while its one
+                           commit links the whole upload; with atomic=false
+                           it commits, and holds the head, chunk by chunk.
+  AUDIT_WRITE_MODE=outbox  the background writer links whole batches, one
+                           lock per batch (per worker process); requests
+                           never touch the head.
+
+Chain order is therefore commit order (sync) or relay order (outbox).
+
+Every AUDIT_CHECKPOINT_INTERVAL links an audit_checkpoints row records the
+chain hash at that seq and the Merkle root (RFC 6962 tree hash) of the
+block's chain hashes. Checkpoints are what gets handed to a regulator:
+verify_range() recomputes a time range starting from the nearest checkpoint
+before it, up to the first checkpoint (or the head) after it, so a proof
+costs the range plus at most two blocks, never the whole log.
+
+Rows written before the chain existed have no link; verification reports
+them as unchained. Links record the digest version they were hashed with
+(audit_chain.digest_version): version 1 links, written before tenant_id was
+hashed, keep verifying as they are instead of being re-chained. Not
+available with AUDIT_STORAGE=segments.
+
+    python -m app.audit_chain [YYYY-MM-DD] [YYYY-MM-DD]   # verify, prints the report
+"""
+import hashlib
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+
+from app.config import AUDIT_CHECKPOINT_INTERVAL
+from app.models import AuditChainHead, AuditChainLink, AuditCheckpoint, AuditLog
+
+GENESIS = "0" * 64
+_HEAD_ID = 1
+
+# Hashed columns per digest version, in this order. Each link records the
+# version it was hashed with, so links written before a column was added
+# still verify; new links always use DIGEST_VERSION.
+_HASHED = {
+    1: (
+        "id",
+        "consent_id",
+        "action",
+        "actor",
+        "product_id",
+        "purpose",
+        "source_channel",
+        "actor_type",
+        "application_number",
+        "mobile_number",
+        "evidence_ref",
+        "details",
+        "timestamp",
+    ),
+}
+# 2: the tenant the event is attributed to (audit rollups group by it)
+_HASHED[2] = _HASHED[1] + ("tenant_id",)
+DIGEST_VERSION = 2
+
+
+def row_digest(row: Mapping[str, Any], version: int = DIGEST_VERSION) -> bytes:
+    """sha256 of an audit row's canonical JSON form (a dict or a result row mapping)."""
+    values = [row.get(column) for column in _HASHED[version]]
+    ts = _HASHED[version].index("timestamp")
+    values[ts] = values[ts].isoformat() if values[ts] is not None else None
+    if version > 1:
+        # Bind the version itself, so a link cannot be relabelled to an older one
+        values.insert(0, version)
+    canonical = json.dumps(values, sort_keys=True, separators=(",", ":"), default=str, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).digest()
+
+
+def link_hash(prev_hash: str, row: Mapping[str, Any], version: int = DIGEST_VERSION) -> str:
+    return hashlib.sha256(bytes.fromhex(prev_hash) + row_digest(row, version)).hexdigest()
+
+
+def merkle_root(leaves: List[str]) -> str:
+    """RFC 6962 Merkle tree hash over hex leaves (the block's chain hashes)."""
+
+    def mth(lo: int, hi: int) -> bytes:
+        if hi - lo == 1:
+            return hashlib.sha256(b"\x00" + bytes.fromhex(leaves[lo])).digest()
+        k = 1 << ((hi - lo - 1).bit_length() - 1)  # largest power of two < n
+        return hashlib.sha256(b"\x01" + mth(lo, lo + k) + mth(lo + k, hi)).digest()
+
+    if not leaves:
+        return hashlib.sha256(b"").hexdigest()
+    return mth(0, len(leaves)).hex()
+
+
+def ensure_chain_head(bind: Engine) -> None:
+    """Create the (seq 0, GENESIS) head row if missing; safe to race across workers."""
+    with bind.begin() as conn:
+        if conn.execute(select(AuditChainHead.id).where(AuditChainHead.id == _HEAD_ID)).first():
+            return
+    try:
+        with bind.begin() as conn:
+            conn.execute(AuditChainHead.__table__.insert().values(id=_HEAD_ID, seq=0, chain_hash=GENESIS))
+    except IntegrityError:
+        pass  # another worker got there first
+
+
+def chain_rows(conn: Connection, rows: List[Dict[str, Any]], *, interval: int = AUDIT_CHECKPOINT_INTERVAL) -> None:
+    """
+    Link audit rows onto the chain, in list order, inside conn's transaction.
+
+    The rows must already be inserted (same transaction) and carry their
+    timestamp. Holds the head row's lock until the transaction ends.
+    """
+    if not rows:
+        return
+    head = AuditChainHead.__table__
+    # A no-op UPDATE takes the row lock (PostgreSQL) / write lock (SQLite)
+    # before the head is read, so concurrent writers queue here.
+    conn.execute(update(head).where(head.c.id == _HEAD_ID).values(seq=head.c.seq))
+    seq, prev = conn.execute(select(head.c.seq, head.c.chain_hash).where(head.c.id == _HEAD_ID)).one()
+    first = seq + 1
+
+    links = []
+    for row in rows:
+        seq += 1
+        prev = link_hash(prev, row)
+        links.append(
+            {"seq": seq, "audit_log_id": row["id"], "chain_hash": prev, "digest_version": DIGEST_VERSION}
+        )
+    conn.execute(AuditChainLink.__table__.insert(), links)
+    conn.execute(update(head).where(head.c.id == _HEAD_ID).values(seq=seq, chain_hash=prev))
+
+    # Checkpoint every block this batch completed
+    for boundary in range(-(-first // interval) * interval, seq + 1, interval):
+        block = conn.execute(
+            select(AuditChainLink.chain_hash)
+            .where(AuditChainLink.seq > boundary - interval, AuditChainLink.seq <= boundary)
+            .order_by(AuditChainLink.seq)
+        ).scalars().all()
+        conn.execute(
+            AuditCheckpoint.__table__.insert().values(
+                seq=boundary,
+                chain_hash=block[-1],
+                merkle_root=merkle_root(block),
+                created_at=datetime.utcnow(),
+            )
+        )
+
+
+@dataclass
+class ChainReport:
+    verified: bool = True
+    rows_checked: int = 0
+    checkpoints_checked: int = 0
+    # audit_logs rows in the range with no chain link (written before the chain existed)
+    unchained_rows: int = 0
+    first_seq: Optional[int] = None
+    last_seq: Optional[int] = None
+    # Recomputed from (anchor_seq, anchor_hash): the nearest checkpoint before the range
+    anchor_seq: int = 0
+    failure_seq: Optional[int] = None
+    failure_audit_log_id: Optional[str] = None
+    failure_reason: Optional[str] = None
+    seconds: float = 0.0
+
+
+def verify_range(
+    conn: Connection,
+    start_dt: Optional[datetime] = None,
+    end_dt: Optional[datetime] = None,
+    *,
+    batch_size: int = 1000,
+) -> ChainReport:
+    """Verify the chain links of audit rows with a timestamp in [start_dt, end_dt]."""
+    started = time.perf_counter()
+    report = ChainReport()
+
+    in_range = []
+    if start_dt:
+        in_range.append(AuditLog.timestamp >= start_dt)
+    if end_dt:
+        in_range.append(AuditLog.timestamp <= end_dt)
+
+    report.first_seq, report.last_seq = conn.execute(
+        select(func.min(AuditChainLink.seq), func.max(AuditChainLink.seq))
+        .select_from(AuditLog)
+        .join(AuditChainLink, AuditChainLink.audit_log_id == AuditLog.id)
+        .where(*in_range)
+    ).one()
+    report.unchained_rows = conn.execute(
+        select(func.count())
+        .select_from(AuditLog)
+        .outerjoin(AuditChainLink, AuditChainLink.audit_log_id == AuditLog.id)
+        .where(AuditChainLink.seq.is_(None), *in_range)
+    ).scalar_one()
+    if report.first_seq is None:
+        report.seconds = time.perf_counter() - started
+        return report
+
+    anchor = conn.execute(
+        select(AuditCheckpoint.seq, AuditCheckpoint.chain_hash)
+        .where(AuditCheckpoint.seq < report.first_seq)
+        .order_by(AuditCheckpoint.seq.desc())
+        .limit(1)
+    ).first()
+    anchor_seq, prev = anchor if anchor else (0, GENESIS)
+    report.anchor_seq = anchor_seq
+
+    # Run on to the checkpoint closing the last block (or the head) so that
+    # checkpoint's Merkle root and any truncation are checked too
+    closing = conn.execute(
+        select(AuditCheckpoint.seq)
+        .where(AuditCheckpoint.seq >= report.last_seq)
+        .order_by(AuditCheckpoint.seq)
+        .limit(1)
+    ).scalar()
+    if closing is None:
+        closing = conn.execute(select(AuditChainHead.seq).where(AuditChainHead.id == _HEAD_ID)).scalar_one()
+    checkpoints = {
+        cp.seq: cp
+        for cp in conn.execute(
+            select(AuditCheckpoint).where(AuditCheckpoint.seq > anchor_seq, AuditCheckpoint.seq <= closing)
+        )
+    }
+
+    def fail(seq: int, audit_log_id: Optional[str], reason: str) -> ChainReport:
+        report.verified = False
+        report.failure_seq = seq
+        report.failure_audit_log_id = audit_log_id
+        report.failure_reason = reason
+        report.seconds = time.perf_counter() - started
+        return report
+
+    links = conn.execute(
+        select(
+            AuditChainLink.seq,
+            AuditChainLink.chain_hash,
+            AuditChainLink.audit_log_id,
+            AuditChainLink.digest_version,
+            AuditLog.__table__,
+        )
+        .select_from(AuditChainLink)
+        .outerjoin(AuditLog, AuditLog.id == AuditChainLink.audit_log_id)
+        .where(AuditChainLink.seq > anchor_seq, AuditChainLink.seq <= closing)
+        .order_by(AuditChainLink.seq)
+        .execution_options(yield_per=batch_size)
+    ).mappings()
+
+    expected = anchor_seq + 1
+    version = 1
+    block: List[str] = []
+    for link in links:
+        if link["seq"] != expected:
+            return fail(expected, None, "chain link missing")
+        if link["id"] is None:
+            return fail(link["seq"], link["audit_log_id"], "audit row deleted")
+        # Versions only ever go up along the chain
+        if link["digest_version"] not in _HASHED or link["digest_version"] < version:
+            return fail(link["seq"], link["audit_log_id"], "digest version altered")
+        version = link["digest_version"]
+        prev = link_hash(prev, link, version)
+        if prev != link["chain_hash"]:
+            return fail(link["seq"], link["audit_log_id"], "hash mismatch: row altered")
+        block.append(prev)
+        report.rows_checked += 1
+
+        checkpoint = checkpoints.get(link["seq"])
+        if checkpoint is not None:
+            if checkpoint.chain_hash != prev or checkpoint.merkle_root != merkle_root(block):
+                return fail(link["seq"], link["audit_log_id"], "checkpoint mismatch")
+            report.checkpoints_checked += 1
+            block = []
+        expected += 1
+
+    if expected - 1 != closing:
+        return fail(expected, None, "chain truncated")
+
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def main() -> None:
+    from app.api.v1.routes_consent import _parse_date_range
+    from app.database import audit_read_engine
+
+    start_dt, end_dt = _parse_date_range(*(sys.argv[1:3] + [None, None])[:2])
+    with audit_read_engine.connect() as conn:
+        report = verify_range(conn, start_dt, end_dt)
+    print(json.dumps(asdict(report), indent=2))
+    sys.exit(0 if report.verified else 1)
+
+
+if __name__ == "__main__":
+    main()
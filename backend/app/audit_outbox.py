@@ -0,0 +1,304 @@
+# backend/app/audit_outbox.py
+# AUDIT_WRITE_MODE=outbox: audit events leave the request path.
+#
+# Requests record events through app.audit.write_audit_rows as usual; instead
+# of inserting into audit_logs (six indexes, shared with the regulator reads)
+# the event goes to an outbox, and one background writer thread per worker
+# moves events into audit_logs - in the main database or AUDIT_DATABASE_URL -
+# or, with AUDIT_STORAGE=segments, into segment files (app/audit_segments.py),
+# up to AUDIT_BATCH_SIZE per transaction / fsync. Many requests' events share
+# one commit (group commit).
+#
+# AUDIT_OUTBOX_DURABILITY:
+#   transactional  an audit_outbox row in the request transaction. The event
+#                  commits or rolls back with the consent change and survives
+#                  a crash; relay is at-least-once, duplicates are dropped by
+#                  audit_logs' primary key.
+#   memory         the event is queued in-process once the request commits.
+#                  No extra write in the request at all, but a crash loses
+#                  events not yet written (up to AUDIT_FLUSH_INTERVAL_MS).
+#
+# Either way audit reads lag writes by up to AUDIT_FLUSH_INTERVAL_MS. Events
+# carry their own timestamp, taken when the request recorded them.
+
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy import MetaData, delete, event, insert, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.config import (
+    AUDIT_BATCH_SIZE,
+    AUDIT_DATABASE_URL,
+    AUDIT_FLUSH_INTERVAL_MS,
+    AUDIT_HASH_CHAIN,
+    AUDIT_OUTBOX_DURABILITY,
+    AUDIT_ROLLUPS,
+    AUDIT_WRITE_MODE,
+)
+from app.audit_chain import chain_rows
+from app.audit_rollups import record_rollups
+from app.audit_segments import SegmentStore, segment_store
+from app.database import audit_engine, engine
+from app.models import AuditChainHead, AuditChainLink, AuditCheckpoint, AuditLog, AuditOutbox, AuditRollup
+
+logger = logging.getLogger(__name__)
+
+# Session.info key for events waiting on the request's commit (memory durability)
+_PENDING = "audit_outbox_pending"
+
+
+def _to_payload(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {**row, "timestamp": row["timestamp"].isoformat()}
+
+
+def _from_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {**payload, "timestamp": datetime.fromisoformat(payload["timestamp"])}
+
+
+def _insert_audit_rows(conn: Connection, rows: List[Dict[str, Any]]) -> None:
+    """Insert into audit_logs, skipping ids that are already there (relay retries)."""
+    if AUDIT_HASH_CHAIN or AUDIT_ROLLUPS:
+        # A replayed row must not get a second chain link or be counted
+        # twice: drop replays up front
+        existing = set(
+            conn.execute(select(AuditLog.id).where(AuditLog.id.in_([row["id"] for row in rows]))).scalars()
+        )
+        rows = [row for row in rows if row["id"] not in existing]
+        if rows:
+            conn.execute(insert(AuditLog), rows)
+            if AUDIT_HASH_CHAIN:
+                chain_rows(conn, rows)
+            if AUDIT_ROLLUPS:
+                record_rollups(conn, rows)
+        return
+
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        conn.execute(insert(AuditLog), rows)
+        return
+    conn.execute(dialect_insert(AuditLog).on_conflict_do_nothing(index_elements=["id"]), rows)
+
+
+class AuditWriter:
+    def __init__(
+        self,
+        *,
+        durability: str = AUDIT_OUTBOX_DURABILITY,
+        source_engine: Engine = engine,
+        target_engine: Engine = audit_engine,
+        segments: Optional[SegmentStore] = segment_store,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_interval_seconds: float = AUDIT_FLUSH_INTERVAL_MS / 1000,
+    ):
+        if durability not in ("transactional", "memory"):
+            raise ValueError(f"Unknown AUDIT_OUTBOX_DURABILITY {durability!r}; expected transactional or memory")
+        if segments is not None and AUDIT_ROLLUPS and (durability != "transactional" or target_engine is not source_engine):
+            # Rollups are exact only when they commit with the outbox delete;
+            # any other order counts a replayed batch twice or a lost one never
+            raise ValueError(
+                "AUDIT_ROLLUPS with AUDIT_STORAGE=segments needs AUDIT_OUTBOX_DURABILITY=transactional "
+                "and no AUDIT_DATABASE_URL (or set AUDIT_ROLLUPS=0)"
+            )
+        self.durability = durability
+        self.source_engine = source_engine
+        self.target_engine = target_engine
+        # Set: events go to segment files instead of target_engine's audit_logs
+        self.segments = segments
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._flush_lock = threading.Lock()
+
+        # Totals since start, for logs and the benchmark
+        self.rows_written = 0
+        self.batches_written = 0
+
+    # ---- request side ----
+
+    def record(self, db: Session, rows: List[Dict[str, Any]]) -> None:
+        """Add audit rows to the outbox as part of db's transaction."""
+        now = datetime.utcnow()
+        for row in rows:
+            row.setdefault("timestamp", now)
+
+        if self.durability == "transactional":
+            db.execute(insert(AuditOutbox), [{"payload": _to_payload(row)} for row in rows])
+        else:
+            # Handed to the writer when this transaction commits, dropped if it
+            # ends any other way (begin() so a rollback has a transaction to end)
+            if not db.in_transaction():
+                db.begin()
+            db.info.setdefault(_PENDING, []).extend(rows)
+
+    def enqueue(self, rows: List[Dict[str, Any]]) -> None:
+        self._queue.extend(rows)
+        if len(self._queue) >= self.batch_size:
+            self._wake.set()
+
+    # ---- writer side ----
+
+    def flush(self) -> int:
+        """Write one batch; returns the number of events moved."""
+        with self._flush_lock:
+            if self.durability == "transactional":
+                written = self._relay_outbox()
+            else:
+                written = self._write_queued()
+        if written:
+            self.rows_written += written
+            self.batches_written += 1
+        return written
+
+    def drain(self) -> int:
+        """Flush until nothing is pending."""
+        total = 0
+        while True:
+            written = self.flush()
+            total += written
+            if written < self.batch_size:
+                return total
+
+    def _relay_outbox(self) -> int:
+        with self.source_engine.begin() as src:
+            # SKIP LOCKED (PostgreSQL) lets every worker's writer take its own batch
+            batch = src.execute(
+                select(AuditOutbox.seq, AuditOutbox.payload)
+                .order_by(AuditOutbox.seq)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if not batch:
+                return 0
+            rows = [_from_payload(payload) for _, payload in batch]
+
+            if self.segments is not None:
+                # fsync'd before the delete commits; replays are dropped on read and
+                # seal, and the rollups commit (or roll back) with the delete
+                self.segments.append(rows)
+                if AUDIT_ROLLUPS:
+                    record_rollups(src, rows)
+            elif self.target_engine is self.source_engine:
+                # Move and delete in the same transaction: exactly once
+                _insert_audit_rows(src, rows)
+            else:
+                # Target commits first; a crash before the delete below only
+                # replays the batch, and replays are ignored by primary key
+                with self.target_engine.begin() as dst:
+                    _insert_audit_rows(dst, rows)
+
+            src.execute(delete(AuditOutbox).where(AuditOutbox.seq.in_([seq for seq, _ in batch])))
+        return len(rows)
+
+    def _write_queued(self) -> int:
+        batch = []
+        while self._queue and len(batch) < self.batch_size:
+            batch.append(self._queue.popleft())
+        if not batch:
+            return 0
+        try:
+            if self.segments is not None:
+                self.segments.append(batch)
+            else:
+                with self.target_engine.begin() as dst:
+                    _insert_audit_rows(dst, batch)
+        except Exception:
+            # Keep the events (in order) for the next attempt
+            self._queue.extendleft(reversed(batch))
+            raise
+        return len(batch)
+
+    def _run(self) -> None:
+        if self.segments is not None:
+            try:
+                self.segments.seal_orphans()
+            except Exception:
+                logger.exception("audit writer: sealing orphaned segments failed")
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval_seconds)
+            self._wake.clear()
+            try:
+                self.drain()
+                if self.segments is not None:
+                    self.segments.roll()
+            except Exception:
+                logger.exception("audit writer: batch failed; retrying")
+                self._stopping.wait(1)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10) -> None:
+        """Stop the thread, then write whatever is still pending."""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        self._thread = None
+        try:
+            self.drain()
+        except Exception:
+            logger.exception("audit writer: final flush failed (%d events queued)", len(self._queue))
+        if self.segments is not None:
+            self.segments.close()
+        logger.info("audit writer: %d events in %d batches", self.rows_written, self.batches_written)
+
+    def __len__(self) -> int:
+        """Events queued in this process (memory durability)."""
+        return len(self._queue)
+
+
+audit_writer = AuditWriter()
+
+
+if AUDIT_WRITE_MODE == "outbox" and audit_writer.durability == "memory":
+
+    @event.listens_for(Session, "after_commit")
+    def _after_commit(session: Session) -> None:
+        rows = session.info.pop(_PENDING, None)
+        if rows:
+            audit_writer.enqueue(rows)
+
+    # Fires after after_commit; anything left over was rolled back or closed
+    @event.listens_for(Session, "after_transaction_end")
+    def _after_transaction_end(session: Session, transaction) -> None:
+        if transaction.parent is None:
+            session.info.pop(_PENDING, None)
+
+
+def create_audit_tables() -> None:
+    """
+    Create audit_logs, the hash-chain tables and audit_rollups in
+    AUDIT_DATABASE_URL (main-database tables come from create_all in main.py).
+    """
+    if not AUDIT_DATABASE_URL:
+        return
+    # Same table minus the foreign key: consents lives in the other database
+    table = AuditLog.__table__.to_metadata(MetaData())
+    for constraint in list(table.foreign_key_constraints):
+        table.constraints.discard(constraint)
+    table.create(bind=audit_engine, checkfirst=True)
+    for other in (
+        AuditChainLink.__table__,
+        AuditChainHead.__table__,
+        AuditCheckpoint.__table__,
+        AuditRollup.__table__,
+    ):
+        other.create(bind=audit_engine, checkfirst=True)
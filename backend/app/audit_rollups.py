@@ -0,0 +1,237 @@
+# backend/app/audit_rollups.py
+"""
+Pre-aggregated audit event counts (AUDIT_ROLLUPS) behind GET /audit/stats,
+so regulator dashboards never scan or download audit_logs.
+
+audit_rollups holds one row per (granularity, bucket, tenant_id, product_id,
+purpose, action, source_channel, actor_type) with the number of events in
+it; granularity is "hour", "day" or "month" (bucket = start of the period,
+UTC). Every event adds 1 to its hour, day and month rows:
+
+  AUDIT_WRITE_MODE=sync    in the request transaction, as it commits: the
+                           Session before_commit listener in app/audit.py
+                           counts the rows it inserted, right after linking
+                           them into the hash chain, so the shared rollup
+                           rows are locked for the commit alone
+  AUDIT_WRITE_MODE=outbox  by the background writer, once per batch, in the
+                           transaction that inserts the batch into audit_logs;
+                           with AUDIT_STORAGE=segments, in the outbox relay
+                           transaction that deletes the batch from the outbox
+
+so counts stay exact: a batch is counted in the same commit that makes it
+written, a rolled-back one is never counted, and a replayed batch is not
+counted again. Segments are files, so with AUDIT_STORAGE=segments that
+commit exists only for transactional durability with audit tables in the
+main database; other combinations are refused at startup
+(app/audit_outbox.py AuditWriter).
+
+A stats query reads rows of one granularity for a series, and for totals
+whole months plus the days at either end of the range: its cost depends on
+the buckets and dimension combinations in the range, not on the number of
+events. Dimensions missing on the event are stored as "".
+
+Rollups live next to audit_logs (AUDIT_DATABASE_URL when set). Events
+written before the table existed are counted by rebuild(), which runs on
+startup when the table is still empty; with AUDIT_STORAGE=segments their
+tenant_id is "" (segment records do not carry it). audit_logs.tenant_id
+itself comes from migration e1a7c4d9b2f6.
+
+    python -m app.audit_rollups      # rebuild from audit_logs / segments (stop writers first)
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import AuditLog, AuditRollup
+
+DIMENSIONS = ("tenant_id", "product_id", "purpose", "action", "source_channel", "actor_type")
+GRANULARITIES = ("hour", "day", "month")
+
+RollupKey = Tuple[Any, ...]  # (granularity, bucket, *DIMENSIONS)
+
+# Rows per insert while rebuilding / source rows per fetch
+REBUILD_BATCH_SIZE = 10000
+
+
+def _bucket(ts: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    return ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(month: datetime) -> datetime:
+    return month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+
+
+def _totals_filter(start_dt: Optional[datetime], end_dt: Optional[datetime]):
+    """
+    Rows covering [start_dt, end_dt] (whole days) exactly once: month rows
+    for the months fully inside it, day rows for the rest.
+    """
+    bucket = AuditRollup.bucket
+    # Months [first_month, end_month) are fully inside the range
+    first_month = None
+    if start_dt:
+        first_month = _bucket(start_dt, "month")
+        if first_month < start_dt:
+            first_month = _next_month(first_month)
+    end_month = None
+    if end_dt:
+        end_month = _bucket(end_dt, "month")
+        if _next_month(end_month) <= end_dt + timedelta(microseconds=1):
+            end_month = _next_month(end_month)
+    if first_month and end_month and first_month >= end_month:
+        # No whole month inside: days only
+        return and_(AuditRollup.granularity == "day", bucket >= start_dt, bucket <= end_dt)
+
+    months = [AuditRollup.granularity == "month"]
+    parts = []
+    if first_month:
+        months.append(bucket >= first_month)
+        parts.append(and_(AuditRollup.granularity == "day", bucket >= start_dt, bucket < first_month))
+    if end_month:
+        months.append(bucket < end_month)
+        parts.append(and_(AuditRollup.granularity == "day", bucket >= end_month, bucket <= end_dt))
+    return or_(and_(*months), *parts)
+
+
+def count_events(rows: Iterable[Any]) -> Counter:
+    """Events per rollup key, from audit row dicts, result rows or AuditEvents."""
+    counts: Counter = Counter()
+    for row in rows:
+        if isinstance(row, Mapping):
+            get = row.get
+        else:
+            get = lambda field, row=row: getattr(row, field, None)  # noqa: E731
+        dims = tuple(get(field) or "" for field in DIMENSIONS)
+        ts = get("timestamp")
+        for granularity in GRANULARITIES:
+            counts[(granularity, _bucket(ts, granularity), *dims)] += 1
+    return counts
+
+
+def _key_dict(key: RollupKey, events: int) -> Dict[str, Any]:
+    return {"granularity": key[0], "bucket": key[1], **dict(zip(DIMENSIONS, key[2:])), "events": events}
+
+
+def record_rollups(conn: Connection, rows: List[Dict[str, Any]]) -> None:
+    """
+    Add audit rows (with timestamp) to the rollups inside conn's transaction.
+    The rows must be newly written: replays are counted again.
+    """
+    counts = count_events(rows)
+    if not counts:
+        return
+    # Sorted: concurrent writers lock rollup rows in the same order (no deadlocks)
+    params = [_key_dict(key, counts[key]) for key in sorted(counts)]
+
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        table = AuditRollup.__table__
+        for p in params:
+            key_match = [table.c[name] == p[name] for name in ("granularity", "bucket", *DIMENSIONS)]
+            if not conn.execute(update(table).where(*key_match).values(events=table.c.events + p["events"])).rowcount:
+                conn.execute(insert(table), [p])
+        return
+    stmt = dialect_insert(AuditRollup)
+    conn.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["granularity", "bucket", *DIMENSIONS],
+            set_={"events": AuditRollup.events + stmt.excluded.events},
+        ),
+        params,
+    )
+
+
+def stats(
+    db: Session,
+    *,
+    interval: Optional[str],
+    group_by: Sequence[str],
+    start_dt: Optional[datetime] = None,
+    end_dt: Optional[datetime] = None,
+    **filters: Optional[str],
+) -> List[Dict[str, Any]]:
+    """
+    Event counts grouped by group_by (DIMENSIONS), per interval bucket
+    ("hour" / "day" / "month") or over the whole range (None), oldest bucket
+    first. filters are DIMENSIONS values (None/empty ignored). The range is
+    matched on bucket starts, so it is exact for whole hours / days / months
+    with an interval and for whole days without one.
+    """
+    columns = [getattr(AuditRollup, field) for field in group_by]
+    if interval:
+        columns.insert(0, AuditRollup.bucket)
+    q = select(*columns, func.sum(AuditRollup.events).label("events"))
+    for field, value in filters.items():
+        if value:
+            q = q.where(getattr(AuditRollup, field) == value)
+    if interval:
+        q = q.where(AuditRollup.granularity == interval)
+        if start_dt:
+            q = q.where(AuditRollup.bucket >= _bucket(start_dt, interval))
+        if end_dt:
+            q = q.where(AuditRollup.bucket <= end_dt)
+    else:
+        q = q.where(_totals_filter(start_dt, end_dt))
+    if columns:
+        q = q.group_by(*columns).order_by(*columns)
+    return [dict(row) for row in db.execute(q).mappings() if row["events"]]
+
+
+def _source_rows(bind: Engine):
+    from app.audit_segments import segment_store
+
+    if segment_store is not None:
+        yield from segment_store.scan()
+        return
+    columns = [AuditLog.timestamp, *(getattr(AuditLog, field) for field in DIMENSIONS)]
+    with bind.connect() as conn:
+        yield from conn.execute(select(*columns).execution_options(yield_per=REBUILD_BATCH_SIZE)).mappings()
+
+
+def rebuild(bind: Engine) -> int:
+    """Replace audit_rollups with counts over every audit event; returns rows written."""
+    counts = count_events(_source_rows(bind))
+    params = [_key_dict(key, counts[key]) for key in sorted(counts)]
+    with bind.begin() as conn:
+        conn.execute(delete(AuditRollup))
+        for i in range(0, len(params), REBUILD_BATCH_SIZE):
+            conn.execute(insert(AuditRollup), params[i:i + REBUILD_BATCH_SIZE])
+    return len(params)
+
+
+def rebuild_if_empty(bind: Engine) -> None:
+    """Populate audit_rollups on first start against a database that already has audit events."""
+    from app.audit_segments import segment_store
+
+    with bind.connect() as conn:
+        if conn.execute(select(AuditRollup.bucket).limit(1)).first() is not None:
+            return
+        if segment_store is None and conn.execute(select(AuditLog.id).limit(1)).first() is None:
+            return
+    try:
+        rebuild(bind)
+    except IntegrityError:
+        pass  # another worker rebuilt it at the same time
+
+
+def main() -> None:
+    from app.database import audit_engine
+
+    print(f"audit_rollups: {rebuild(audit_engine)} rows")
+
+
+if __name__ == "__main__":
+    main()
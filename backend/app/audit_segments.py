@@ -0,0 +1,582 @@
+# backend/app/audit_segments.py
+# AUDIT_STORAGE=segments: audit events live in append-only segment files
+# instead of the audit_logs table.
+#
+# Audit events are never updated, and regulator replay is the same time-range
+# scan over and over; a B-tree table with six indexes read through the ORM is
+# the slow way to do that. Here the outbox writer (app/audit_outbox.py)
+# appends each batch to a segment file, and reads are sequential scans over
+# mmap'd files that skip whole segments by timestamp range and bloom filter.
+#
+# Files under AUDIT_SEGMENT_DIR, named <partition start>-<writer>-<n>:
+#   .log  the segment one writer process is appending to: records in arrival
+#         order, fsync'd per batch, flock'd for as long as the writer has it open.
+#   .seg  a sealed segment: immutable, records deduplicated and sorted by
+#         (timestamp, id), then a record offsets table, a JSON footer (row
+#         count, min/max timestamp, bloom filters over consent_id and
+#         mobile_number) and a fixed-size trailer.
+#
+# A writer seals its .log when its partition (AUDIT_SEGMENT_SPAN_SECONDS of
+# arrival time) ends, after AUDIT_SEGMENT_MAX_ROWS rows, and when it stops.
+# A .log whose writer died is sealed by the next writer to start and by the
+# janitor; a torn last record is dropped (its outbox batch was never deleted,
+# so the relay appends it again). Relay retries can append an event twice:
+# sealing and reads drop repeated (timestamp, id) keys.
+#
+# Record: <I body length><q timestamp, microseconds since the epoch (UTC)>,
+# then each of _FIELDS as <I byte length> + UTF-8, 0xFFFFFFFF for NULL.
+# details is stored as JSON text.
+
+import base64
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, BinaryIO, Callable, Dict, FrozenSet, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
+
+try:  # POSIX only; elsewhere orphaned .log files are not sealed automatically
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+from app.config import (
+    AUDIT_SEGMENT_DIR,
+    AUDIT_SEGMENT_MAX_ROWS,
+    AUDIT_SEGMENT_SPAN_SECONDS,
+    AUDIT_STORAGE,
+    AUDIT_WRITE_MODE,
+)
+from app.pagination import decode_key_cursor, encode_key_cursor
+
+logger = logging.getLogger(__name__)
+
+# audit_logs columns, in record order (timestamp is in the record header)
+_FIELDS = (
+    "id",
+    "consent_id",
+    "action",
+    "actor",
+    "product_id",
+    "purpose",
+    "source_channel",
+    "actor_type",
+    "application_number",
+    "mobile_number",
+    "evidence_ref",
+    "details",
+)
+_FIELD_INDEX = {field: i for i, field in enumerate(_FIELDS)}
+
+# Per-segment bloom filters: the lookups regulators run across the whole log
+BLOOM_FIELDS = ("consent_id", "mobile_number")
+BLOOM_FP_RATE = 0.01
+
+_HEAD = struct.Struct("<Iq")
+_LEN = struct.Struct("<I")
+_OFFSET = struct.Struct("<Q")
+_NULL = 0xFFFFFFFF
+# row count, offsets table position, footer length, magic
+_TRAILER = struct.Struct("<QQQ8s")
+_MAGIC = b"AUDSEG01"
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class AuditEvent(NamedTuple):
+    """One audit event read from a segment; attribute names match AuditLog."""
+    id: str
+    consent_id: str
+    timestamp: datetime
+    action: str
+    actor: Optional[str]
+    product_id: Optional[str]
+    purpose: Optional[str]
+    source_channel: Optional[str]
+    actor_type: Optional[str]
+    application_number: Optional[str]
+    mobile_number: Optional[str]
+    evidence_ref: Optional[str]
+    details: Any
+
+
+def to_micros(dt: datetime) -> int:
+    """Naive-UTC (or aware) datetime -> microseconds since the epoch."""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return (dt - _EPOCH) // timedelta(microseconds=1)
+
+
+def from_micros(us: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=us)
+
+
+# ---- records ----
+
+def _encode(row: Dict[str, Any]) -> bytes:
+    parts = []
+    for field in _FIELDS:
+        value = row.get(field)
+        if value is None:
+            parts.append(_LEN.pack(_NULL))
+            continue
+        if field == "details":
+            value = json.dumps(value, separators=(",", ":"), default=str)
+        data = str(value).encode("utf-8")
+        parts.append(_LEN.pack(len(data)))
+        parts.append(data)
+    body = b"".join(parts)
+    return _HEAD.pack(len(body), to_micros(row["timestamp"])) + body
+
+
+def _decode(buf, pos: int) -> Tuple[int, List[Optional[str]]]:
+    """(timestamp, field values) of the record at pos."""
+    _, ts = _HEAD.unpack_from(buf, pos)
+    pos += _HEAD.size
+    values: List[Optional[str]] = []
+    for _ in _FIELDS:
+        (n,) = _LEN.unpack_from(buf, pos)
+        pos += _LEN.size
+        if n == _NULL:
+            values.append(None)
+        else:
+            values.append(str(buf[pos:pos + n], "utf-8"))
+            pos += n
+    return ts, values
+
+
+def _iter_records(buf, start: int, end: int) -> Iterator[Tuple[int, int]]:
+    """(position, next position) of each complete record in buf[start:end]."""
+    pos = start
+    while pos + _HEAD.size <= end:
+        (length,) = _LEN.unpack_from(buf, pos)
+        nxt = pos + _HEAD.size + length
+        if nxt > end:
+            return  # torn tail of a .log
+        yield pos, nxt
+        pos = nxt
+
+
+def _event(ts: int, values: List[Optional[str]]) -> AuditEvent:
+    fields = dict(zip(_FIELDS, values))
+    details = fields.pop("details")
+    return AuditEvent(
+        timestamp=from_micros(ts),
+        details=None if details is None else json.loads(details),
+        **fields,
+    )
+
+
+def _map(path: str):
+    """Read-only mmap of the whole file (b"" when empty: mmap rejects length 0)."""
+    with open(path, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+# ---- bloom filters ----
+
+class BloomFilter:
+    def __init__(self, n_bits: int, n_hashes: int, bits: Optional[bytes] = None):
+        self.n_bits = n_bits
+        self.n_hashes = n_hashes
+        self.bits = bytearray(bits) if bits is not None else bytearray((n_bits + 7) // 8)
+
+    @classmethod
+    def for_items(cls, n_items: int, fp_rate: float = BLOOM_FP_RATE) -> "BloomFilter":
+        n_items = max(n_items, 1)
+        n_bits = max(64, math.ceil(-n_items * math.log(fp_rate) / math.log(2) ** 2))
+        return cls(n_bits, max(1, round(n_bits / n_items * math.log(2))))
+
+    def _positions(self, value: str) -> Iterator[int]:
+        # Double hashing (Kirsch-Mitzenmacher) over one 128-bit digest
+        h1, h2 = struct.unpack("<QQ", hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest())
+        for i in range(self.n_hashes):
+            yield (h1 + i * h2) % self.n_bits
+
+    def add(self, value: str) -> None:
+        for p in self._positions(value):
+            self.bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[p >> 3] >> (p & 7) & 1 for p in self._positions(value))
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"bits": self.n_bits, "hashes": self.n_hashes, "data": base64.b64encode(self.bits).decode("ascii")}
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "BloomFilter":
+        return cls(data["bits"], data["hashes"], base64.b64decode(data["data"]))
+
+
+# ---- sealed segments ----
+
+class SealedSegment:
+    """An mmap'd .seg file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._buf = _map(path)
+        if len(self._buf) < _TRAILER.size:
+            raise ValueError(f"{path}: not a sealed audit segment")
+        count, offsets_pos, footer_len, magic = _TRAILER.unpack_from(self._buf, len(self._buf) - _TRAILER.size)
+        if magic != _MAGIC:
+            raise ValueError(f"{path}: not a sealed audit segment")
+
+        footer_pos = offsets_pos + count * _OFFSET.size
+        footer = json.loads(self._buf[footer_pos:footer_pos + footer_len])
+        self.count = count
+        self.min_ts = footer["min_ts"]
+        self.max_ts = footer["max_ts"]
+        self.blooms = {field: BloomFilter.from_json(b) for field, b in footer["blooms"].items()}
+        self._offsets_pos = offsets_pos
+
+    def may_contain(self, start_us: Optional[int], end_us: Optional[int], lookups: Dict[str, str]) -> bool:
+        if start_us is not None and self.max_ts < start_us:
+            return False
+        if end_us is not None and self.min_ts > end_us:
+            return False
+        return all(
+            any(v in self.blooms[field] for v in value) if isinstance(value, frozenset) else value in self.blooms[field]
+            for field, value in lookups.items()
+            if field in self.blooms
+        )
+
+    def _key_at(self, i: int) -> Tuple[int, str]:
+        (pos,) = _OFFSET.unpack_from(self._buf, self._offsets_pos + i * _OFFSET.size)
+        _, ts = _HEAD.unpack_from(self._buf, pos)
+        # id is the first field
+        (n,) = _LEN.unpack_from(self._buf, pos + _HEAD.size)
+        start = pos + _HEAD.size + _LEN.size
+        return ts, str(self._buf[start:start + n], "utf-8")
+
+    def _first_index(self, bound: Tuple[int, str], *, strict: bool) -> int:
+        """Index of the first record whose key is >= bound (> bound when strict)."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key = self._key_at(mid)
+            if key < bound or (strict and key == bound):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def scan(
+        self, start_us: Optional[int], end_us: Optional[int], after: Optional[Tuple[int, str]]
+    ) -> Iterator[Tuple[int, List[Optional[str]]]]:
+        """Records in (timestamp, id) order from the first one in range to end_us."""
+        first = 0
+        if start_us is not None:
+            first = self._first_index((start_us, ""), strict=False)
+        if after is not None:
+            first = max(first, self._first_index(after, strict=True))
+        if first >= self.count:
+            return
+        (pos,) = _OFFSET.unpack_from(self._buf, self._offsets_pos + first * _OFFSET.size)
+
+        for pos, _ in _iter_records(self._buf, pos, self._offsets_pos):
+            ts, values = _decode(self._buf, pos)
+            if end_us is not None and ts > end_us:
+                return
+            yield ts, values
+
+
+# Sealed files never change: keep recently used ones mapped
+_open_sealed = lru_cache(maxsize=256)(SealedSegment)
+
+
+def _scan_log(
+    path: str, start_us: Optional[int], end_us: Optional[int], after: Optional[Tuple[int, str]]
+) -> List[Tuple[int, List[Optional[str]]]]:
+    """Matching records of an unsealed .log, sorted by (timestamp, id)."""
+    buf = _map(path)
+    out = []
+    for pos, _ in _iter_records(buf, 0, len(buf)):
+        ts, values = _decode(buf, pos)
+        if start_us is not None and ts < start_us:
+            continue
+        if end_us is not None and ts > end_us:
+            continue
+        if after is not None and (ts, values[0]) <= after:
+            continue
+        out.append((ts, values))
+    out.sort(key=lambda r: (r[0], r[1][0]))
+    return out
+
+
+def _fsync_dir(directory: str) -> None:
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def seal_file(log_path: str) -> int:
+    """Turn a .log into a .seg; returns the rows sealed. The caller holds the .log's lock."""
+    seg_path = log_path[:-len(".log")] + ".seg"
+    if os.path.exists(seg_path):
+        # Sealed already; the writer died before removing the .log
+        os.remove(log_path)
+        return 0
+
+    buf = _map(log_path)
+    records = {}
+    for pos, nxt in _iter_records(buf, 0, len(buf)):
+        ts, values = _decode(buf, pos)
+        records[(ts, values[0])] = (values, buf[pos:nxt])
+
+    if records:
+        keys = sorted(records)
+        blooms = {field: BloomFilter.for_items(len(keys)) for field in BLOOM_FIELDS}
+        offsets = []
+        position = 0
+        tmp_path = seg_path + ".tmp"
+        with open(tmp_path, "wb") as out:
+            for key in keys:
+                values, raw = records[key]
+                for field, bloom in blooms.items():
+                    value = values[_FIELD_INDEX[field]]
+                    if value is not None:
+                        bloom.add(value)
+                offsets.append(position)
+                out.write(raw)
+                position += len(raw)
+
+            footer = json.dumps(
+                {
+                    "min_ts": keys[0][0],
+                    "max_ts": keys[-1][0],
+                    "blooms": {field: bloom.to_json() for field, bloom in blooms.items()},
+                },
+                separators=(",", ":"),
+            ).encode("utf-8")
+            out.write(b"".join(_OFFSET.pack(o) for o in offsets))
+            out.write(footer)
+            out.write(_TRAILER.pack(len(offsets), position, len(footer), _MAGIC))
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, seg_path)
+        _fsync_dir(os.path.dirname(seg_path))
+
+    os.remove(log_path)
+    return len(records)
+
+
+# ---- the store ----
+
+@dataclass
+class _ActiveSegment:
+    path: str
+    fh: BinaryIO
+    partition: int
+    rows: int = 0
+
+
+class SegmentStore:
+    def __init__(
+        self,
+        directory: str = AUDIT_SEGMENT_DIR,
+        *,
+        span_seconds: int = AUDIT_SEGMENT_SPAN_SECONDS,
+        max_rows: int = AUDIT_SEGMENT_MAX_ROWS,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.directory = directory
+        self.span_seconds = span_seconds
+        self.max_rows = max_rows
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._writer_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._segments_opened = 0
+        self._active: Optional[_ActiveSegment] = None
+
+    # ---- writer side (the outbox writer thread) ----
+
+    def append(self, rows: List[Dict[str, Any]]) -> None:
+        """Append audit_logs column dicts (with timestamp) and fsync: durable on return."""
+        if not rows:
+            return
+        data = b"".join(_encode(row) for row in rows)
+        with self._lock:
+            partition = int(self.clock()) // self.span_seconds
+            active = self._active
+            if active is not None and (active.partition != partition or active.rows >= self.max_rows):
+                self._seal_active()
+            if self._active is None:
+                self._active = self._open_active(partition)
+
+            fh = self._active.fh
+            size = fh.tell()
+            try:
+                fh.write(data)
+                fh.flush()
+                os.fsync(fh.fileno())
+            except Exception:
+                # Never leave a torn record in front of the next batch
+                fh.truncate(size)
+                raise
+            self._active.rows += len(rows)
+
+    def roll(self) -> None:
+        """Seal the active segment if its partition has ended (idle writers)."""
+        with self._lock:
+            active = self._active
+            if active is not None and active.partition != int(self.clock()) // self.span_seconds:
+                self._seal_active()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._active is not None:
+                self._seal_active()
+
+    def _open_active(self, partition: int) -> _ActiveSegment:
+        os.makedirs(self.directory, exist_ok=True)
+        self._segments_opened += 1
+        started = datetime.utcfromtimestamp(partition * self.span_seconds)
+        name = f"{started:%Y%m%dT%H%M%S}-{self._writer_id}-{self._segments_opened:04d}.log"
+        fh = open(os.path.join(self.directory, name), "ab")
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        return _ActiveSegment(path=fh.name, fh=fh, partition=partition)
+
+    def _seal_active(self) -> None:
+        active, self._active = self._active, None
+        try:
+            rows = seal_file(active.path)
+            logger.info("audit segments: sealed %s (%d rows)", os.path.basename(active.path), rows)
+        finally:
+            active.fh.close()
+
+    def seal_orphans(self) -> int:
+        """Seal .log files no live writer holds; returns the number sealed."""
+        if fcntl is None:
+            return 0
+        sealed = 0
+        for name in self._names():
+            if not name.endswith(".log"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                fh = open(path, "rb")
+            except FileNotFoundError:
+                continue
+            with fh:
+                try:
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # a live writer's (possibly this process's) segment
+                if not os.path.exists(path):
+                    continue  # sealed by someone else while we waited for the lock
+                rows = seal_file(path)
+            logger.info("audit segments: sealed orphaned %s (%d rows)", name, rows)
+            sealed += 1
+        return sealed
+
+    # ---- reader side ----
+
+    def _names(self) -> List[str]:
+        try:
+            return sorted(os.listdir(self.directory))
+        except FileNotFoundError:
+            return []
+
+    def _sources(self, start_us, end_us, after, lookups) -> List[Iterator]:
+        names = self._names()
+        sealed = {name[:-len(".seg")] for name in names if name.endswith(".seg")}
+        sources = []
+        for name in names:
+            stem, ext = os.path.splitext(name)
+            path = os.path.join(self.directory, name)
+            if ext == ".seg":
+                segment = _open_sealed(path)
+                if segment.may_contain(start_us, end_us, lookups):
+                    sources.append(segment.scan(start_us, end_us, after))
+            elif ext == ".log" and stem not in sealed:
+                try:
+                    sources.append(iter(_scan_log(path, start_us, end_us, after)))
+                except FileNotFoundError:
+                    # Sealed since we listed the directory
+                    segment = _open_sealed(os.path.join(self.directory, stem + ".seg"))
+                    if segment.may_contain(start_us, end_us, lookups):
+                        sources.append(segment.scan(start_us, end_us, after))
+        return sources
+
+    def scan(
+        self,
+        *,
+        start_dt: Optional[datetime] = None,
+        end_dt: Optional[datetime] = None,
+        after: Optional[Tuple[int, str]] = None,
+        **filters: Union[None, str, FrozenSet[str]],
+    ) -> Iterator[AuditEvent]:
+        """
+        Audit events ordered by (timestamp, id); same filters as audit_logs
+        columns (AND, None/empty ignored), with an inclusive timestamp range.
+        A frozenset value matches any of its members (IN; empty matches nothing).
+        """
+        filters = {field: value for field, value in filters.items() if value is not None and value != ""}
+        unknown = set(filters) - set(_FIELD_INDEX)
+        if unknown:
+            raise TypeError(f"Unknown audit filter(s): {', '.join(sorted(unknown))}")
+        start_us = to_micros(start_dt) if start_dt else None
+        end_us = to_micros(end_dt) if end_dt else None
+        checks = [(_FIELD_INDEX[field], value) for field, value in filters.items()]
+
+        merged = heapq.merge(
+            *self._sources(start_us, end_us, after, filters),
+            key=lambda record: (record[0], record[1][0]),
+        )
+        last = None
+        for ts, values in merged:
+            key = (ts, values[0])
+            if key == last:
+                continue  # relay retry
+            last = key
+            if all(values[i] in value if isinstance(value, frozenset) else values[i] == value for i, value in checks):
+                yield _event(ts, values)
+
+    def page(
+        self, *, cursor: Optional[str], limit: int, **filters: Any
+    ) -> Tuple[List[AuditEvent], Optional[str]]:
+        """One keyset page of scan(); same contract as app.pagination.keyset_page."""
+        after = decode_key_cursor(cursor) if cursor else None
+        rows = list(itertools.islice(self.scan(after=after, **filters), limit + 1))
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_key_cursor(to_micros(rows[-1].timestamp), rows[-1].id)
+
+    def consent_ids(self, start_dt: Optional[datetime], end_dt: Optional[datetime]) -> Iterator[str]:
+        """Distinct consent ids with an event in [start_dt, end_dt]."""
+        seen: Set[str] = set()
+        for event in self.scan(start_dt=start_dt, end_dt=end_dt):
+            if event.consent_id not in seen:
+                seen.add(event.consent_id)
+                yield event.consent_id
+
+
+def create_segment_store(kind: str = AUDIT_STORAGE) -> Optional[SegmentStore]:
+    if kind == "sql":
+        return None
+    if kind == "segments":
+        if AUDIT_WRITE_MODE != "outbox":
+            # The outbox writer is the only thing that appends to segments
+            raise ValueError("AUDIT_STORAGE=segments requires AUDIT_WRITE_MODE=outbox")
+        return SegmentStore()
+    raise ValueError(f"Unknown AUDIT_STORAGE {kind!r}; expected sql or segments")
+
+
+segment_store = create_segment_store()
@@ -0,0 +1,143 @@
+# backend/app/check_query_plans.py
+"""
+EXPLAIN-based guard for the hot query paths.
+
+Builds the exact queries used by routes_audit, routes_consent (list +
+export), the routes_subjects timeline validator and
+routes_ingest._get_active_template, runs EXPLAIN QUERY PLAN on each and
+exits non-zero if any of them falls back to a full table scan or has to
+sort its whole result for ORDER BY.
+
+    python -m app.check_query_plans                      # schema from app.models
+    python -m app.check_query_plans --url sqlite:///app/consent.db   # a migrated DB
+
+tests/test_query_plans.py runs the same cases under pytest.
+"""
+import argparse
+import sys
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models import AuditLog, Consent
+from app.pagination import encode_cursor, keyset_page
+from app.api.v1.routes_audit import _filtered_audit_query
+from app.api.v1.routes_consent import _consent_export_query
+from app.api.v1.routes_subjects import _event_versions, _page_keys
+from app.template_cache import load_active_template
+
+START = datetime(2025, 1, 1)
+END = datetime(2025, 1, 31, 23, 59, 59)
+CURSOR = encode_cursor("00000000-0000-0000-0000-000000000000")
+
+
+def _audit_page(**filters) -> Callable[[Session], None]:
+    def run(db: Session) -> None:
+        keyset_page(
+            _filtered_audit_query(db, **filters),
+            ts_col=AuditLog.timestamp,
+            id_col=AuditLog.id,
+            cursor=CURSOR,
+            limit=100,
+        )
+    return run
+
+
+def _consent_page(**filters) -> Callable[[Session], None]:
+    def run(db: Session) -> None:
+        q = db.query(Consent)
+        for col, value in filters.items():
+            q = q.filter(getattr(Consent, col) == value)
+        keyset_page(
+            q,
+            ts_col=Consent.created_at,
+            id_col=Consent.id,
+            cursor=CURSOR,
+            limit=100,
+            descending=True,
+        )
+    return run
+
+
+def _active_template(tenant_id) -> Callable[[Session], None]:
+    # The uncached lookup behind routes_ingest._get_active_template
+    def run(db: Session) -> None:
+        load_active_template(db, tenant_id=tenant_id, product_id="LOAN", purpose="marketing")
+    return run
+
+
+CASES: List[Tuple[str, Callable[[Session], None]]] = [
+    ("audit feed (no filters)", _audit_page()),
+    ("audit by consent_id", _audit_page(consent_id="c1")),
+    ("audit by mobile_number", _audit_page(mobile_number="9999999999")),
+    ("audit by application_number", _audit_page(application_number="APP1")),
+    ("audit regulator filters + window", _audit_page(action="granted", product_id="LOAN", purpose="marketing", start_dt=START, end_dt=END)),
+    ("consents page (no filters)", _consent_page()),
+    ("consents page by subject_id", _consent_page(subject_id="s1")),
+    ("consent export by subject_id", lambda db: _consent_export_query(db, subject_id="s1").all()),
+    ("consent export by audit window", lambda db: _consent_export_query(db, start_dt=START, end_dt=END).all()),
+    ("timeline page keys by mobile_number", lambda db: _page_keys(db, Consent.mobile_number, "9999999999", CURSOR, 100)),
+    ("timeline event versions", lambda db: _event_versions(db, ["c1", "c2"])),
+    ("active template (tenant)", _active_template("DEMO_BANK")),
+    ("active template (any tenant)", _active_template(None)),
+]
+
+
+def _is_bad(detail: str) -> bool:
+    # "SCAN t USING [COVERING] INDEX ..." walks an index in order and stops at LIMIT;
+    # a bare "SCAN t" reads the whole table, a temp B-tree sorts the whole result.
+    if detail.startswith("SCAN ") and " USING " not in detail:
+        return True
+    return "USE TEMP B-TREE FOR ORDER BY" in detail
+
+
+def explain_cases(url: str = "sqlite://") -> List[Tuple[str, List[str], List[str]]]:
+    """(name, plan details, offending details) for every case in CASES."""
+    engine = create_engine(url)
+    if url == "sqlite://":
+        Base.metadata.create_all(bind=engine)
+
+    captured: List[Tuple[str, object]] = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith("EXPLAIN"):
+            captured.append((statement, parameters))
+
+    results = []
+    with Session(engine) as db:
+        for name, run in CASES:
+            captured.clear()
+            run(db)
+            statement, parameters = captured[-1]
+            plan = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+            details = [row[-1] for row in plan]
+            results.append((name, details, [d for d in details if _is_bad(d)]))
+    engine.dispose()
+    return results
+
+
+def check(url: str) -> int:
+    failures = 0
+    for name, details, bad in explain_cases(url):
+        print(f"[{'FAIL' if bad else ' ok '}] {name}")
+        for d in details:
+            print(f"         {d}")
+        failures += bool(bad)
+
+    print(f"{failures} of {len(CASES)} queries fall back to a full scan or sort")
+    return 1 if failures else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite://", help="SQLite URL to check (default: fresh in-memory schema)")
+    args = parser.parse_args()
+    sys.exit(check(args.url))
+
+
+if __name__ == "__main__":
+    main()
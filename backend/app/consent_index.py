@@ -0,0 +1,187 @@
+# backend/app/consent_index.py
+# In-process index of granted subjects for high-volume consent checks
+# (POST /consents/check/stream): campaign engines filter millions of
+# customers per send, which is a set-membership test per subject, not a query.
+#
+# One scope per (tenant_id, product_id, purpose): the set of subject_ids
+# (UTF-8 bytes, so request lines are looked up without decoding) whose
+# consent_state row is 'granted'. A scope is loaded from consent_state on
+# first use and then refreshed incrementally, at most every
+# CONSENT_INDEX_REFRESH_SECONDS, from the rows updated after the newest
+# updated_at it has seen - and, since a long transaction can commit rows
+# stamped before that, from every row updated in the last
+# CONSENT_INDEX_OVERLAP_SECONDS (database clock; re-applying a row is
+# harmless). Checks therefore lag writes by at most the refresh interval;
+# 0 refreshes before every stream. Right after a bulk back-fill each refresh
+# re-reads the back-filled rows until they are older than the overlap.
+#
+# Memory is roughly 100 bytes per granted subject per loaded scope.
+
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.config import CONSENT_INDEX_OVERLAP_SECONDS, CONSENT_INDEX_REFRESH_SECONDS
+from app.models import ConsentState
+
+ScopeKey = Tuple[str, str, str]  # (tenant_id, product_id, purpose), "" when absent
+
+# Rows fetched per round trip while loading a scope
+LOAD_BATCH_SIZE = 10000
+
+# Output formats of CheckEncoder
+CHECK_FORMATS = ("text", "bitmap")
+_TO_ASCII = bytes.maketrans(b"\x00\x01", b"01")
+
+
+class _Scope:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.granted: Set[bytes] = set()
+        self.watermark: Optional[datetime] = None  # newest updated_at applied
+        self.refreshed_at = 0.0                    # time.monotonic() of the last refresh
+        self.loaded = False
+
+
+def _scope_filter(key: ScopeKey):
+    tenant_id, product_id, purpose = key
+    return (
+        ConsentState.tenant_id == tenant_id,
+        ConsentState.product_id == product_id,
+        ConsentState.purpose == purpose,
+    )
+
+
+class ConsentIndex:
+    def __init__(
+        self,
+        refresh_seconds: int = CONSENT_INDEX_REFRESH_SECONDS,
+        overlap_seconds: int = CONSENT_INDEX_OVERLAP_SECONDS,
+    ):
+        self.refresh_seconds = refresh_seconds
+        self.overlap = timedelta(seconds=overlap_seconds)
+        self._lock = threading.Lock()
+        self._scopes: Dict[ScopeKey, _Scope] = {}
+        self.loads = 0
+        self.refreshes = 0
+
+    def granted(
+        self,
+        db: Session,
+        *,
+        tenant_id: Optional[str],
+        product_id: Optional[str],
+        purpose: str,
+    ) -> Set[bytes]:
+        """
+        Subjects currently granted in the scope, loading or refreshing it first
+        when due. Blocking (runs queries): call it from a threadpool.
+
+        The returned set is live: later refreshes update it in place.
+        """
+        key: ScopeKey = (tenant_id or "", product_id or "", purpose)
+        with self._lock:
+            scope = self._scopes.setdefault(key, _Scope())
+
+        with scope.lock:
+            now = time.monotonic()
+            if not scope.loaded:
+                self._load(db, key, scope)
+            elif now - scope.refreshed_at >= self.refresh_seconds:
+                self._refresh(db, key, scope)
+            scope.refreshed_at = now
+        return scope.granted
+
+    def _load(self, db: Session, key: ScopeKey, scope: _Scope) -> None:
+        # Watermark first: rows updated while loading are re-read by the next refresh
+        scope.watermark = db.scalar(select(func.max(ConsentState.updated_at)).where(*_scope_filter(key)))
+        rows = db.execute(
+            select(ConsentState.subject_id)
+            .where(*_scope_filter(key), ConsentState.status == "granted", ConsentState.subject_id != "")
+            .execution_options(yield_per=LOAD_BATCH_SIZE)
+        ).scalars()
+        scope.granted = {subject_id.encode("utf-8") for subject_id in rows}
+        scope.loaded = True
+        self.loads += 1
+
+    def _refresh(self, db: Session, key: ScopeKey, scope: _Scope) -> None:
+        q = select(ConsentState.subject_id, ConsentState.status, ConsentState.updated_at).where(
+            *_scope_filter(key), ConsentState.subject_id != ""
+        )
+        if scope.watermark is not None:
+            # PostgreSQL returns now() with the session time zone; updated_at is naive wall clock
+            cutoff = db.scalar(select(func.now())).replace(tzinfo=None) - self.overlap
+            if scope.watermark < cutoff:
+                q = q.where(ConsentState.updated_at > scope.watermark)
+            else:
+                q = q.where(ConsentState.updated_at >= cutoff)
+        for subject_id, status, updated_at in db.execute(q):
+            if status == "granted":
+                scope.granted.add(subject_id.encode("utf-8"))
+            else:
+                scope.granted.discard(subject_id.encode("utf-8"))
+            if scope.watermark is None or updated_at > scope.watermark:
+                scope.watermark = updated_at
+        self.refreshes += 1
+
+    def invalidate(self) -> None:
+        """Drop every scope (e.g. after app.consent_state.rebuild)."""
+        with self._lock:
+            self._scopes.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            scopes = dict(self._scopes)
+        return {
+            "scopes": len(scopes),
+            "granted_subjects": sum(len(s.granted) for s in scopes.values()),
+            "loads": self.loads,
+            "refreshes": self.refreshes,
+            "refresh_seconds": self.refresh_seconds,
+        }
+
+
+class CheckEncoder:
+    """
+    Turns batches of subject ids into allow/deny output, in input order.
+
+      text    one line per id: "1" (granted) or "0"
+      bitmap  one bit per id, most significant bit first, the last byte zero-padded
+    """
+
+    def __init__(self, granted: Set[bytes], fmt: str = "text"):
+        if fmt not in CHECK_FORMATS:
+            raise ValueError(f"format must be one of {CHECK_FORMATS}")
+        self.granted = granted
+        self.fmt = fmt
+        self.checked = 0
+        self.allowed = 0
+        self._bits = b""  # bitmap: flags not yet filling a whole byte
+
+    def feed(self, ids: List[bytes]) -> bytes:
+        flags = bytes(map(self.granted.__contains__, ids))  # b"\x01" / b"\x00" per id
+        self.checked += len(flags)
+        self.allowed += flags.count(1)
+        digits = flags.translate(_TO_ASCII)
+        if self.fmt == "text":
+            out = bytearray(b"\n" * (2 * len(digits)))
+            out[0::2] = digits
+            return bytes(out)
+
+        digits = self._bits + digits
+        whole = len(digits) - len(digits) % 8
+        self._bits = digits[whole:]
+        return int(digits[:whole], 2).to_bytes(whole // 8, "big") if whole else b""
+
+    def finish(self) -> bytes:
+        if self.fmt != "bitmap" or not self._bits:
+            return b""
+        digits, self._bits = self._bits.ljust(8, b"0"), b""
+        return int(digits, 2).to_bytes(1, "big")
+
+
+consent_index = ConsentIndex()
@@ -0,0 +1,187 @@
+# backend/app/consent_state.py
+"""
+consent_state: the current answer to "does subject X consent to purpose P
+for product Q (of tenant T)?", one row per key, so a check is a single
+primary-key lookup instead of listing consents and filtering client-side.
+
+Maintained in the same transaction as every consent write:
+  grants   upsert the key as granted, pointing at the new consent
+  revokes  recompute the key from consents: granted while any consent for
+           it is still granted (pointing at the newest one), else revoked
+           (pointing at the newest revoked one)
+
+tenant_id / product_id / purpose missing on the consent are stored as "".
+
+    python -m app.consent_state      # rebuild the table from consents
+"""
+from typing import Any, Dict, Iterable, List, Mapping, Tuple, Union
+
+from sqlalchemy import case, delete, func, insert, select, tuple_, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import Consent, ConsentState
+
+KEY_FIELDS = ("tenant_id", "subject_id", "product_id", "purpose")
+
+StateKey = Tuple[str, str, str, str]
+
+# Keys per lookup / refresh statement (4 bound parameters each)
+KEY_CHUNK_SIZE = 500
+
+
+def state_key(consent: Union[Consent, Mapping[str, Any]]) -> StateKey:
+    """The consent_state key of a Consent instance or a mapping of its columns."""
+    if isinstance(consent, Mapping):
+        get = consent.get
+    else:
+        get = lambda field: getattr(consent, field, None)  # noqa: E731
+    return tuple(get(field) or "" for field in KEY_FIELDS)
+
+
+def _upsert(db: Session, rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        # Other backends: update the key, insert it when no row matched
+        for row in rows:
+            key_match = [getattr(ConsentState, field) == row[field] for field in KEY_FIELDS]
+            values = {"status": row["status"], "consent_id": row["consent_id"], "updated_at": func.now()}
+            if not db.execute(update(ConsentState).where(*key_match).values(**values)).rowcount:
+                db.execute(insert(ConsentState), [row])
+        return
+    stmt = dialect_insert(ConsentState)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=list(KEY_FIELDS),
+            set_={
+                "status": stmt.excluded.status,
+                "consent_id": stmt.excluded.consent_id,
+                "updated_at": func.now(),
+            },
+        ),
+        rows,
+    )
+
+
+def record_grants(db: Session, consents: Iterable[Union[Consent, Mapping[str, Any]]]) -> None:
+    """Mark the keys of newly granted consents as granted (caller's transaction)."""
+    latest: Dict[StateKey, Any] = {}
+    for consent in consents:
+        key = state_key(consent)
+        latest[key] = consent["id"] if isinstance(consent, Mapping) else consent.id
+    # One row per key: PostgreSQL rejects a multi-row upsert touching a key twice
+    _upsert(
+        db,
+        [{**dict(zip(KEY_FIELDS, key)), "status": "granted", "consent_id": consent_id} for key, consent_id in latest.items()],
+    )
+
+
+def _current_state(*conditions):
+    """Per-key winning consent among consents matching conditions."""
+    key_cols = [func.coalesce(getattr(Consent, field), "").label(field) for field in KEY_FIELDS]
+    rank = func.row_number().over(
+        partition_by=key_cols,
+        order_by=(
+            case((Consent.status == "granted", 0), else_=1),
+            Consent.created_at.desc(),
+            Consent.id.desc(),
+        ),
+    )
+    ranked = select(*key_cols, Consent.status, Consent.id.label("consent_id"), rank.label("rank"))
+    ranked = ranked.where(*conditions).subquery()
+    return select(
+        *(ranked.c[field] for field in KEY_FIELDS),
+        case((ranked.c.status == "granted", "granted"), else_="revoked").label("status"),
+        ranked.c.consent_id,
+    ).where(ranked.c.rank == 1)
+
+
+def _keys_filter(chunk: List[StateKey]):
+    """
+    Covers every key in chunk (and possibly other keys of the same subjects).
+
+    tenant_id IN (...) AND subject_id IN (...) is a range on the primary key;
+    SQLite does not use an index for a row-value (a, b, c, d) IN (...) list.
+    """
+    return (
+        ConsentState.tenant_id.in_({key[0] for key in chunk}),
+        ConsentState.subject_id.in_({key[1] for key in chunk}),
+    )
+
+
+def refresh_keys(db: Session, keys: Iterable[StateKey]) -> None:
+    """Recompute keys from consents after revocations (caller's transaction)."""
+    keys = list(dict.fromkeys(keys))
+    consent_key_cols = tuple_(*(func.coalesce(getattr(Consent, field), "") for field in KEY_FIELDS))
+
+    for i in range(0, len(keys), KEY_CHUNK_SIZE):
+        chunk = keys[i:i + KEY_CHUNK_SIZE]
+        # Lock the state rows first (PostgreSQL) so a concurrent grant of the
+        # same key commits before its consent row is looked for below
+        db.execute(select(ConsentState.subject_id).where(*_keys_filter(chunk)).with_for_update()).all()
+        rows = db.execute(
+            _current_state(
+                # subject_id IN (...) lets the (subject_id, created_at) index narrow the scan
+                Consent.subject_id.in_({key[1] for key in chunk}),
+                consent_key_cols.in_(chunk),
+            )
+        ).mappings().all()
+        _upsert(db, [dict(row) for row in rows])
+
+
+def lookup(db: Session, keys: List[StateKey]) -> Dict[StateKey, ConsentState]:
+    """consent_state rows for keys (missing keys are absent from the result)."""
+    found: Dict[StateKey, ConsentState] = {}
+    for i in range(0, len(keys), KEY_CHUNK_SIZE):
+        chunk = list(dict.fromkeys(keys[i:i + KEY_CHUNK_SIZE]))
+        if len(chunk) == 1:
+            row = db.get(ConsentState, chunk[0])
+            rows = [row] if row is not None else []
+        else:
+            rows = db.scalars(select(ConsentState).where(*_keys_filter(chunk))).all()
+        wanted = set(chunk)
+        for row in rows:
+            key = state_key(row)
+            if key in wanted:
+                found[key] = row
+    return found
+
+
+def rebuild(bind: Engine) -> int:
+    """Replace consent_state with a projection of consents; returns rows written."""
+    with bind.begin() as conn:
+        conn.execute(delete(ConsentState))
+        result = conn.execute(
+            insert(ConsentState).from_select([*KEY_FIELDS, "status", "consent_id"], _current_state())
+        )
+        return result.rowcount
+
+
+def rebuild_if_empty(bind: Engine) -> None:
+    """Populate consent_state on first start against a database that already has consents."""
+    with bind.connect() as conn:
+        if conn.execute(select(ConsentState.subject_id).limit(1)).first() is not None:
+            return
+        if conn.execute(select(Consent.id).limit(1)).first() is None:
+            return
+    try:
+        rebuild(bind)
+    except IntegrityError:
+        pass  # another worker rebuilt it at the same time
+
+
+def main() -> None:
+    from app.database import engine
+
+    print(f"consent_state: {rebuild(engine)} keys")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,217 @@
 # backend/app/database.py
-from pathlib import Path
-from sqlalchemy import create_engine
+import asyncio
+import time
+from typing import Callable, Tuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.util import await_only
 
-# Put the SQLite DB inside the app folder as consent.db
-BASE_DIR = Path(__file__).resolve().parent
-DB_PATH = BASE_DIR / "consent.db"
-SQLALCHEMY_DATABASE_URL = f"sqlite:///{DB_PATH}"
+try:  # POSIX only; elsewhere worker processes fall back to SQLite's busy_timeout
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+from app.config import (
+    AUDIT_DATABASE_URL,
+    BASE_DIR,
+    DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE_SECONDS,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT_SECONDS,
+    DB_STATEMENT_TIMEOUT_MS,
+    SQLITE_CACHE_SIZE_KB,
+    SQLITE_MMAP_SIZE_BYTES,
+    SQLITE_PRODUCTION_MODE,
+    SQLITE_READ_POOL_SIZE,
 )
+
+# Default SQLite DB lives inside the app folder as consent.db (see app/config.py)
+DB_PATH = BASE_DIR / "consent.db"
+SQLALCHEMY_DATABASE_URL = DATABASE_URL
+
+
+def engine_options(url: str) -> dict:
+    """create_engine() keyword arguments for the configured backend."""
+    backend = make_url(url).get_backend_name()
+
+    if backend == "sqlite":
+        options = {
+            "connect_args": {
+                "check_same_thread": False,
+                # sqlite3 waits this long for a lock before "database is locked"
+                "timeout": DB_STATEMENT_TIMEOUT_MS / 1000 if DB_STATEMENT_TIMEOUT_MS else 5,
+            },
+        }
+        if make_url(url).database not in (None, "", ":memory:"):
+            options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+        return options
+
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if backend == "postgresql" and DB_STATEMENT_TIMEOUT_MS:
+        # libpq startup option; understood by psycopg (3) and psycopg2
+        options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+def _is_sqlite_file(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+
+def _sqlite_production_options(url: str, *, writer: bool) -> dict:
+    options = engine_options(url)
+    options.update(
+        pool_size=1 if writer else SQLITE_READ_POOL_SIZE,
+        max_overflow=0,
+        pool_timeout=DB_POOL_TIMEOUT_SECONDS,
+    )
+    return options
+
+
+def _tune_sqlite_engine(engine: Engine, url: str, *, writer: bool, sleep: Callable[[float], None] = time.sleep) -> None:
+    """
+    SQLite production mode for a file-backed engine (sync, or an AsyncEngine's sync_engine).
+
+    writer=True: the engine has exactly one connection, so requests in this
+    worker queue for it in the pool (up to DB_POOL_TIMEOUT_SECONDS) instead of
+    racing for the file lock. While it is checked out it also holds an
+    exclusive flock on "<db>-writer.lock", so writers in other worker
+    processes (and the other engine of this one) wait for it on a 1 ms poll
+    instead of inside SQLite's busy handler (which backs off to 100 ms sleeps
+    and eventually fails with "database is locked").
+
+    writer=False: a pool of query_only connections; WAL lets them read
+    concurrently with the writer.
+    """
+    pragmas = [
+        # Only takes effect on a new, empty file; lets app/janitor.py hand free
+        # pages back with incremental_vacuum instead of a full VACUUM
+        "PRAGMA auto_vacuum=INCREMENTAL",
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA busy_timeout={DB_STATEMENT_TIMEOUT_MS or 5000}",
+        f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size={SQLITE_MMAP_SIZE_BYTES}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+    if not writer:
+        pragmas.append("PRAGMA query_only=ON")
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    if writer and fcntl is not None:
+        lock_file = open(f"{make_url(url).database}-writer.lock", "a+b")
+
+        @event.listens_for(engine, "begin")
+        def _acquire_writer_lock(conn):
+            # Bounded like the in-process queue: poll rather than block forever
+            deadline = time.monotonic() + DB_POOL_TIMEOUT_SECONDS
+            while True:
+                try:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return
+                except BlockingIOError:
+                    if time.monotonic() > deadline:
+                        raise TimeoutError("SQLite writer lock not acquired within DB_POOL_TIMEOUT_SECONDS")
+                    sleep(0.001)
+
+        # "commit" fires before COMMIT runs, so hold the lock until the
+        # connection is back in the pool (after the session has closed)
+        @event.listens_for(engine, "checkin")
+        def _release_writer_lock(dbapi_connection, connection_record):
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def create_engines(url: str, *, sqlite_production_mode: bool = SQLITE_PRODUCTION_MODE) -> Tuple[Engine, Engine]:
+    """
+    Return (engine, read_engine).
+
+    They are the same engine unless SQLite production mode is enabled for a
+    file-backed SQLite database.
+    """
+    if sqlite_production_mode and _is_sqlite_file(url):
+        engine = create_engine(url, **_sqlite_production_options(url, writer=True))
+        read_engine = create_engine(url, **_sqlite_production_options(url, writer=False))
+        _tune_sqlite_engine(engine, url, writer=True)
+        _tune_sqlite_engine(read_engine, url, writer=False)
+        return engine, read_engine
+
+    engine = create_engine(url, **engine_options(url))
+    return engine, engine
+
+
+def async_database_url(url: str) -> str:
+    """The same database through an asyncio driver (aiosqlite / psycopg 3 async)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    elif backend == "postgresql":
+        # The psycopg (3) dialect serves both create_engine and create_async_engine
+        parsed = parsed.set(drivername="postgresql+psycopg")
+    return parsed.render_as_string(hide_password=False)
+
+
+def create_async_engines(
+    url: str, *, sqlite_production_mode: bool = SQLITE_PRODUCTION_MODE
+) -> Tuple[AsyncEngine, AsyncEngine]:
+    """Async counterpart of create_engines(): (async_engine, async_read_engine)."""
+    async_url = async_database_url(url)
+
+    if sqlite_production_mode and _is_sqlite_file(url):
+        engine = create_async_engine(async_url, **_sqlite_production_options(url, writer=True))
+        read_engine = create_async_engine(async_url, **_sqlite_production_options(url, writer=False))
+        # Events run inside SQLAlchemy's greenlet, so the lock poll can yield to the loop
+        _tune_sqlite_engine(
+            engine.sync_engine, url, writer=True, sleep=lambda s: await_only(asyncio.sleep(s))
+        )
+        _tune_sqlite_engine(read_engine.sync_engine, url, writer=False)
+        return engine, read_engine
+
+    engine = create_async_engine(async_url, **engine_options(url))
+    return engine, engine
+
+
+engine, read_engine = create_engines(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Read-only request paths (lists, exports); same as SessionLocal outside SQLite production mode
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# asyncio request path (see app/deps.py get_async_db). expire_on_commit=False:
+# reading an attribute after commit must not trigger implicit (blocking) IO.
+async_engine, async_read_engine = create_async_engines(SQLALCHEMY_DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
+# audit_logs, when AUDIT_DATABASE_URL puts it in its own database (outbox mode);
+# otherwise these are the main database's sessions.
+if AUDIT_DATABASE_URL:
+    audit_engine, audit_read_engine = create_engines(AUDIT_DATABASE_URL)
+    _, async_audit_read_engine = create_async_engines(AUDIT_DATABASE_URL)
+    AuditSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=audit_engine)
+    AuditReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=audit_read_engine)
+    AsyncAuditReadSessionLocal = async_sessionmaker(
+        async_audit_read_engine, autoflush=False, expire_on_commit=False
+    )
+else:
+    audit_engine, audit_read_engine = engine, read_engine
+    AuditSessionLocal, AuditReadSessionLocal = SessionLocal, ReadSessionLocal
+    AsyncAuditReadSessionLocal = AsyncReadSessionLocal
 
 Base = declarative_base()
@@ -1,7 +1,14 @@
 # backend/app/deps.py
-from typing import Generator
+from typing import AsyncGenerator, Generator
 from fastapi import Header
-from app.database import SessionLocal
+from app.database import (
+    AsyncAuditReadSessionLocal,
+    AsyncReadSessionLocal,
+    AsyncSessionLocal,
+    AuditReadSessionLocal,
+    ReadSessionLocal,
+    SessionLocal,
+)
 
 def get_db() -> Generator:
     """
@@ -14,6 +21,44 @@ def get_db() -> Generator:
     finally:
         db.close()
 
+def get_read_db() -> Generator:
+    """
+    Like get_db, for handlers that only read. In SQLite production mode this is
+    a read-only connection that never waits on the single writer.
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db() -> AsyncGenerator:
+    """
+    asyncio counterpart of get_db for `async def` handlers: an AsyncSession, so
+    the request never takes a threadpool slot. Existing Session-based helpers
+    run on it through `await db.run_sync(helper, ...)`.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db() -> AsyncGenerator:
+    """asyncio counterpart of get_read_db."""
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+def get_audit_read_db() -> Generator:
+    """get_read_db for audit_logs, which may live in its own database (AUDIT_DATABASE_URL)."""
+    db = AuditReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_audit_read_db() -> AsyncGenerator:
+    """asyncio counterpart of get_audit_read_db."""
+    async with AsyncAuditReadSessionLocal() as db:
+        yield db
+
 def get_actor(x_actor: str | None = Header(default=None)) -> str:
     """
     Keep a simple actor header for audit notes; not used for authorization now.
@@ -0,0 +1,329 @@
+# backend/app/export_jobs.py
+# Export jobs: large consent / audit exports run on a background thread pool
+# (EXPORT_JOB_WORKERS per worker process) instead of inside the request, so
+# load balancer timeouts no longer kill them and a dropped download resumes
+# with an HTTP Range request instead of starting the export again.
+#
+# On disk, under EXPORT_JOB_DIR:
+#   <job_id>/job.json       status and progress, rewritten atomically
+#   <job_id>/chunk-000000   the encoded file in numbered EXPORT_JOB_CHUNK_BYTES
+#   <job_id>/chunk-000001   pieces (the last one shorter); each is renamed into
+#   ...                     place once complete, so it can be served right away
+#   active/<request key>    id of the queued / running job for an identical
+#                           request, created with O_EXCL: concurrent identical
+#                           submissions, from any worker on this host, join it
+#
+# Finished and failed jobs are removed by the janitor EXPORT_JOB_TTL_SECONDS
+# after they end. A job whose worker process died is reported as failed.
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.config import EXPORT_JOB_CHUNK_BYTES, EXPORT_JOB_DIR, EXPORT_JOB_TTL_SECONDS, EXPORT_JOB_WORKERS
+from app.exports import COLUMNAR_FORMATS
+from app.ids import new_id
+
+logger = logging.getLogger(__name__)
+
+# Filters each export kind accepts (query parameters of its export.* routes)
+EXPORT_KINDS = {
+    "consents": ("subject_id", "start_date", "end_date"),
+    "audit": (
+        "consent_id",
+        "mobile_number",
+        "application_number",
+        "action",
+        "actor_type",
+        "source_channel",
+        "product_id",
+        "purpose",
+        "start_date",
+        "end_date",
+    ),
+}
+EXPORT_FORMATS = {"csv": ("text/csv", "csv"), **COLUMNAR_FORMATS}
+
+# Active jobs: queued / running. Ended jobs: done / failed.
+ACTIVE_STATUSES = ("queued", "running")
+
+_JOB_ID = re.compile(r"^[0-9a-f-]{36}$")
+_READ_BLOCK = 64 * 1024
+
+
+@dataclass
+class ExportJob:
+    id: str
+    kind: str
+    format: str
+    filters: Dict[str, str]
+    status: str = "queued"
+    chunk_bytes: int = EXPORT_JOB_CHUNK_BYTES
+    chunks: int = 0               # complete chunk files
+    bytes_written: int = 0
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    pid: int = field(default_factory=os.getpid)
+
+    @property
+    def media_type(self) -> str:
+        return EXPORT_FORMATS[self.format][0]
+
+    @property
+    def filename(self) -> str:
+        stem = "consents" if self.kind == "consents" else "audit_export"
+        return f"{stem}.{EXPORT_FORMATS[self.format][1]}"
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.id}"'
+
+
+def request_key(kind: str, fmt: str, filters: Dict[str, str]) -> str:
+    """Identifies identical export requests."""
+    canonical = json.dumps([kind, fmt, sorted(filters.items())], separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(data, fh)
+    os.replace(tmp, path)
+
+
+def _open_chunks(job: ExportJob) -> Iterator[bytes]:
+    """Run the export the job describes, with its own read session."""
+    from app.api.v1.routes_audit import _audit_export_chunks
+    from app.api.v1.routes_consent import _consent_export_chunks, _parse_date_range
+    from app.database import AuditReadSessionLocal, ReadSessionLocal
+
+    filters: Dict[str, Any] = {name: job.filters.get(name) for name in EXPORT_KINDS[job.kind]}
+    filters["start_dt"], filters["end_dt"] = _parse_date_range(filters.pop("start_date"), filters.pop("end_date"))
+    if job.kind == "consents":
+        with ReadSessionLocal() as db:
+            yield from _consent_export_chunks(db, job.format, **filters)
+    else:
+        with AuditReadSessionLocal() as db:
+            yield from _audit_export_chunks(db, job.format, filters)
+
+
+class ExportJobs:
+    def __init__(
+        self,
+        directory: str = EXPORT_JOB_DIR,
+        workers: int = EXPORT_JOB_WORKERS,
+        chunk_bytes: int = EXPORT_JOB_CHUNK_BYTES,
+        ttl_seconds: int = EXPORT_JOB_TTL_SECONDS,
+    ):
+        self.directory = directory
+        self.workers = workers
+        self.chunk_bytes = chunk_bytes
+        self.ttl_seconds = ttl_seconds
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    # --- paths / records ---
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.directory, job_id)
+
+    def _chunk_path(self, job_id: str, n: int) -> str:
+        return os.path.join(self._job_dir(job_id), f"chunk-{n:06d}")
+
+    def _active_path(self, key: str) -> str:
+        return os.path.join(self.directory, "active", key)
+
+    def _save(self, job: ExportJob) -> None:
+        _write_json(os.path.join(self._job_dir(job.id), "job.json"), asdict(job))
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        """The job as last saved (by any worker on this host); None for unknown ids."""
+        if not _JOB_ID.match(job_id):
+            return None
+        try:
+            with open(os.path.join(self._job_dir(job_id), "job.json"), encoding="utf-8") as fh:
+                job = ExportJob(**json.load(fh))
+        except (FileNotFoundError, ValueError):
+            return None
+        if job.status in ACTIVE_STATUSES and not _pid_alive(job.pid):
+            job.status = "failed"
+            job.error = "worker process exited before the export finished"
+        return job
+
+    # --- submit / run ---
+
+    def submit(self, kind: str, fmt: str, filters: Dict[str, str]) -> Tuple[ExportJob, bool]:
+        """Start an export, or join the active job for an identical request. Returns (job, created)."""
+        filters = {name: value for name, value in filters.items() if value}
+        key = request_key(kind, fmt, filters)
+        active = self._active_path(key)
+        os.makedirs(os.path.dirname(active), exist_ok=True)
+        while True:
+            try:
+                fd = os.open(active, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    with open(active, encoding="utf-8") as fh:
+                        job = self.get(fh.read().strip())
+                except FileNotFoundError:
+                    continue  # ended meanwhile
+                if job is not None and job.status in ACTIVE_STATUSES:
+                    return job, False
+                try:
+                    os.unlink(active)  # left behind by a dead worker (or not yet written)
+                except FileNotFoundError:
+                    pass
+                continue
+
+            job = ExportJob(id=new_id(), kind=kind, format=fmt, filters=filters, chunk_bytes=self.chunk_bytes)
+            os.makedirs(self._job_dir(job.id))
+            self._save(job)
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                fh.write(job.id)
+            queued = replace(job)  # _run updates job from the pool thread
+            self._pool().submit(self._run, job, active)
+            return queued, True
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._stopping.clear()
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="export-job")
+            return self._executor
+
+    def _run(self, job: ExportJob, active: str) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        self._save(job)
+        pending = bytearray()
+        try:
+            chunks = _open_chunks(job)
+            try:
+                for data in chunks:
+                    if self._stopping.is_set():
+                        raise RuntimeError("server shut down before the export finished")
+                    pending += data
+                    while len(pending) >= job.chunk_bytes:
+                        self._write_chunk(job, bytes(pending[:job.chunk_bytes]))
+                        del pending[:job.chunk_bytes]
+            finally:
+                chunks.close()
+            if pending or job.chunks == 0:
+                self._write_chunk(job, bytes(pending))
+            job.status = "done"
+        except Exception as e:
+            logger.exception("export job %s failed", job.id)
+            job.status = "failed"
+            job.error = str(e) or type(e).__name__
+        finally:
+            job.finished_at = time.time()
+            self._save(job)
+            try:
+                os.unlink(active)
+            except FileNotFoundError:
+                pass
+            logger.info(
+                "export job %s (%s %s): %s, %d bytes in %d chunks, %.2fs",
+                job.id,
+                job.kind,
+                job.format,
+                job.status,
+                job.bytes_written,
+                job.chunks,
+                job.finished_at - job.started_at,
+            )
+
+    def _write_chunk(self, job: ExportJob, data: bytes) -> None:
+        path = self._chunk_path(job.id, job.chunks)
+        with open(path + ".tmp", "wb") as fh:
+            fh.write(data)
+        os.replace(path + ".tmp", path)
+        job.chunks += 1
+        job.bytes_written += len(data)
+        self._save(job)
+
+    # --- downloads ---
+
+    def chunk_path(self, job: ExportJob, n: int) -> Optional[str]:
+        """Path of complete chunk n, None if it does not exist (yet)."""
+        return self._chunk_path(job.id, n) if 0 <= n < job.chunks else None
+
+    def iter_range(self, job: ExportJob, start: int, end: int) -> Iterator[bytes]:
+        """Bytes [start, end] (inclusive) of a finished job's file, read across its chunks."""
+        offset = start
+        while offset <= end:
+            n, skip = divmod(offset, job.chunk_bytes)
+            with open(self._chunk_path(job.id, n), "rb") as fh:
+                fh.seek(skip)
+                remaining = min(job.chunk_bytes - skip, end - offset + 1)
+                while remaining > 0:
+                    block = fh.read(min(_READ_BLOCK, remaining))
+                    if not block:
+                        raise RuntimeError(f"export job {job.id}: chunk {n} is truncated")
+                    yield block
+                    offset += len(block)
+                    remaining -= len(block)
+
+    # --- housekeeping ---
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        """Delete jobs that ended more than ttl_seconds ago; returns how many."""
+        now = time.time() if now is None else now
+        removed = 0
+        try:
+            names: List[str] = os.listdir(self.directory)
+        except FileNotFoundError:
+            return 0
+        for name in names:
+            job = self.get(name)
+            if job is None or job.status in ACTIVE_STATUSES:
+                continue
+            ended = job.finished_at or job.created_at
+            if ended + self.ttl_seconds < now:
+                shutil.rmtree(self._job_dir(job.id), ignore_errors=True)
+                removed += 1
+        return removed
+
+    def shutdown(self) -> None:
+        """Stop accepting work; running jobs end as failed at their next chunk."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            self._stopping.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def describe(job: ExportJob) -> Dict[str, Any]:
+    """Status payload for the API."""
+    data = asdict(job)
+    data.pop("pid")
+    for name in ("created_at", "started_at", "finished_at"):
+        if data[name] is not None:
+            data[name] = datetime.utcfromtimestamp(data[name])
+    return data
+
+
+export_jobs = ExportJobs()
@@ -0,0 +1,262 @@
+# backend/app/exports.py
+# Shared helpers for large exports: rows are pulled from the DB in batches and
+# encoded incrementally, so memory stays bounded no matter how big the result.
+# CSV, or columnar (Parquet / Arrow IPC stream, needs the 'pyarrow' package).
+
+import csv
+import io
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator, List, Sequence, Tuple
+
+import anyio
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per DB round trip and rows encoded per chunk sent to the client.
+EXPORT_BATCH_SIZE = 1000
+# Rows per Parquet row group / Arrow record batch (and per chunk sent).
+COLUMNAR_BATCH_SIZE = 64 * 1024
+
+# Columnar export formats: media type and file extension. Parquet is zstd
+# compressed; the Arrow stream is not, so readers can use it without copying.
+COLUMNAR_FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+# Column types of iter_columnar:
+#   "string"     utf8
+#   "category"   dictionary-encoded utf8, for low-cardinality columns
+#   "timestamp"  microseconds, no time zone
+#   "int"        int64
+Columns = Sequence[Tuple[str, str]]
+
+
+def iter_csv(
+    rows: Iterable[Any],
+    header: Sequence[str],
+    to_row: Callable[[Any], Sequence[Any]],
+    *,
+    label: str = "export",
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[bytes]:
+    """
+    Encode rows as CSV and yield one UTF-8 chunk per `batch_size` rows.
+
+    The header is always written, so an empty result is still a valid CSV.
+    When the generator finishes (or is closed early) we log rows/sec and bytes sent,
+    and close `rows` if it is a generator (releasing its DB cursor).
+    """
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(header)
+
+    n_rows = 0
+    n_bytes = 0
+    started = time.perf_counter()
+    try:
+        for row in rows:
+            writer.writerow(to_row(row))
+            n_rows += 1
+            if n_rows % batch_size == 0:
+                chunk = buf.getvalue().encode("utf-8")
+                buf.seek(0)
+                buf.truncate(0)
+                n_bytes += len(chunk)
+                yield chunk
+
+        chunk = buf.getvalue().encode("utf-8")
+        if chunk:
+            n_bytes += len(chunk)
+            yield chunk
+    finally:
+        if hasattr(rows, "close"):
+            rows.close()
+        elapsed = time.perf_counter() - started
+        logger.info(
+            "%s: %d rows, %d bytes in %.2fs (%.0f rows/s)",
+            label,
+            n_rows,
+            n_bytes,
+            elapsed,
+            n_rows / elapsed if elapsed > 0 else 0.0,
+        )
+
+
+def json_cell(value: Any) -> str:
+    """A JSON column (details, meta) as a CSV cell: real JSON, "" for NULL, strings as stored."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+_DONE = object()
+
+
+async def iter_in_threadpool(chunks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Pull a blocking chunk generator (e.g. iter_csv over a server-side cursor)
+    one chunk per threadpool hop; each chunk is sent before the next one is
+    read from the DB. Closing this iterator closes `chunks`.
+    """
+    try:
+        while True:
+            chunk = await run_in_threadpool(next, chunks, _DONE)
+            if chunk is _DONE:
+                return
+            yield chunk
+    finally:
+        with anyio.CancelScope(shield=True):
+            await run_in_threadpool(chunks.close)
+
+
+class ExportResponse(StreamingResponse):
+    """
+    StreamingResponse over a blocking chunk generator that is closed as soon
+    as the response ends - also when the client disconnects mid-export - so
+    its finally blocks (closing the DB cursor) run right away instead of
+    whenever the generator is garbage collected.
+    """
+
+    def __init__(self, chunks: Iterator[bytes], **kwargs: Any):
+        super().__init__(iter_in_threadpool(chunks), **kwargs)
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            with anyio.CancelScope(shield=True):
+                await self.body_iterator.aclose()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file for pyarrow writers; drain() hands back what was written since the last call."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        out = b"".join(self._chunks)
+        self._chunks.clear()
+        return out
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise RuntimeError("Parquet / Arrow exports need the 'pyarrow' package") from exc
+    return pyarrow
+
+
+def arrow_schema(columns: Columns):
+    """pyarrow schema for (name, type) columns (see Columns). Raises RuntimeError without pyarrow."""
+    pa = _import_pyarrow()
+    types = {
+        "string": pa.string(),
+        "category": pa.dictionary(pa.int32(), pa.string()),
+        "timestamp": pa.timestamp("us"),
+        "int": pa.int64(),
+    }
+    return pa.schema([pa.field(name, types[kind]) for name, kind in columns])
+
+
+def iter_columnar(
+    rows: Iterable[Any],
+    columns: Columns,
+    to_row: Callable[[Any], Sequence[Any]],
+    *,
+    fmt: str,
+    label: str = "export",
+    batch_size: int = COLUMNAR_BATCH_SIZE,
+) -> Iterator[bytes]:
+    """
+    Encode rows as Parquet (one row group per `batch_size` rows) or as an
+    Arrow IPC stream (one record batch per `batch_size` rows), yielding the
+    encoded bytes after each batch. "category" columns are dictionary-encoded.
+
+    Same contract as iter_csv: an empty result is still a valid file with the
+    schema, the run is logged, and `rows` is closed when this generator stops.
+    """
+    pa = _import_pyarrow()
+    schema = arrow_schema(columns)
+    sink = _ChunkSink()
+    categories = [name for name, kind in columns if kind == "category"]
+    if fmt == "parquet":
+        writer = pa.parquet.ParquetWriter(sink, schema, compression="zstd", use_dictionary=categories)
+        write = writer.write_table
+        to_batch = pa.Table.from_arrays
+    elif fmt == "arrow":
+        writer = pa.ipc.new_stream(sink, schema)
+        write = writer.write_batch
+        to_batch = pa.RecordBatch.from_arrays
+    else:
+        raise ValueError(f"format must be one of {sorted(COLUMNAR_FORMATS)}")
+
+    def encode(batch: List[Sequence[Any]]) -> bytes:
+        arrays = []
+        for (name, kind), values in zip(columns, zip(*batch)):
+            if kind == "category":
+                arrays.append(pa.array(values, pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(values, schema.field(name).type))
+        write(to_batch(arrays, schema=schema))
+        return sink.drain()
+
+    n_rows = 0
+    n_bytes = 0
+    started = time.perf_counter()
+    try:
+        batch: List[Sequence[Any]] = []
+        for row in rows:
+            batch.append(to_row(row))
+            if len(batch) == batch_size:
+                chunk = encode(batch)
+                n_rows += len(batch)
+                batch = []
+                n_bytes += len(chunk)
+                yield chunk
+        if batch:
+            n_rows += len(batch)
+            chunk = encode(batch)
+            n_bytes += len(chunk)
+            yield chunk
+        writer.close()
+        chunk = sink.drain()
+        n_bytes += len(chunk)
+        yield chunk
+    finally:
+        if hasattr(rows, "close"):
+            rows.close()
+        elapsed = time.perf_counter() - started
+        logger.info(
+            "%s (%s): %d rows, %d bytes in %.2fs (%.0f rows/s)",
+            label,
+            fmt,
+            n_rows,
+            n_bytes,
+            elapsed,
+            n_rows / elapsed if elapsed > 0 else 0.0,
+        )
@@ -0,0 +1,50 @@
+# backend/app/ids.py
+# Time-ordered identifiers (UUIDv7, RFC 9562) for primary keys.
+#
+# The first 48 bits are the Unix time in milliseconds, so new rows are appended
+# at the right-hand edge of the primary-key B-tree instead of at a random
+# page, and ids sort by creation time. They keep the canonical 36-character
+# UUID text form, so they live alongside the existing uuid4 ids in the same
+# String columns, URLs and CSV exports.
+#
+# Within a millisecond a 12-bit counter (random start) keeps ids from this
+# process strictly increasing; 62 random bits keep ids from different
+# processes apart.
+
+import os
+import threading
+import time
+import uuid
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+_COUNTER_MAX = 0xFFF
+
+
+def uuid7() -> uuid.UUID:
+    global _last_ms, _counter
+
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            _last_ms = ms
+            # Start in the lower half so a busy millisecond rarely overflows
+            _counter = int.from_bytes(os.urandom(2), "big") & 0x7FF
+        else:
+            # Same millisecond (or the clock stepped back): keep counting
+            _counter += 1
+            if _counter > _COUNTER_MAX:
+                _last_ms += 1
+                _counter = 0
+        ms, counter = _last_ms, _counter
+
+    rand_b = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    value = (ms << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | rand_b
+    return uuid.UUID(int=value)
+
+
+def new_id() -> str:
+    """A new primary-key value: UUIDv7 in canonical text form."""
+    return str(uuid7())
@@ -0,0 +1,186 @@
+# backend/app/janitor.py
+"""
+Background housekeeping, started from the FastAPI lifespan in app/main.py.
+
+Each pass:
+  - deletes (optionally archiving first) otp_transactions rows that expired
+    more than JANITOR_OTP_GRACE_SECONDS ago and never got a consent, in
+    batches of JANITOR_BATCH_SIZE, one short transaction per batch with a
+    pause in between so ingest writes are never stalled behind the purge;
+  - SQLite: returns up to JANITOR_VACUUM_PAGES free pages to the OS
+    (incremental_vacuum, when auto_vacuum=INCREMENTAL) and runs
+    PRAGMA optimize, which re-ANALYZEs tables whose statistics went stale;
+  - PostgreSQL: ANALYZE otp_transactions after a purge (autovacuum reclaims space);
+  - AUDIT_STORAGE=segments: seals audit segment files left open by a dead writer;
+  - deletes export jobs (app/export_jobs.py) that ended EXPORT_JOB_TTL_SECONDS ago;
+  - logs rows reclaimed and time spent.
+
+    python -m app.janitor       # one pass now, prints the report
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.engine import Engine
+
+from app.config import (
+    JANITOR_ARCHIVE_DIR,
+    JANITOR_BATCH_PAUSE_MS,
+    JANITOR_BATCH_SIZE,
+    JANITOR_INTERVAL_SECONDS,
+    JANITOR_OTP_GRACE_SECONDS,
+    JANITOR_VACUUM_PAGES,
+    OTP_STORE,
+)
+from app.audit_segments import segment_store
+from app.database import SessionLocal, engine
+from app.export_jobs import export_jobs
+from app.models import OtpTransaction
+
+logger = logging.getLogger(__name__)
+
+# Columns written to the archive file
+_ARCHIVE_COLUMNS = [c.name for c in OtpTransaction.__table__.columns]
+
+
+@dataclass
+class JanitorReport:
+    otp_rows_deleted: int = 0
+    otp_rows_archived: int = 0
+    batches: int = 0
+    sqlite_pages_freed: int = 0
+    analyzed: bool = False
+    audit_segments_sealed: int = 0
+    export_jobs_removed: int = 0
+    seconds: float = 0.0
+
+
+# Most recent pass in this worker
+last_report: Optional[JanitorReport] = None
+
+
+def _archive(rows: List[OtpTransaction], archive_dir: str) -> None:
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"otp_transactions-{datetime.utcnow():%Y%m%d}.jsonl")
+    with open(path, "a", encoding="utf-8") as fh:
+        for row in rows:
+            record = {c: getattr(row, c) for c in _ARCHIVE_COLUMNS}
+            fh.write(json.dumps(record, default=str) + "\n")
+
+
+def purge_expired_otp_transactions(
+    report: JanitorReport,
+    *,
+    grace_seconds: int = JANITOR_OTP_GRACE_SECONDS,
+    batch_size: int = JANITOR_BATCH_SIZE,
+    pause_seconds: float = JANITOR_BATCH_PAUSE_MS / 1000,
+    archive_dir: str = JANITOR_ARCHIVE_DIR,
+) -> None:
+    """Delete expired, never-linked OTP transactions in bounded batches."""
+    cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+
+    while True:
+        with SessionLocal() as db:
+            q = db.query(OtpTransaction if archive_dir else OtpTransaction.id).filter(
+                OtpTransaction.consent_id.is_(None),
+                OtpTransaction.expires_at < cutoff,
+            )
+            # Same column order as ix_otp_transactions_consent_id_expires_at: an index range scan
+            rows = q.order_by(OtpTransaction.consent_id, OtpTransaction.expires_at).limit(batch_size).all()
+            if not rows:
+                return
+
+            if archive_dir:
+                # Written before the delete commits: a failed batch is archived
+                # again next pass, never lost.
+                _archive(rows, archive_dir)
+                report.otp_rows_archived += len(rows)
+
+            ids = [r.id for r in rows]
+            db.query(OtpTransaction).filter(OtpTransaction.id.in_(ids)).delete(synchronize_session=False)
+            db.commit()
+
+        report.otp_rows_deleted += len(rows)
+        report.batches += 1
+        if len(rows) < batch_size:
+            return
+        time.sleep(pause_seconds)
+
+
+def maintain_database(report: JanitorReport, *, bind: Engine = engine, vacuum_pages: int = JANITOR_VACUUM_PAGES) -> None:
+    dialect = bind.dialect.name
+
+    if dialect == "postgresql":
+        if report.otp_rows_deleted:
+            with bind.begin() as conn:
+                conn.exec_driver_sql("ANALYZE otp_transactions")
+            report.analyzed = True
+        return
+
+    if dialect != "sqlite":
+        return
+
+    with bind.connect() as conn:
+        # PRAGMAs run outside a transaction under pysqlite, so nothing is held here
+        if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2 and vacuum_pages > 0:
+            before = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+            # Frees one page per step and has no result columns, so execute()
+            # stops after the first page; executescript() runs it to the end.
+            conn.connection.driver_connection.executescript(f"PRAGMA incremental_vacuum({int(vacuum_pages)})")
+            report.sqlite_pages_freed = before - conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+        conn.exec_driver_sql("PRAGMA optimize")
+        report.analyzed = True
+
+
+def run_once() -> JanitorReport:
+    global last_report
+
+    report = JanitorReport()
+    started = time.perf_counter()
+    # memory / redis OTP stores expire their own entries
+    if OTP_STORE == "sql":
+        purge_expired_otp_transactions(report)
+    maintain_database(report)
+    if segment_store is not None:
+        report.audit_segments_sealed = segment_store.seal_orphans()
+    report.export_jobs_removed = export_jobs.purge_expired()
+    report.seconds = time.perf_counter() - started
+
+    logger.info(
+        "janitor: %d otp rows reclaimed (%d archived) in %d batches, %d sqlite pages freed, "
+        "%d audit segments sealed, %d export jobs removed, %.2fs",
+        report.otp_rows_deleted,
+        report.otp_rows_archived,
+        report.batches,
+        report.sqlite_pages_freed,
+        report.audit_segments_sealed,
+        report.export_jobs_removed,
+        report.seconds,
+    )
+    last_report = report
+    return report
+
+
+async def run_forever(interval_seconds: int = JANITOR_INTERVAL_SECONDS) -> None:
+    """Run a pass now and then every interval_seconds until cancelled."""
+    while True:
+        try:
+            await run_in_threadpool(run_once)
+        except Exception:
+            logger.exception("janitor pass failed")
+        await asyncio.sleep(interval_seconds)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(asdict(run_once()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
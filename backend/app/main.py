@@ -1,14 +1,47 @@
 # backend/app/main.py
+import asyncio
+import contextlib
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1 import api_v1
-from .database import engine
+from app.config import AUDIT_ROLLUPS, AUDIT_WRITE_MODE, JANITOR_ENABLED
+from app import audit_chain, audit_outbox, audit_rollups, consent_state, janitor
+from app.export_jobs import export_jobs
+from .database import audit_engine, engine
 from . import models
 
 
-app = FastAPI(title="Consent PoC API", version="0.1")
-# Ensure all tables are created on startup (PoC-friendly)
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background housekeeping (see app/janitor.py); one per worker process
+    task = asyncio.create_task(janitor.run_forever()) if JANITOR_ENABLED else None
+    if AUDIT_WRITE_MODE == "outbox":
+        audit_outbox.audit_writer.start()
+    try:
+        yield
+    finally:
+        if task is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        if AUDIT_WRITE_MODE == "outbox":
+            # Writes out the events still queued (memory durability)
+            await run_in_threadpool(audit_outbox.audit_writer.stop)
+        await run_in_threadpool(export_jobs.shutdown)
+
+
+app = FastAPI(title="Consent PoC API", version="0.1", lifespan=lifespan)
+# Ensure all tables are created on startup (PoC-friendly); new columns on
+# existing tables come from the alembic migrations: run python -m app.migrate
+# before starting (the Docker image does)
 models.Base.metadata.create_all(bind=engine)
+audit_outbox.create_audit_tables()
+audit_chain.ensure_chain_head(audit_engine)
+if AUDIT_ROLLUPS:
+    audit_rollups.rebuild_if_empty(audit_engine)
+consent_state.rebuild_if_empty(engine)
 
 
 # CORS for local dev
@@ -24,6 +57,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Pagination metadata travels in headers so list bodies stay plain arrays
+    expose_headers=["X-Next-Cursor", "X-Total-Estimate", "ETag"],
 )
 
 @app.get("/healthz")
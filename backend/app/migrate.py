@@ -0,0 +1,54 @@
+# backend/app/migrate.py
+"""
+Bring DATABASE_URL (and AUDIT_DATABASE_URL, when set) to the newest Alembic
+revision. Run it before starting the app; the Docker image does.
+
+The app's create_all() only creates missing tables, never columns on
+existing ones, so the app expects a migrated database. A database the app
+built before Alembic tracked it (tables but no alembic_version, like the
+bundled app/consent.db) is stamped at the baseline first. Every migration
+since then skips tables and columns that are already there.
+
+    python -m app.migrate
+"""
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect
+
+from app.config import AUDIT_DATABASE_URL, DATABASE_URL
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+# Newest revision a create_all() database of that era already matches
+BASELINE = "b06f365657a7"
+
+
+def _tables(url: str) -> set:
+    engine = create_engine(url)
+    try:
+        return set(inspect(engine).get_table_names())
+    finally:
+        engine.dispose()
+
+
+def upgrade(url: str) -> None:
+    config = Config(str(ALEMBIC_INI))
+    # migrations/env.py migrates this URL instead of DATABASE_URL
+    config.attributes["url"] = url
+    tables = _tables(url)
+    if tables and "alembic_version" not in tables:
+        command.stamp(config, BASELINE)
+    command.upgrade(config, "head")
+
+
+def main() -> None:
+    upgrade(DATABASE_URL)
+    # A new audit database is built whole by the app (create_audit_tables);
+    # the history would also give it the baseline's consents tables
+    if AUDIT_DATABASE_URL and _tables(AUDIT_DATABASE_URL):
+        upgrade(AUDIT_DATABASE_URL)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,25 +7,31 @@ from sqlalchemy import (
     DateTime,
     ForeignKey,
     Boolean,
+    Index,
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.types import JSON
 
 from app.database import Base
+from app.ids import new_id
+
+# Plain JSON on SQLite, binary/indexable JSONB on PostgreSQL
+JSONType = JSON().with_variant(JSONB(), "postgresql")
 
 
 class Consent(Base):
     __tablename__ = "consents"
 
-    # Primary key – STRING (UUID)
-    id = Column(String, primary_key=True, index=True)
+    # Primary key – STRING (UUIDv7, see app/ids.py)
+    id = Column(String, primary_key=True, default=new_id)
 
     # Core consent fields
     subject_id = Column(String, nullable=True)        # CIF / application / customer id
     purpose = Column(String, nullable=True)           # we store data_use_case/purpose here
     status = Column(String, nullable=False, default="granted")
     source = Column(String, nullable=True)            # web_form, web_ingestion_customer, etc.
-    meta = Column(JSON, nullable=True)
+    meta = Column(JSONType, nullable=True)
 
     # BFSI context (all nullable)
     tenant_id = Column(String, nullable=True)         # DEMO_BANK, etc.
@@ -54,11 +60,21 @@ class Consent(Base):
         onupdate=func.now(),
     )
 
+    __table_args__ = (
+        # Keyset pagination for GET /consents (newest first), optionally per subject
+        Index("ix_consents_created_at_id", "created_at", "id"),
+        Index("ix_consents_subject_id_created_at", "subject_id", "created_at", "id"),
+        # Bulk revocation by customer identifiers, and their subject timelines
+        # (newest first, keyset-paginated)
+        Index("ix_consents_mobile_number_created_at", "mobile_number", "created_at", "id"),
+        Index("ix_consents_application_number_created_at", "application_number", "created_at", "id"),
+    )
+
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
 
-    id = Column(String, primary_key=True, index=True)
+    id = Column(String, primary_key=True, default=new_id)
 
     consent_id = Column(String, ForeignKey("consents.id"), nullable=False)
 
@@ -73,18 +89,107 @@ class AuditLog(Base):
     application_number = Column(String, nullable=True)
     mobile_number = Column(String, nullable=True)
     evidence_ref = Column(String, nullable=True)
+    tenant_id = Column(String, nullable=True)
 
-    details = Column(JSON, nullable=True)
+    details = Column(JSONType, nullable=True)
 
     timestamp = Column(
         DateTime, nullable=False, server_default=func.now()
     )
 
+    __table_args__ = (
+        # Covering index for "consents with any audit event in [start, end]"
+        Index("ix_audit_logs_timestamp_consent_id", "timestamp", "consent_id"),
+        # Keyset pagination of the global feed; low-cardinality filters
+        # (action, product, purpose, channel, actor_type) ride this scan.
+        Index("ix_audit_logs_timestamp_id", "timestamp", "id"),
+        # Per-consent / per-customer timelines, already in page order
+        Index("ix_audit_logs_consent_id_timestamp", "consent_id", "timestamp", "id"),
+        Index("ix_audit_logs_mobile_number_timestamp", "mobile_number", "timestamp", "id"),
+        Index("ix_audit_logs_application_number_timestamp", "application_number", "timestamp", "id"),
+    )
+
+
+# Audit events waiting for the background writer (AUDIT_WRITE_MODE=outbox, see app/audit_outbox.py)
+class AuditOutbox(Base):
+    __tablename__ = "audit_outbox"
+
+    seq = Column(Integer, primary_key=True)           # relay order
+    payload = Column(JSONType, nullable=False)        # audit_logs column values
+
+
+# Tamper-evident hash chain over audit_logs (AUDIT_HASH_CHAIN, see app/audit_chain.py)
+class AuditChainLink(Base):
+    __tablename__ = "audit_chain"
+
+    seq = Column(Integer, primary_key=True, autoincrement=False)   # 1, 2, 3, ... in write order
+    audit_log_id = Column(String, ForeignKey("audit_logs.id"), nullable=False)
+    chain_hash = Column(String(64), nullable=False)   # sha256(previous chain_hash || row digest)
+    # Which columns the row digest covers (app/audit_chain.py _HASHED)
+    digest_version = Column(Integer, nullable=False, server_default="1")
+
+    __table_args__ = (
+        # Time-range verification finds a range's links from its audit rows
+        Index("ux_audit_chain_audit_log_id", "audit_log_id", unique=True),
+    )
+
+
+class AuditChainHead(Base):
+    __tablename__ = "audit_chain_head"
+
+    id = Column(Integer, primary_key=True)            # always 1
+    seq = Column(Integer, nullable=False)
+    chain_hash = Column(String(64), nullable=False)
+
+
+class AuditCheckpoint(Base):
+    __tablename__ = "audit_checkpoints"
+
+    seq = Column(Integer, primary_key=True, autoincrement=False)   # last link of the block
+    chain_hash = Column(String(64), nullable=False)
+    merkle_root = Column(String(64), nullable=False)  # over the block's chain hashes
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+# Audit event counts per hour / day / month and dimensions (AUDIT_ROLLUPS, see app/audit_rollups.py)
+class AuditRollup(Base):
+    __tablename__ = "audit_rollups"
+
+    granularity = Column(String, primary_key=True)    # hour / day / month
+    bucket = Column(DateTime, primary_key=True)       # start of the hour / day / month (UTC)
+    tenant_id = Column(String, primary_key=True)      # "" when the event has none
+    product_id = Column(String, primary_key=True)     # ""
+    purpose = Column(String, primary_key=True)        # ""
+    action = Column(String, primary_key=True)
+    source_channel = Column(String, primary_key=True) # ""
+    actor_type = Column(String, primary_key=True)     # ""
+
+    events = Column(Integer, nullable=False)
+
+
+# Current consent per (tenant, subject, product, purpose), see app/consent_state.py
+class ConsentState(Base):
+    __tablename__ = "consent_state"
+
+    tenant_id = Column(String, primary_key=True)      # "" when the consent has none
+    subject_id = Column(String, primary_key=True)
+    product_id = Column(String, primary_key=True)     # "" when the consent has none
+    purpose = Column(String, primary_key=True)
+
+    status = Column(String, nullable=False)           # granted / revoked
+    consent_id = Column(String, ForeignKey("consents.id"), nullable=False)  # newest granted (else newest) consent
+    updated_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        # Loading / incrementally refreshing one scope of app/consent_index.py
+        Index("ix_consent_state_scope_updated_at", "tenant_id", "product_id", "purpose", "updated_at"),
+    )
+
 
 class ConsentTemplate(Base):
     __tablename__ = "consent_templates"
 
-    id = Column(String, primary_key=True, index=True)
+    id = Column(String, primary_key=True, default=new_id)
 
     tenant_id = Column(String, nullable=False)        # DEMO_BANK
     product_id = Column(String, nullable=False)       # LOAN/CASA/CARD/INSURANCE
@@ -102,11 +207,25 @@ class ConsentTemplate(Base):
         DateTime, nullable=False, server_default=func.now()
     )
 
+    __table_args__ = (
+        # _get_active_template: product/purpose/is_active, walked newest version
+        # first; tenant_id is trailing so the optional tenant filter never forces a sort
+        Index(
+            "ix_consent_templates_active_lookup",
+            "product_id", "purpose", "is_active", "version", "tenant_id",
+        ),
+        # create_consent_template: max(version) per tenant/product/purpose/type
+        Index(
+            "ix_consent_templates_family_version",
+            "tenant_id", "product_id", "purpose", "template_type", "version",
+        ),
+    )
+
 
 class OtpTransaction(Base):
     __tablename__ = "otp_transactions"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
 
     transaction_id = Column(String, unique=True, nullable=False, index=True)
 
@@ -121,3 +240,8 @@ class OtpTransaction(Base):
 
     # Link to Consent AFTER consent creation (string FK)
     consent_id = Column(String, ForeignKey("consents.id"), nullable=True)
+
+    __table_args__ = (
+        # Janitor: expired transactions that never got a consent
+        Index("ix_otp_transactions_consent_id_expires_at", "consent_id", "expires_at"),
+    )
@@ -0,0 +1,313 @@
+# backend/app/otp_store.py
+# Where OTP transactions live between initiate, verify and consent creation.
+#
+# The ingest routes only talk to the OtpStore interface:
+#   SqlOtpStore     otp_transactions table, inside the request's transaction (default)
+#   MemoryOtpStore  sharded in-process dicts; entries expire after OTP_TTL_SECONDS
+#   RedisOtpStore   any Redis-protocol server (or the fakeredis stand-in); keys expire on their own
+#
+# With memory/redis the main DB never sees OTP traffic; the consent keeps the
+# transaction id as its evidence_ref. Verifying and linking a consent are
+# one-shot claims, so two concurrent requests can never both verify the same
+# OTP or attach two consents to it. Every store also rate-limits OTP
+# initiation per mobile number.
+
+import json
+import math
+from abc import ABC, abstractmethod
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import (
+    OTP_RATE_LIMIT_PER_MOBILE,
+    OTP_RATE_LIMIT_WINDOW_SECONDS,
+    OTP_REDIS_URL,
+    OTP_STORE,
+    OTP_STORE_SHARDS,
+    OTP_TTL_SECONDS,
+)
+from app.models import OtpTransaction
+
+
+@dataclass
+class OtpTxn:
+    """One OTP transaction; field names match the otp_transactions columns."""
+    transaction_id: str
+    mobile_number: str
+    channel: str
+    application_number: Optional[str]
+    otp_hash: str
+    expires_at: datetime
+    created_at: datetime
+    verified_at: Optional[datetime] = None
+    consent_id: Optional[str] = None
+
+
+class RateLimiter:
+    """
+    In-process fixed-window counter per key (mobile number), sharded by key
+    so concurrent requests for different numbers don't share a lock.
+    """
+
+    def __init__(
+        self,
+        limit: int = OTP_RATE_LIMIT_PER_MOBILE,
+        window_seconds: int = OTP_RATE_LIMIT_WINDOW_SECONDS,
+        shards: int = OTP_STORE_SHARDS,
+    ):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self._shards: List[Tuple[threading.Lock, Dict[str, Tuple[float, int]]]] = [
+            (threading.Lock(), {}) for _ in range(max(shards, 1))
+        ]
+
+    def hit(self, key: str) -> Optional[int]:
+        """Count one attempt; return seconds until the next is allowed if over the limit."""
+        if self.limit <= 0:
+            return None
+
+        now = time.monotonic()
+        lock, windows = self._shards[hash(key) % len(self._shards)]
+        with lock:
+            started, count = windows.get(key, (now, 0))
+            if now - started >= self.window_seconds:
+                started, count = now, 0
+            if count >= self.limit:
+                return max(1, math.ceil(started + self.window_seconds - now))
+            if key not in windows and len(windows) >= 1024:
+                # Bound memory: forget numbers whose window has ended
+                for k in [k for k, (s, _) in windows.items() if now - s >= self.window_seconds]:
+                    del windows[k]
+            windows[key] = (started, count + 1)
+            return None
+
+
+class OtpStore(ABC):
+    """
+    Interface used by routes_ingest. `db` is the request's AsyncSession; only
+    SqlOtpStore uses it (its writes commit with the request transaction).
+    """
+
+    @abstractmethod
+    async def create(self, db: AsyncSession, txn: OtpTxn) -> None:
+        ...
+
+    @abstractmethod
+    async def get(self, db: AsyncSession, transaction_id: str) -> Optional[OtpTxn]:
+        ...
+
+    @abstractmethod
+    async def mark_verified(self, db: AsyncSession, transaction_id: str, verified_at: datetime) -> bool:
+        """Set verified_at unless already set; False if another request got there first."""
+
+    @abstractmethod
+    async def link_consent(self, db: AsyncSession, transaction_id: str, consent_id: str) -> bool:
+        """Attach consent_id unless one is already attached; False otherwise."""
+
+    @abstractmethod
+    async def hit_rate_limit(self, mobile_number: str) -> Optional[int]:
+        """Count one OTP initiation; seconds to wait if the number is over its limit."""
+
+
+class SqlOtpStore(OtpStore):
+    def __init__(self, rate_limiter: Optional[RateLimiter] = None):
+        self.rate_limiter = rate_limiter or RateLimiter()
+
+    async def create(self, db: AsyncSession, txn: OtpTxn) -> None:
+        db.add(OtpTransaction(**asdict(txn)))
+
+    async def get(self, db: AsyncSession, transaction_id: str) -> Optional[OtpTxn]:
+        row = await db.scalar(select(OtpTransaction).where(OtpTransaction.transaction_id == transaction_id))
+        if row is None:
+            return None
+        return OtpTxn(**{field: getattr(row, field) for field in OtpTxn.__dataclass_fields__})
+
+    async def mark_verified(self, db: AsyncSession, transaction_id: str, verified_at: datetime) -> bool:
+        result = await db.execute(
+            update(OtpTransaction)
+            .where(OtpTransaction.transaction_id == transaction_id, OtpTransaction.verified_at.is_(None))
+            .values(verified_at=verified_at)
+        )
+        return result.rowcount == 1
+
+    async def link_consent(self, db: AsyncSession, transaction_id: str, consent_id: str) -> bool:
+        result = await db.execute(
+            update(OtpTransaction)
+            .where(OtpTransaction.transaction_id == transaction_id, OtpTransaction.consent_id.is_(None))
+            .values(consent_id=consent_id)
+        )
+        return result.rowcount == 1
+
+    async def hit_rate_limit(self, mobile_number: str) -> Optional[int]:
+        return self.rate_limiter.hit(mobile_number)
+
+
+class MemoryOtpStore(OtpStore):
+    """
+    Transactions sharded by id over OTP_STORE_SHARDS locked dicts.
+
+    Every entry gets the same TTL, so each shard's dict is in expiry order and
+    expired entries are dropped from its front on every access.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = OTP_TTL_SECONDS,
+        shards: int = OTP_STORE_SHARDS,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.rate_limiter = rate_limiter or RateLimiter(shards=shards)
+        self._shards: List[Tuple[threading.Lock, "OrderedDict[str, Tuple[float, OtpTxn]]"]] = [
+            (threading.Lock(), OrderedDict()) for _ in range(max(shards, 1))
+        ]
+
+    def _shard(self, transaction_id: str):
+        return self._shards[hash(transaction_id) % len(self._shards)]
+
+    @staticmethod
+    def _purge(entries, now: float) -> None:
+        while entries:
+            expires, _ = next(iter(entries.values()))
+            if expires > now:
+                break
+            entries.popitem(last=False)
+
+    async def create(self, db: AsyncSession, txn: OtpTxn) -> None:
+        lock, entries = self._shard(txn.transaction_id)
+        now = time.monotonic()
+        with lock:
+            self._purge(entries, now)
+            entries[txn.transaction_id] = (now + self.ttl_seconds, replace(txn))
+
+    async def get(self, db: AsyncSession, transaction_id: str) -> Optional[OtpTxn]:
+        lock, entries = self._shard(transaction_id)
+        with lock:
+            self._purge(entries, time.monotonic())
+            entry = entries.get(transaction_id)
+            return replace(entry[1]) if entry else None
+
+    async def mark_verified(self, db: AsyncSession, transaction_id: str, verified_at: datetime) -> bool:
+        return self._claim(transaction_id, "verified_at", verified_at)
+
+    async def link_consent(self, db: AsyncSession, transaction_id: str, consent_id: str) -> bool:
+        return self._claim(transaction_id, "consent_id", consent_id)
+
+    def _claim(self, transaction_id: str, field: str, value) -> bool:
+        lock, entries = self._shard(transaction_id)
+        with lock:
+            self._purge(entries, time.monotonic())
+            entry = entries.get(transaction_id)
+            if entry is None or getattr(entry[1], field) is not None:
+                return False
+            setattr(entry[1], field, value)
+            return True
+
+    async def hit_rate_limit(self, mobile_number: str) -> Optional[int]:
+        return self.rate_limiter.hit(mobile_number)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for _, entries in self._shards)
+
+
+class RedisOtpStore(OtpStore):
+    """
+    otp:<id>           JSON transaction, SET ... EX ttl
+    otp:<id>:verified  verified_at, SET NX with the transaction's remaining TTL
+    otp:<id>:consent   consent_id, same
+    otp-rate:<mobile>  fixed-window counter, shared by every worker
+
+    OTP_REDIS_URL=memory:// runs against fakeredis in this process, which
+    speaks the same commands without a server (single worker only).
+    """
+
+    def __init__(
+        self,
+        url: str = OTP_REDIS_URL,
+        ttl_seconds: int = OTP_TTL_SECONDS,
+        rate_limit: int = OTP_RATE_LIMIT_PER_MOBILE,
+        rate_window_seconds: int = OTP_RATE_LIMIT_WINDOW_SECONDS,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.rate_limit = rate_limit
+        self.rate_window_seconds = rate_window_seconds
+        try:
+            if url.startswith("memory://"):
+                import fakeredis
+
+                self._redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+            else:
+                import redis.asyncio
+
+                self._redis = redis.asyncio.from_url(url, decode_responses=True)
+        except ImportError as exc:
+            raise RuntimeError(
+                "OTP_STORE=redis needs the 'redis' package (and 'fakeredis' for memory://, see requirements-dev.txt)"
+            ) from exc
+
+    @staticmethod
+    def _key(transaction_id: str) -> str:
+        return f"otp:{transaction_id}"
+
+    async def create(self, db: AsyncSession, txn: OtpTxn) -> None:
+        payload = {k: (v.isoformat() if isinstance(v, datetime) else v) for k, v in asdict(txn).items()}
+        await self._redis.set(self._key(txn.transaction_id), json.dumps(payload), ex=self.ttl_seconds)
+
+    async def get(self, db: AsyncSession, transaction_id: str) -> Optional[OtpTxn]:
+        key = self._key(transaction_id)
+        raw, verified_at, consent_id = await self._redis.mget(key, f"{key}:verified", f"{key}:consent")
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        for field in ("expires_at", "created_at"):
+            data[field] = datetime.fromisoformat(data[field])
+        data["verified_at"] = datetime.fromisoformat(verified_at) if verified_at else None
+        data["consent_id"] = consent_id
+        return OtpTxn(**data)
+
+    async def _claim(self, transaction_id: str, suffix: str, value: str) -> bool:
+        key = self._key(transaction_id)
+        remaining_ms = await self._redis.pttl(key)
+        if remaining_ms <= 0:
+            return False
+        return bool(await self._redis.set(f"{key}:{suffix}", value, px=remaining_ms, nx=True))
+
+    async def mark_verified(self, db: AsyncSession, transaction_id: str, verified_at: datetime) -> bool:
+        return await self._claim(transaction_id, "verified", verified_at.isoformat())
+
+    async def link_consent(self, db: AsyncSession, transaction_id: str, consent_id: str) -> bool:
+        return await self._claim(transaction_id, "consent", consent_id)
+
+    async def hit_rate_limit(self, mobile_number: str) -> Optional[int]:
+        if self.rate_limit <= 0:
+            return None
+        key = f"otp-rate:{mobile_number}"
+        async with self._redis.pipeline(transaction=True) as pipe:
+            # SET NX starts the window with its expiry; INCR keeps that TTL
+            pipe.set(key, 0, ex=self.rate_window_seconds, nx=True)
+            pipe.incr(key)
+            pipe.ttl(key)
+            _, count, ttl = await pipe.execute()
+        if count > self.rate_limit:
+            return max(int(ttl), 1)
+        return None
+
+
+def create_otp_store(kind: str = OTP_STORE) -> OtpStore:
+    if kind == "sql":
+        return SqlOtpStore()
+    if kind == "memory":
+        return MemoryOtpStore()
+    if kind == "redis":
+        return RedisOtpStore()
+    raise ValueError(f"Unknown OTP_STORE {kind!r}; expected sql, memory or redis")
+
+
+otp_store = create_otp_store()
@@ -0,0 +1,125 @@
+# backend/app/pagination.py
+# Keyset (cursor) pagination shared by the list endpoints.
+#
+# Pages are ordered by (timestamp column, id) and the cursor is the id of the
+# last row returned. The next page starts strictly after that row's
+# (timestamp, id) pair, looked up by primary key inside the same query, so
+# page N costs the same as page 1 and the DB always compares its own stored
+# timestamp values (SQLite keeps server-default and Python-written timestamps
+# in different text formats, so re-binding a parsed datetime would be lossy).
+
+import base64
+import json
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import func, literal_column, select, tuple_
+from sqlalchemy.orm import Query
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Filtered counts stop here; the header then reads e.g. "10000+".
+TOTAL_ESTIMATE_CAP = 10_000
+
+
+def _encode(payload: dict) -> str:
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _decode(cursor: str) -> dict:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded))
+
+
+def encode_cursor(row_id: str) -> str:
+    return _encode({"id": row_id})
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        return _decode(cursor)["id"]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def encode_key_cursor(ts: int, row_id: str) -> str:
+    """
+    Cursor that carries the (timestamp, id) key itself, for row sources that
+    cannot look the key up by id (e.g. app/audit_segments.py).
+    """
+    return _encode({"id": row_id, "ts": ts})
+
+
+def decode_key_cursor(cursor: str) -> Tuple[int, str]:
+    try:
+        payload = _decode(cursor)
+        return int(payload["ts"]), payload["id"]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_page(
+    q: Query,
+    *,
+    ts_col,
+    id_col,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = False,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Return (rows, next_cursor) for one page of `q` ordered by (ts_col, id_col).
+
+    next_cursor is None on the last page. `q` must select the mapped entity so
+    that `id_col` can be read off each row.
+    """
+    if cursor:
+        after_id = decode_cursor(cursor)
+        after_ts = select(ts_col).where(id_col == after_id).scalar_subquery()
+        key = tuple_(ts_col, id_col)
+        bound = tuple_(after_ts, after_id)
+        q = q.filter(key < bound if descending else key > bound)
+
+    if descending:
+        q = q.order_by(ts_col.desc(), id_col.desc())
+    else:
+        q = q.order_by(ts_col.asc(), id_col.asc())
+
+    rows = q.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, encode_cursor(getattr(rows[-1], id_col.key))
+
+
+def estimate_total(q: Query, *, cap: int = TOTAL_ESTIMATE_CAP) -> str:
+    """
+    Cheap total for a filtered query, rendered for the X-Total-Estimate header.
+
+    PostgreSQL: the planner's row estimate (no rows are touched).
+    Elsewhere: an exact count that stops after `cap` rows, reported as "<cap>+".
+    """
+    session = q.session
+    q = q.order_by(None)
+    dialect = session.get_bind().dialect
+
+    if dialect.name == "postgresql":
+        compiled = q.statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+        plan = session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}").scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return str(int(plan[0]["Plan"]["Plan Rows"]))
+
+    bounded = q.with_entities(literal_column("1")).limit(cap + 1).subquery()
+    n = session.execute(select(func.count()).select_from(bounded)).scalar_one()
+    return f"{cap}+" if n > cap else str(n)
+
+
+def set_page_headers(response: Response, next_cursor: Optional[str], total: Optional[str] = None) -> None:
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if total is not None:
+        response.headers["X-Total-Estimate"] = total
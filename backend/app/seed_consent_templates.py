@@ -1,11 +1,11 @@
 # backend/app/seed_consent_templates.py
 
-from uuid import uuid4
 from typing import List, Dict
 
 from sqlalchemy.orm import Session
 
 from app.database import SessionLocal
+from app.ids import new_id
 from app.models import ConsentTemplate
 
 
@@ -83,7 +83,7 @@ def seed_consent_templates(db: Session) -> None:
             continue
 
         tmpl = ConsentTemplate(
-            id=str(uuid4()),
+            id=new_id(),
             tenant_id=tpl["tenant_id"],
             product_id=tpl["product_id"],
             purpose=tpl["purpose"],
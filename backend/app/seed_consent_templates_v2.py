@@ -1,10 +1,9 @@
 # backend/app/seed_consent_templates_v2.py
 
-from uuid import uuid4
-
 from sqlalchemy.orm import Session
 
 from app.database import SessionLocal
+from app.ids import new_id
 from app.models import ConsentTemplate
 
 TENANT_ID = "DEMO_BANK"
@@ -65,7 +64,7 @@ def seed_v2(db: Session) -> None:
         )
 
     tmpl_v2 = ConsentTemplate(
-        id=str(uuid4()),
+        id=new_id(),
         tenant_id=TENANT_ID,
         product_id=PRODUCT_ID,
         purpose=PURPOSE,
@@ -0,0 +1,118 @@
+# backend/app/template_cache.py
+# In-process resolver for the active consent template of (tenant, product, purpose).
+#
+# Templates change rarely (POST /consents/templates, seed scripts) but are
+# resolved on every ingestion consent. Entries are cached per worker and
+# dropped when this worker creates a template; a TTL covers changes made by
+# other workers or scripts. A generation counter stops a lookup that raced
+# with an invalidation from re-inserting a stale entry.
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import TEMPLATE_CACHE_TTL_SECONDS
+from app.models import ConsentTemplate
+
+TemplateKey = Tuple[Optional[str], str, str]  # (tenant_id, product_id, purpose)
+
+
+@dataclass(frozen=True)
+class ActiveTemplate:
+    """Detached snapshot of the fields consent creation needs."""
+    id: str
+    tenant_id: str
+    product_id: str
+    purpose: str
+    version: int
+
+
+def load_active_template(
+    db: Session,
+    *,
+    tenant_id: Optional[str],
+    product_id: str,
+    purpose: str,
+) -> Optional[ConsentTemplate]:
+    """Highest active version for product/purpose (and tenant, if given), straight from the DB."""
+    q = db.query(ConsentTemplate).filter(
+        ConsentTemplate.product_id == product_id,
+        ConsentTemplate.purpose == purpose,
+        ConsentTemplate.is_active == True,  # noqa: E712
+    )
+
+    if tenant_id:
+        q = q.filter(ConsentTemplate.tenant_id == tenant_id)
+
+    return q.order_by(ConsentTemplate.version.desc()).first()
+
+
+class TemplateResolver:
+    def __init__(self, ttl_seconds: int = TEMPLATE_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[TemplateKey, Tuple[ActiveTemplate, float]] = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def resolve(
+        self,
+        db: Session,
+        *,
+        tenant_id: Optional[str],
+        product_id: str,
+        purpose: str,
+    ) -> Optional[ActiveTemplate]:
+        key: TemplateKey = (tenant_id or None, product_id, purpose)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            generation = self._generation
+
+        row = load_active_template(db, tenant_id=tenant_id, product_id=product_id, purpose=purpose)
+        if row is None:
+            # Not cached: a template seeded moments later must be picked up immediately.
+            return None
+
+        template = ActiveTemplate(
+            id=row.id,
+            tenant_id=row.tenant_id,
+            product_id=row.product_id,
+            purpose=row.purpose,
+            version=row.version,
+        )
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (template, now + self.ttl_seconds)
+        return template
+
+    def invalidate(self) -> None:
+        """Drop every entry; call after committing a template change."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "generation": self._generation,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+template_resolver = TemplateResolver()
@@ -0,0 +1,2 @@
+# Stand-alone benchmark scripts. Run from backend/, e.g.:
+#   python -m bench.export_date_filter
@@ -0,0 +1,182 @@
+# backend/bench/async_load.py
+"""
+Latency and throughput of the async request path vs. the sync one.
+
+Starts uvicorn (one worker) against a scratch SQLite DB, then drives
+--concurrency clients at the async routes (GET /consents/{id} and
+GET /audit/?consent_id=...) and at sync twins of the same handlers mounted
+under /bench-sync (plain `def` + get_read_db, i.e. the threadpool path).
+Reports req/s, p50 and p99 per path.
+
+    python -m bench.async_load --concurrency 500 --requests 10000
+
+--url runs the same comparison against another (empty) database, e.g.
+postgresql+psycopg://... . Client and server share the machine; on a box with few cores the client's own
+overhead shows up in the absolute numbers, so compare the two paths, not runs.
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from typing import List, Optional
+
+import httpx
+from fastapi import APIRouter, Depends, FastAPI, HTTPException
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.deps import get_read_db
+from app.models import AuditLog, Consent
+
+sync_router = APIRouter()
+
+
+@sync_router.get("/consents/{consent_id}")
+def sync_get_consent(consent_id: str, db: Session = Depends(get_read_db)):
+    from app.api.v1.routes_consent import _row_to_out
+
+    c = db.query(Consent).filter(Consent.id == consent_id).first()
+    if not c:
+        raise HTTPException(status_code=404, detail="Consent not found")
+    return _row_to_out(c)
+
+
+@sync_router.get("/audit/")
+def sync_list_audit(consent_id: Optional[str] = None, limit: int = 100, db: Session = Depends(get_read_db)):
+    from app.api.v1.routes_audit import _filtered_audit_query
+    from app.pagination import keyset_page
+
+    rows, _ = keyset_page(
+        _filtered_audit_query(db, consent_id=consent_id),
+        ts_col=AuditLog.timestamp,
+        id_col=AuditLog.id,
+        cursor=None,
+        limit=limit,
+    )
+    return [{"id": a.id, "consent_id": a.consent_id, "action": a.action, "details": a.details} for a in rows]
+
+
+def create_app() -> FastAPI:
+    """uvicorn --factory entry point: the real app plus the sync twins."""
+    from app.main import app
+
+    app.include_router(sync_router, prefix="/bench-sync")
+    return app
+
+
+def _seed(url: str, n_consents: int) -> List[str]:
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    ids = [str(uuid.uuid4()) for _ in range(n_consents)]
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Consent),
+            [{"id": i, "subject_id": f"S{n}", "purpose": "marketing", "status": "granted"} for n, i in enumerate(ids)],
+        )
+        conn.execute(
+            insert(AuditLog),
+            [
+                {"id": str(uuid.uuid4()), "consent_id": i, "action": action, "actor": "bench", "details": {"n": n}}
+                for n, i in enumerate(ids)
+                for action in ("granted", "renewed", "revoked")
+            ],
+        )
+    engine.dispose()
+    return ids
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _drive(base: str, paths: List[str], concurrency: int, total: int) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    remaining = total
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=120) as client:
+
+        async def one_client() -> None:
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                try:
+                    res = await client.get(random.choice(paths))
+                    if res.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one_client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=10_000, help="requests per path and endpoint")
+    parser.add_argument("--consents", type=int, default=5_000)
+    parser.add_argument("--url", help="empty database to run against (default: scratch SQLite file)")
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench_async_'), 'bench.db')}"
+    ids = _seed(url, args.consents)
+
+    port = _free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "bench.async_load:create_app", "--factory",
+            "--port", str(port), "--log-level", "warning", "--backlog", "4096",
+        ],
+        env={**os.environ, "DATABASE_URL": url},
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"{base}/healthz").raise_for_status()
+                break
+            except httpx.HTTPError:
+                time.sleep(0.2)
+
+        endpoints = {
+            "GET consent": ("/api/v1/consents/{}", "/bench-sync/consents/{}"),
+            "GET audit  ": ("/api/v1/audit/?consent_id={}", "/bench-sync/audit/?consent_id={}"),
+        }
+        sample = random.sample(ids, min(len(ids), 1000))
+        for name, (async_path, sync_path) in endpoints.items():
+            for label, path in (("sync ", sync_path), ("async", async_path)):
+                r = asyncio.run(_drive(base, [path.format(i) for i in sample], args.concurrency, args.requests))
+                print(
+                    f"{name} {label}: {r['rps']:7.0f} req/s  p50 {r['p50']:7.1f} ms  "
+                    f"p99 {r['p99']:7.1f} ms  errors {r['errors']}"
+                )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# backend/bench/audit_scan.py
+"""
+Regulator-style audit scans: audit_logs through the ORM (what list_audit /
+export_audit_csv run with AUDIT_STORAGE=sql) vs. the segment files of
+app/audit_segments.py (AUDIT_STORAGE=segments).
+
+--rows events spread over --days days go into a fresh SQLite file and into a
+fresh segment directory (one sealed segment per day). Each query then runs
+against both stores:
+
+  full      every event, oldest first
+  one day   a single day's events (time-range pruning)
+  mobile    one customer's events over the whole period (bloom filters)
+
+    python -m bench.audit_scan --rows 500000 --days 30
+"""
+import argparse
+import itertools
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.routes_audit import _filtered_audit_query
+from app.audit_segments import SegmentStore
+from app.database import Base
+from app.ids import new_id
+from app.models import AuditLog
+
+START = datetime(2026, 1, 1)
+EPOCH = datetime(1970, 1, 1)
+
+
+def _events(rows: int, days: int):
+    step = timedelta(days=days) / rows
+    for n in range(rows):
+        yield {
+            "id": new_id(),
+            "consent_id": new_id(),
+            "action": "granted" if n % 4 else "revoked",
+            "actor": "web_form",
+            "product_id": "LOAN",
+            "purpose": "marketing",
+            "mobile_number": f"9{n % 50_000:09d}",
+            "application_number": f"APP{n}",
+            "details": {"n": n},
+            "timestamp": START + step * n,
+        }
+
+
+def _seed(db_path: str, segment_dir: str, args) -> None:
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine, tables=[AuditLog.__table__])
+    # Partitions follow event time here, so sealed segments line up with days
+    now = {"ts": 0.0}
+    store = SegmentStore(segment_dir, span_seconds=86400, max_rows=args.rows, clock=lambda: now["ts"])
+
+    events = list(_events(args.rows, args.days))
+    for start in range(0, len(events), 10_000):
+        batch = events[start:start + 10_000]
+        with engine.begin() as conn:
+            conn.execute(insert(AuditLog), batch)
+        for day, same_day in itertools.groupby(batch, key=lambda e: (e["timestamp"] - START).days):
+            now["ts"] = (START + timedelta(days=day) - EPOCH).total_seconds()
+            store.append(list(same_day))
+    store.close()
+    engine.dispose()
+
+
+def _time(fn) -> tuple:
+    started = time.perf_counter()
+    n = sum(1 for _ in fn())
+    return n, time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_audit_scan_")
+    db_path = os.path.join(workdir, "bench.db")
+    segment_dir = os.path.join(workdir, "segments")
+    _seed(db_path, segment_dir, args)
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    Session = sessionmaker(bind=engine)
+    store = SegmentStore(segment_dir)
+    day = START + timedelta(days=args.days // 2)
+    mobile = f"9{12_345:09d}"
+
+    queries = {
+        "full": {},
+        "one day": {"start_dt": day, "end_dt": day + timedelta(days=1) - timedelta(microseconds=1)},
+        "mobile": {"mobile_number": mobile},
+    }
+    segment_bytes = sum(os.path.getsize(os.path.join(segment_dir, f)) for f in os.listdir(segment_dir))
+    print(f"{args.rows} events: sqlite {os.path.getsize(db_path) / 1e6:.0f} MB, segments {segment_bytes / 1e6:.0f} MB")
+
+    for label, filters in queries.items():
+        with Session() as db:
+            n_sql, t_sql = _time(lambda: _filtered_audit_query(db, **filters).order_by(AuditLog.timestamp.asc()).all())
+        n_seg, t_seg = _time(lambda: store.scan(**filters))
+        print(
+            f"{label:<8} {n_sql:>8} rows  orm {t_sql:7.2f}s ({n_sql / t_sql:>9.0f} rows/s)  "
+            f"segments {t_seg:7.2f}s ({n_seg / t_seg:>9.0f} rows/s)  {t_sql / t_seg:5.1f}x"
+            + ("" if n_sql == n_seg else f"  MISMATCH: {n_seg} segment rows")
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# backend/bench/audit_stats.py
+"""
+Regulator dashboard counts: GET /audit/stats (audit_rollups, see
+app/audit_rollups.py) vs. the same counts computed from audit_logs with
+GROUP BY - which is still far cheaper than what the dashboard used to do
+(page through every event and count in the browser).
+
+Fills a scratch SQLite DB with --events audit events spread over --days
+days, builds the rollups (rebuild) and times each query --repeat times.
+
+    python -m bench.audit_stats --events 1000000 --days 30
+
+Importing the app runs its startup against DATABASE_URL; point that at a
+scratch database too.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app import audit_rollups
+from app.database import Base
+from app.deps import get_audit_read_db
+from app.ids import new_id
+from app.main import app
+from app.models import AuditLog, AuditRollup
+
+INSERT_BATCH = 50_000
+START = datetime(2025, 1, 1)
+TENANTS = ["DEMO_BANK", "OTHER_BANK"]
+PRODUCTS = ["LOAN", "CASA", "CARD", "INSURANCE"]
+PURPOSES = ["regulatory", "service", "marketing", "analytics", "credit_bureau"]
+ACTIONS = ["granted", "revoked", "renewed"]
+CHANNELS = ["web_app_customer", "web_app_branch_officer", "mobile_app", "core_banking_migration"]
+ACTOR_TYPES = ["customer", "branch_officer", "system"]
+
+QUERIES = [
+    ("totals by action, actor_type, channel", {"group_by": ["action", "actor_type", "source_channel"]}),
+    ("daily series by product", {"group_by": ["product_id"], "interval": "day"}),
+    ("hourly series, one week", {"interval": "hour", "start_date": "2025-01-08", "end_date": "2025-01-14"}),
+    ("totals by tenant, two weeks", {"group_by": ["tenant_id"], "start_date": "2025-01-10", "end_date": "2025-01-23"}),
+]
+
+
+def _seed(engine, events: int, days: int) -> None:
+    rng = random.Random(0)
+    step = days * 86400 / events
+    with engine.begin() as conn:
+        for lo in range(0, events, INSERT_BATCH):
+            rows = [
+                {
+                    "id": new_id(),
+                    "consent_id": f"c{i // 3}",
+                    "action": rng.choice(ACTIONS),
+                    "actor": "web_form",
+                    "tenant_id": rng.choice(TENANTS),
+                    "product_id": rng.choice(PRODUCTS),
+                    "purpose": rng.choice(PURPOSES),
+                    "source_channel": rng.choice(CHANNELS),
+                    "actor_type": rng.choice(ACTOR_TYPES),
+                    "timestamp": START + timedelta(seconds=i * step),
+                }
+                for i in range(lo, min(lo + INSERT_BATCH, events))
+            ]
+            conn.execute(insert(AuditLog), rows)
+
+
+def _raw(db, group_by=(), interval=None, start_date=None, end_date=None):
+    """The same counts straight from audit_logs."""
+    columns = [getattr(AuditLog, field) for field in group_by]
+    if interval:
+        fmt = "%Y-%m-%d %H:00:00" if interval == "hour" else "%Y-%m-%d"
+        columns.insert(0, func.strftime(fmt, AuditLog.timestamp))
+    q = select(*columns, func.count())
+    if start_date:
+        q = q.where(AuditLog.timestamp >= datetime.fromisoformat(start_date))
+    if end_date:
+        q = q.where(AuditLog.timestamp < datetime.fromisoformat(end_date) + timedelta(days=1))
+    return db.execute(q.group_by(*columns) if columns else q).all()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_audit_stats_")
+    engine = create_engine(
+        f"sqlite:///{os.path.join(tmpdir, 'bench.db')}", connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine, tables=[AuditLog.__table__, AuditRollup.__table__])
+    _seed(engine, args.events, args.days)
+
+    started = time.perf_counter()
+    rollup_rows = audit_rollups.rebuild(engine)
+    print(f"rebuild: {args.events} events -> {rollup_rows} rollup rows in {time.perf_counter() - started:.2f}s")
+
+    Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+    def scratch_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_audit_read_db] = scratch_db
+    client = TestClient(app)
+
+    for label, params in QUERIES:
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            res = client.get("/api/v1/audit/stats", params=params)
+            res.raise_for_status()
+        stats_ms = (time.perf_counter() - started) / args.repeat * 1000
+
+        started = time.perf_counter()
+        with Session() as db:
+            _raw(db, **params)
+        raw_ms = (time.perf_counter() - started) * 1000
+        print(
+            f"{label:<40} /audit/stats {stats_ms:8.1f} ms ({len(res.json()['rows'])} rows)   "
+            f"GROUP BY audit_logs {raw_ms:9.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
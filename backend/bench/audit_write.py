@@ -0,0 +1,146 @@
+# backend/bench/audit_write.py
+"""
+POST /consents/ (grant) latency with the audit row written in the request
+(AUDIT_WRITE_MODE=sync) vs. handed to the batched outbox writer.
+
+For each variant: a fresh scratch SQLite DB with --audit-rows existing audit
+events (so audit_logs' indexes have some depth), one uvicorn worker started
+with that variant's settings, and --requests grants from --concurrency
+clients. After the server stops (which flushes the writer) the audit row
+count is checked against the grants made.
+
+    python -m bench.audit_write --requests 3000 --concurrency 20
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import httpx
+from sqlalchemy import create_engine, insert
+
+from app.database import Base
+from app.ids import new_id
+from app.models import AuditLog
+from bench.async_load import _free_port
+
+VARIANTS: Dict[str, Dict[str, str]] = {
+    "sync (audit_logs in request)": {"AUDIT_WRITE_MODE": "sync"},
+    "outbox, transactional": {"AUDIT_WRITE_MODE": "outbox", "AUDIT_OUTBOX_DURABILITY": "transactional"},
+    "outbox, memory": {"AUDIT_WRITE_MODE": "outbox", "AUDIT_OUTBOX_DURABILITY": "memory"},
+    "outbox, memory, audit.db": {
+        "AUDIT_WRITE_MODE": "outbox", "AUDIT_OUTBOX_DURABILITY": "memory", "AUDIT_DATABASE_URL": "{audit_url}",
+    },
+}
+
+
+def _seed(path: str, audit_rows: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for start in range(0, audit_rows, 10_000):
+            conn.execute(
+                insert(AuditLog),
+                [
+                    {"id": new_id(), "consent_id": new_id(), "action": "granted", "actor": "seed",
+                     "mobile_number": f"9{n:09d}", "application_number": f"APP{n}", "purpose": "marketing"}
+                    for n in range(start, min(start + 10_000, audit_rows))
+                ],
+            )
+    engine.dispose()
+
+
+async def _drive(base: str, concurrency: int, total: int) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async with httpx.AsyncClient(base_url=base, timeout=120) as client:
+
+        async def one_client() -> None:
+            nonlocal errors
+            for n in counter:
+                started = time.perf_counter()
+                res = await client.post(
+                    "/api/v1/consents/",
+                    json={"subject_id": f"B{n}", "purpose": "marketing", "product_id": "LOAN", "mobile_number": f"8{n:09d}"},
+                )
+                if res.status_code != 201:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one_client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+def _audit_count(path: str) -> int:
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM audit_logs WHERE actor = 'web_form'").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--audit-rows", type=int, default=200_000, help="pre-existing audit events")
+    parser.add_argument("--sqlite-production-mode", action="store_true")
+    args = parser.parse_args()
+
+    for label, settings in VARIANTS.items():
+        workdir = tempfile.mkdtemp(prefix="bench_audit_")
+        db_path = os.path.join(workdir, "bench.db")
+        audit_path = os.path.join(workdir, "audit.db")
+        _seed(db_path, args.audit_rows)
+
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{db_path}",
+            "JANITOR_ENABLED": "false",
+            "SQLITE_PRODUCTION_MODE": "true" if args.sqlite_production_mode else "false",
+            **{k: v.format(audit_url=f"sqlite:///{audit_path}") for k, v in settings.items()},
+        }
+        port = _free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+            env=env,
+        )
+        base = f"http://127.0.0.1:{port}"
+        try:
+            for _ in range(100):
+                try:
+                    httpx.get(f"{base}/healthz").raise_for_status()
+                    break
+                except httpx.HTTPError:
+                    time.sleep(0.2)
+            r = asyncio.run(_drive(base, args.concurrency, args.requests))
+        finally:
+            server.terminate()
+            server.wait()
+
+        written = _audit_count(audit_path if "AUDIT_DATABASE_URL" in settings else db_path)
+        print(
+            f"{label:<30} {r['rps']:7.0f} req/s  p50 {r['p50']:6.1f} ms  p99 {r['p99']:7.1f} ms  "
+            f"errors {r['errors']}  audit rows {written}/{args.requests}"
+        )
+
+
+if __name__ == "__main__":
+    main()
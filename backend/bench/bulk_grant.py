@@ -0,0 +1,82 @@
+# backend/bench/bulk_grant.py
+"""
+Throughput of POST /consents/bulk vs. one POST /consents per consent.
+
+Runs the real app in-process (TestClient) against a scratch SQLite DB and
+reports consents/sec for both paths, plus whether the bulk path met --target.
+
+    python -m bench.bulk_grant --items 100000 --chunk-size 1000 --target 10000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.deps import get_db
+from app.main import app
+
+
+def _item(i: int) -> dict:
+    return {
+        "subject_id": f"CIF{i:09d}",
+        "data_use_case": "marketing",
+        "tenant_id": "DEMO_BANK",
+        "product_id": "CASA",
+        "source": "core_banking_migration",
+        "meta": {"legacy_ref": i},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--single-items", type=int, default=1_000, help="items sent one request at a time")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--target", type=float, default=10_000, help="consents/sec the bulk path should reach")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_bulk_")
+    engine = create_engine(
+        f"sqlite:///{os.path.join(tmpdir, 'bench.db')}", connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+    def scratch_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = scratch_db
+    client = TestClient(app)
+
+    started = time.perf_counter()
+    for i in range(args.single_items):
+        client.post("/api/v1/consents/", json=_item(i)).raise_for_status()
+    single_rate = args.single_items / (time.perf_counter() - started)
+
+    body = "\n".join(json.dumps(_item(i)) for i in range(args.items)).encode("utf-8")
+    started = time.perf_counter()
+    res = client.post(
+        f"/api/v1/consents/bulk?chunk_size={args.chunk_size}",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    res.raise_for_status()
+    bulk_rate = res.json()["inserted"] / (time.perf_counter() - started)
+
+    print(f"single POST /consents : {single_rate:10.0f} consents/s ({args.single_items} items)")
+    print(f"POST /consents/bulk   : {bulk_rate:10.0f} consents/s ({args.items} items, chunk {args.chunk_size})")
+    print(f"target {args.target:.0f}/s: {'met' if bulk_rate >= args.target else 'NOT met'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# backend/bench/consent_check.py
+"""
+Campaign-style consent filtering: POST /consents/check/stream (in-process
+index, app/consent_index.py) vs. POST /consents/check (consent_state
+primary-key lookups, 10,000 keys per call).
+
+--subjects consent_state rows for one (tenant, product, purpose) go into a
+scratch SQLite DB, every other subject granted. Reports the time to load
+the scope into the index, raw index lookups/sec (CheckEncoder alone), and
+end-to-end lookups/sec through the app (TestClient, so no network), plus
+whether the stream endpoint met --target.
+
+    python -m bench.consent_check --subjects 2000000 --checks 5000000 --target 1000000
+
+Importing the app runs its startup against DATABASE_URL; point that at a
+scratch database too.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.consent_index import CheckEncoder, ConsentIndex, consent_index
+from app.database import Base
+from app.deps import get_async_read_db, get_read_db
+from app.main import app
+from app.models import ConsentState
+
+SCOPE = {"tenant_id": "DEMO_BANK", "product_id": "CASA", "purpose": "marketing"}
+BATCH = 8192  # ids per CheckEncoder.feed, about one 64 KiB request chunk
+
+
+def _subject(i: int) -> str:
+    return f"CIF{i:09d}"
+
+
+def _seed(engine, subjects: int) -> None:
+    Base.metadata.create_all(bind=engine, tables=[ConsentState.__table__])
+    # Written a day ago: steady state, index refreshes find no recent changes
+    updated_at = datetime.utcnow() - timedelta(days=1)
+    for start in range(0, subjects, 50_000):
+        rows = [
+            {
+                **SCOPE,
+                "subject_id": _subject(i),
+                "status": "granted" if i % 2 == 0 else "revoked",
+                "consent_id": f"c{i}",
+                "updated_at": updated_at,
+            }
+            for i in range(start, min(start + 50_000, subjects))
+        ]
+        with engine.begin() as conn:
+            conn.execute(insert(ConsentState), rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subjects", type=int, default=2_000_000)
+    parser.add_argument("--checks", type=int, default=5_000_000, help="ids sent to the stream endpoint")
+    parser.add_argument("--batch-checks", type=int, default=100_000, help="keys sent to POST /consents/check")
+    parser.add_argument("--target", type=float, default=1_000_000, help="lookups/sec the stream endpoint should reach")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="bench_check_"), "bench.db")
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    _seed(engine, args.subjects)
+    Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    AsyncSessionLocal = sessionmaker(
+        bind=create_async_engine(f"sqlite+aiosqlite:///{db_path}"), class_=AsyncSession, expire_on_commit=False
+    )
+
+    def scratch_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def scratch_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_read_db] = scratch_db
+    app.dependency_overrides[get_async_read_db] = scratch_async_db
+    client = TestClient(app)
+
+    rng = random.Random(0)
+    # Half the ids are unknown subjects, so about a quarter are allowed
+    ids = [_subject(rng.randrange(2 * args.subjects)).encode() for _ in range(args.checks)]
+
+    with Session() as db:
+        started = time.perf_counter()
+        granted = ConsentIndex().granted(db, **SCOPE)
+        load_seconds = time.perf_counter() - started
+    print(f"load scope    : {len(granted)} granted subjects in {load_seconds:.2f}s")
+
+    for fmt in ("text", "bitmap"):
+        encoder = CheckEncoder(granted, fmt)
+        started = time.perf_counter()
+        for start in range(0, len(ids), BATCH):
+            encoder.feed(ids[start:start + BATCH])
+        encoder.finish()
+        rate = len(ids) / (time.perf_counter() - started)
+        print(f"index {fmt:<7} : {rate:12.0f} lookups/s ({encoder.allowed} of {encoder.checked} allowed)")
+
+    body = b"\n".join(ids)
+    client.post("/api/v1/consents/check/stream", params=SCOPE, content=b"").raise_for_status()  # load the scope
+    stream_rate = 0.0
+    for fmt in ("text", "bitmap"):
+        started = time.perf_counter()
+        res = client.post("/api/v1/consents/check/stream", params={**SCOPE, "format": fmt}, content=body)
+        res.raise_for_status()
+        rate = len(ids) / (time.perf_counter() - started)
+        stream_rate = max(stream_rate, rate)
+        print(f"POST /check/stream {fmt:<7}: {rate:12.0f} lookups/s ({len(res.content)} response bytes)")
+
+    keys = [{**SCOPE, "subject_id": i.decode()} for i in ids[:args.batch_checks]]
+    started = time.perf_counter()
+    for start in range(0, len(keys), 10_000):
+        client.post("/api/v1/consents/check", json={"keys": keys[start:start + 10_000]}).raise_for_status()
+    batch_rate = len(keys) / (time.perf_counter() - started)
+    print(f"POST /check (10k keys/call): {batch_rate:12.0f} lookups/s ({len(keys)} keys)")
+
+    print(f"target {args.target:.0f}/s: {'met' if stream_rate >= args.target else 'NOT met'}")
+    print(f"index stats: {consent_index.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# backend/bench/export_date_filter.py
+"""
+Date-filtered consent export vs. audit table size.
+
+Fills a scratch SQLite DB with growing numbers of audit events and times the
+export query for a fixed one-day window (always ~WINDOW_EVENTS matching events).
+With the semi-join + (timestamp, consent_id) index, latency and peak memory
+should stay flat. The legacy "pull ids into a Python set" approach is shown
+for comparison; with wide windows it fails once the set passes SQLite's
+bound-parameter limit.
+
+    python -m bench.export_date_filter --sizes 10000 100000 1000000 10000000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import AuditLog, Consent
+from app.api.v1.routes_consent import _consent_export_query
+
+WINDOW_EVENTS = 1000
+INSERT_BATCH = 50_000
+EVENTS_PER_CONSENT = 2
+
+
+def _fill(engine, start_n: int, end_n: int, t0: datetime, span: timedelta) -> None:
+    """Append audit rows [start_n, end_n) spread evenly over `span` before t0."""
+    step = span / max(end_n, 1)
+    with engine.begin() as conn:
+        for lo in range(start_n, end_n, INSERT_BATCH):
+            hi = min(lo + INSERT_BATCH, end_n)
+            consents = []
+            events = []
+            for i in range(lo, hi):
+                cid = f"c{i // EVENTS_PER_CONSENT:010d}"
+                if i % EVENTS_PER_CONSENT == 0:
+                    consents.append({"id": cid, "subject_id": f"s{i}", "purpose": "marketing", "status": "granted"})
+                events.append(
+                    {
+                        "id": str(uuid4()),
+                        "consent_id": cid,
+                        "action": "granted",
+                        "timestamp": t0 - span + step * i,
+                    }
+                )
+            if consents:
+                conn.execute(insert(Consent), consents)
+            conn.execute(insert(AuditLog), events)
+
+
+def _time(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        n = fn()
+    except OperationalError as e:
+        n = f"error: {e.orig}"
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return n, elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_export_")
+    engine = create_engine(f"sqlite:///{os.path.join(tmpdir, 'bench.db')}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    t0 = datetime(2030, 1, 1)
+    print(f"{'audit rows':>12} {'rows':>6} {'semi-join ms':>13} {'peak KiB':>9} {'legacy ms':>10} {'peak KiB':>9}")
+
+    filled = 0
+    for size in sorted(args.sizes):
+        # Keep WINDOW_EVENTS inside the last day no matter how big the table is
+        span = timedelta(days=1) * (size / WINDOW_EVENTS)
+        engine.dispose()
+        with engine.begin() as conn:
+            conn.exec_driver_sql("DELETE FROM audit_logs")
+            conn.exec_driver_sql("DELETE FROM consents")
+        _fill(engine, 0, size, t0, span)
+        filled = size
+        start_dt, end_dt = t0 - timedelta(days=1), t0
+
+        def semi_join():
+            with Session() as db:
+                q = _consent_export_query(db, start_dt=start_dt, end_dt=end_dt)
+                return sum(1 for _ in q.yield_per(1000))
+
+        def legacy():
+            with Session() as db:
+                ids = {
+                    r[0]
+                    for r in db.query(AuditLog.consent_id)
+                    .filter(AuditLog.timestamp >= start_dt, AuditLog.timestamp <= end_dt)
+                    .distinct()
+                    .all()
+                }
+                return db.query(Consent.id).filter(Consent.id.in_(ids)).count()
+
+        n, el, peak = _time(semi_join)
+        ln, lel, lpeak = _time(legacy)
+        legacy_ms = f"{lel * 1000:10.1f}" if isinstance(ln, int) else f"{'failed':>10}"
+        print(f"{filled:>12} {n:>6} {el * 1000:13.1f} {peak / 1024:9.0f} {legacy_ms} {lpeak / 1024:9.0f}")
+
+
+if __name__ == "__main__":
+    main()
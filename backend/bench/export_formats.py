@@ -0,0 +1,145 @@
+# backend/bench/export_formats.py
+"""
+Full-history extracts: CSV vs. Parquet vs. Arrow IPC stream.
+
+Fills a scratch SQLite DB with --consents consents (--events-per-consent
+audit events each, realistic low-cardinality product / purpose / channel
+values) and pulls /consents/export.* and /audit/export.* through the app
+(TestClient). Reports response size, export time and the time to parse the
+response back (csv.reader / pyarrow.parquet.read_table / pyarrow.ipc).
+
+    python -m bench.export_formats --consents 200000 --events-per-consent 3
+
+Importing the app runs its startup against DATABASE_URL; point that at a
+scratch database too.
+"""
+import argparse
+import csv
+import io
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pyarrow.ipc
+import pyarrow.parquet
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.deps import get_audit_read_db, get_read_db
+from app.ids import new_id
+from app.main import app
+from app.models import AuditLog, Consent
+
+INSERT_BATCH = 50_000
+START = datetime(2025, 1, 1)
+PRODUCTS = ["LOAN", "CASA", "CARD", "INSURANCE"]
+PURPOSES = ["regulatory", "service", "marketing", "analytics", "credit_bureau"]
+CHANNELS = ["web_app_customer", "web_app_branch_officer", "mobile_app", "core_banking_migration"]
+ACTOR_TYPES = ["customer", "branch_officer", "system"]
+
+
+def _seed(engine, consents: int, events_per_consent: int) -> None:
+    rng = random.Random(0)
+    with engine.begin() as conn:
+        for lo in range(0, consents, INSERT_BATCH):
+            consent_rows, event_rows = [], []
+            for i in range(lo, min(lo + INSERT_BATCH, consents)):
+                ts = START + timedelta(seconds=i * 7)
+                consent = {
+                    "id": new_id(),
+                    "subject_id": f"CIF{i:09d}",
+                    "purpose": rng.choice(PURPOSES),
+                    "status": "granted" if i % 5 else "revoked",
+                    "source": "web_form",
+                    "meta": {"campaign": f"C{i % 40}", "consent_text_version": 3},
+                    "tenant_id": "DEMO_BANK",
+                    "product_id": rng.choice(PRODUCTS),
+                    "source_channel": rng.choice(CHANNELS),
+                    "actor_type": rng.choice(ACTOR_TYPES),
+                    "mobile_number": f"9{i % 10_000_000:09d}",
+                    "application_number": f"APP{i:08d}",
+                    "created_at": ts,
+                }
+                consent_rows.append(consent)
+                for n in range(events_per_consent):
+                    event_rows.append(
+                        {
+                            "id": new_id(),
+                            "consent_id": consent["id"],
+                            "action": "granted" if n == 0 else rng.choice(["revoked", "viewed", "exported"]),
+                            "actor": "web_form",
+                            "product_id": consent["product_id"],
+                            "purpose": consent["purpose"],
+                            "source_channel": consent["source_channel"],
+                            "actor_type": consent["actor_type"],
+                            "application_number": consent["application_number"],
+                            "mobile_number": consent["mobile_number"],
+                            "evidence_ref": f"OTP{i:010d}",
+                            "details": {"meta": consent["meta"]},
+                            "timestamp": ts + timedelta(minutes=n),
+                        }
+                    )
+            conn.execute(insert(Consent), consent_rows)
+            conn.execute(insert(AuditLog), event_rows)
+
+
+def _parse(fmt: str, body: bytes) -> int:
+    if fmt == "csv":
+        return sum(1 for _ in csv.reader(io.StringIO(body.decode("utf-8")))) - 1
+    if fmt == "parquet":
+        return pyarrow.parquet.read_table(io.BytesIO(body)).num_rows
+    return pyarrow.ipc.open_stream(body).read_all().num_rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--consents", type=int, default=200_000)
+    parser.add_argument("--events-per-consent", type=int, default=3)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_export_formats_")
+    engine = create_engine(
+        f"sqlite:///{os.path.join(tmpdir, 'bench.db')}", connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine, tables=[Consent.__table__, AuditLog.__table__])
+    _seed(engine, args.consents, args.events_per_consent)
+    Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+    def scratch_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_read_db] = scratch_db
+    app.dependency_overrides[get_audit_read_db] = scratch_db
+    client = TestClient(app)
+
+    for path in ("/api/v1/consents/export", "/api/v1/audit/export"):
+        csv_size = None
+        print(path)
+        for fmt in ("csv", "parquet", "arrow"):
+            started = time.perf_counter()
+            res = client.get(f"{path}.{fmt}")
+            res.raise_for_status()
+            export_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            n_rows = _parse(fmt, res.content)
+            parse_seconds = time.perf_counter() - started
+
+            size = len(res.content)
+            csv_size = csv_size or size
+            print(
+                f"  {fmt:<8} {n_rows:>9} rows  {size / 1e6:8.1f} MB ({csv_size / size:4.1f}x vs csv)  "
+                f"export {export_seconds:6.2f}s  parse {parse_seconds:6.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
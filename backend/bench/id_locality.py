@@ -0,0 +1,79 @@
+# backend/bench/id_locality.py
+"""
+Insert throughput and primary-key index size: random uuid4 ids vs. the
+time-ordered UUIDv7 ids from app/ids.py, with and without the redundant
+ix_consents_id index that index=True used to add next to the primary key.
+
+Each variant bulk-inserts --rows consents (executemany, --batch rows per
+transaction) into a fresh SQLite file built from app.models, then reports
+rows/sec and per-index size from SQLite's dbstat table.
+
+    python -m bench.id_locality --rows 500000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+
+from sqlalchemy import create_engine, insert
+
+from app.database import Base
+from app.ids import new_id
+from app.models import Consent
+
+VARIANTS = [
+    ("before: uuid4 + ix_consents_id", lambda: str(uuid.uuid4()), True),
+    ("uuid4, primary key only", lambda: str(uuid.uuid4()), False),
+    ("after: uuid7, primary key only", new_id, False),
+]
+
+
+def _run(make_id, redundant_index: bool, args) -> dict:
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_ids_"), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine, tables=[Consent.__table__])
+    if redundant_index:
+        with engine.begin() as conn:
+            conn.exec_driver_sql("CREATE INDEX ix_consents_id ON consents (id)")
+
+    started = time.perf_counter()
+    for start in range(0, args.rows, args.batch):
+        rows = [
+            {"id": make_id(), "subject_id": f"S{n}", "purpose": "marketing", "status": "granted"}
+            for n in range(start, min(start + args.batch, args.rows))
+        ]
+        with engine.begin() as conn:
+            conn.execute(insert(Consent), rows)
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+
+    conn = sqlite3.connect(path)
+    sizes = dict(conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").fetchall())
+    conn.close()
+    return {
+        "rate": args.rows / elapsed,
+        "pk": sizes.get("sqlite_autoindex_consents_1", 0),
+        "ix_id": sizes.get("ix_consents_id", 0),
+        "file": os.path.getsize(path),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    mb = 1024 * 1024
+    for label, make_id, redundant_index in VARIANTS:
+        r = _run(make_id, redundant_index, args)
+        print(
+            f"{label:<32} {r['rate']:8.0f} rows/s  pk index {r['pk'] / mb:6.1f} MB  "
+            f"ix_consents_id {r['ix_id'] / mb:6.1f} MB  file {r['file'] / mb:6.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# backend/bench/ingest_flow.py
+"""
+End-to-end latency of an ingestion consent: the three-call flow
+(login-initiate, verify-otp, consent) vs. login-initiate followed by the
+combined verify-and-consent endpoint.
+
+Starts uvicorn (one worker) against a scratch SQLite DB with one active
+template, then runs --flows complete customer flows per variant from
+--concurrency clients. Reports flows/s and p50/p99 of the whole flow.
+
+    python -m bench.ingest_flow --flows 2000 --concurrency 20
+
+--url runs against another (empty) database, e.g. postgresql+psycopg://... .
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+import httpx
+from sqlalchemy import create_engine, insert
+
+from app.database import Base
+from app.ids import new_id
+from app.models import ConsentTemplate
+from bench.async_load import _free_port
+
+CONSENT = {"tenant_id": "BENCH", "product_id": "LOAN", "purpose": "regulatory", "meta": {"bench": True}}
+
+
+def _seed(url: str) -> None:
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(ConsentTemplate),
+            [{
+                "id": new_id(), "tenant_id": "BENCH", "product_id": "LOAN", "purpose": "regulatory",
+                "template_type": "onboarding", "version": 1, "title": "bench", "is_active": True,
+            }],
+        )
+    engine.dispose()
+
+
+async def _three_calls(client: httpx.AsyncClient, mobile: str) -> None:
+    res = await client.post("/api/v1/ingest/customer/login-initiate", json={"mobile_number": mobile})
+    txn = res.raise_for_status().json()["transaction_id"]
+    res = await client.post("/api/v1/ingest/customer/verify-otp", json={"transaction_id": txn, "otp": "123456"})
+    res.raise_for_status()
+    res = await client.post("/api/v1/ingest/customer/consent", json={"transaction_id": txn, **CONSENT})
+    res.raise_for_status()
+
+
+async def _combined(client: httpx.AsyncClient, mobile: str) -> None:
+    res = await client.post("/api/v1/ingest/customer/login-initiate", json={"mobile_number": mobile})
+    txn = res.raise_for_status().json()["transaction_id"]
+    res = await client.post(
+        "/api/v1/ingest/customer/verify-and-consent",
+        json={"transaction_id": txn, "otp": "123456", **CONSENT},
+    )
+    res.raise_for_status()
+
+
+async def _drive(base: str, flow, concurrency: int, total: int) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async with httpx.AsyncClient(base_url=base, timeout=120) as client:
+
+        async def one_client() -> None:
+            nonlocal errors
+            for n in counter:
+                started = time.perf_counter()
+                try:
+                    # A fresh number per flow keeps clear of the OTP rate limit
+                    await flow(client, f"9{n:09d}")
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one_client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "fps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flows", type=int, default=2000, help="complete consent flows per variant")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--url", help="empty database to run against (default: scratch SQLite file)")
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench_ingest_'), 'bench.db')}"
+    _seed(url)
+
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env={**os.environ, "DATABASE_URL": url, "JANITOR_ENABLED": "false"},
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"{base}/healthz").raise_for_status()
+                break
+            except httpx.HTTPError:
+                time.sleep(0.2)
+
+        for label, flow in (("3 calls (verify-otp + consent)", _three_calls), ("2 calls (verify-and-consent)", _combined)):
+            r = asyncio.run(_drive(base, flow, args.concurrency, args.flows))
+            print(
+                f"{label:<32} {r['fps']:7.1f} flows/s  p50 {r['p50']:7.1f} ms  "
+                f"p99 {r['p99']:7.1f} ms  errors {r['errors']}"
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# backend/bench/sqlite_concurrency.py
+"""
+Concurrent OTP-verify + consent-create writes against one SQLite file, with
+the default engine vs. SQLITE_PRODUCTION_MODE (WAL, pragmas, single writer,
+read-only reader pool).
+
+Each worker process stands in for a uvicorn worker: --threads writer threads
+repeat the customer_create_consent pattern (read the OTP transaction, mark it
+verified, commit; insert consent + audit row, commit) while --readers threads
+page through consents. Reports committed writes/sec, "database is locked"
+errors and read queries/sec for both modes.
+
+    python -m bench.sqlite_concurrency --workers 4 --threads 8 --ops 100
+
+Both modes use DB_STATEMENT_TIMEOUT_MS as the SQLite lock timeout; run with
+DB_STATEMENT_TIMEOUT_MS=5000 to match the stock sqlite3 default.
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, create_engines
+from app.models import AuditLog, Consent, OtpTransaction
+
+
+def _txn_id(worker: int, thread: int, op: int) -> str:
+    return f"bench-{worker}-{thread}-{op}"
+
+
+def _seed(url: str, args) -> None:
+    engine, _ = create_engines(url, sqlite_production_mode=False)
+    Base.metadata.create_all(bind=engine)
+    expires = datetime.utcnow() + timedelta(hours=1)
+    rows = [
+        {
+            "transaction_id": _txn_id(w, t, o),
+            "mobile_number": f"9{w:02d}{t:03d}{o:04d}",
+            "channel": "customer_portal",
+            "otp_hash": "123456",
+            "expires_at": expires,
+            "created_at": datetime.utcnow(),
+        }
+        for w in range(args.workers)
+        for t in range(args.threads)
+        for o in range(args.ops)
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(OtpTransaction), rows)
+    engine.dispose()
+
+
+def _write_one(Session, transaction_id: str) -> None:
+    with Session() as db:
+        otp = db.query(OtpTransaction).filter(OtpTransaction.transaction_id == transaction_id).first()
+        otp.verified_at = datetime.utcnow()
+        db.commit()
+
+        consent = Consent(
+            id=str(uuid.uuid4()),
+            subject_id=otp.mobile_number,
+            purpose="marketing",
+            status="granted",
+            evidence_ref=transaction_id,
+            mobile_number=otp.mobile_number,
+            source_channel="customer_portal",
+            actor_type="customer",
+        )
+        db.add(consent)
+        db.flush()
+        db.add(AuditLog(id=str(uuid.uuid4()), consent_id=consent.id, action="granted", actor="customer"))
+        db.commit()
+
+
+def _worker(url: str, production: bool, worker: int, args, results) -> None:
+    engine, read_engine = create_engines(url, sqlite_production_mode=production)
+    Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    ReadSession = sessionmaker(bind=read_engine, autocommit=False, autoflush=False)
+
+    counts = {"writes": 0, "locked": 0, "other_errors": 0, "reads": 0}
+    lock = threading.Lock()
+    stop_reading = threading.Event()
+
+    def writer(thread: int) -> None:
+        for op in range(args.ops):
+            try:
+                _write_one(Session, _txn_id(worker, thread, op))
+                key = "writes"
+            except OperationalError as exc:
+                key = "locked" if "locked" in str(exc) else "other_errors"
+            with lock:
+                counts[key] += 1
+
+    def reader() -> None:
+        while not stop_reading.is_set():
+            try:
+                with ReadSession() as db:
+                    db.query(Consent).order_by(Consent.created_at.desc(), Consent.id.desc()).limit(100).all()
+                key = "reads"
+            except OperationalError as exc:
+                key = "locked" if "locked" in str(exc) else "other_errors"
+            with lock:
+                counts[key] += 1
+            # requests arrive, they don't spin; also keeps the GIL free for writers
+            time.sleep(0.005)
+
+    readers = [threading.Thread(target=reader) for _ in range(args.readers)]
+    writers = [threading.Thread(target=writer, args=(t,)) for t in range(args.threads)]
+    for t in readers + writers:
+        t.start()
+    for t in writers:
+        t.join()
+    stop_reading.set()
+    for t in readers:
+        t.join()
+
+    engine.dispose()
+    read_engine.dispose()
+    results.put(counts)
+
+
+def run(production: bool, args) -> dict:
+    tmpdir = tempfile.mkdtemp(prefix="bench_sqlite_")
+    url = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    _seed(url, args)
+
+    results = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(target=_worker, args=(url, production, w, args, results))
+        for w in range(args.workers)
+    ]
+    started = time.perf_counter()
+    for p in procs:
+        p.start()
+    totals = {"writes": 0, "locked": 0, "other_errors": 0, "reads": 0}
+    for _ in procs:
+        for key, value in results.get().items():
+            totals[key] += value
+    for p in procs:
+        p.join()
+    totals["elapsed"] = time.perf_counter() - started
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="processes (uvicorn workers)")
+    parser.add_argument("--threads", type=int, default=8, help="writer threads per worker")
+    parser.add_argument("--readers", type=int, default=2, help="reader threads per worker")
+    parser.add_argument("--ops", type=int, default=100, help="consents created per writer thread")
+    args = parser.parse_args()
+
+    attempted = args.workers * args.threads * args.ops
+    for label, production in (("default", False), ("production", True)):
+        r = run(production, args)
+        print(
+            f"{label:<10} writes {r['writes']:6d}/{attempted} "
+            f"({r['writes'] / r['elapsed']:7.0f}/s)  locked errors {r['locked']:5d}  "
+            f"other errors {r['other_errors']:3d}  reads {r['reads'] / r['elapsed']:7.0f}/s  "
+            f"[{r['elapsed']:.1f}s]"
+        )
+
+
+if __name__ == "__main__":
+    main()
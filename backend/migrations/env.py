@@ -4,14 +4,16 @@ from sqlalchemy import create_engine, pool
 from alembic import context
 
 # --- Import app metadata so Alembic "sees" tables ---
-from app.database import Base, DATABASE_URL
+from app.database import Base, DATABASE_URL, engine_options
 import app.models  # <-- CRITICAL: registers models on Base.metadata
 
 # this is the Alembic Config object
 config = context.config
 
-# If you prefer to ignore alembic.ini URL, force DATABASE_URL here:
-config.set_main_option("sqlalchemy.url", DATABASE_URL)
+# If you prefer to ignore alembic.ini URL, force DATABASE_URL here
+# (app/migrate.py passes AUDIT_DATABASE_URL the same way):
+# ("%" doubled: the option value goes through configparser interpolation)
+config.set_main_option("sqlalchemy.url", config.attributes.get("url", DATABASE_URL).replace("%", "%%"))
 
 # Interpret the config file for Python logging.
 if config.config_file_name is not None:
@@ -26,10 +28,12 @@ def run_migrations_offline():
         context.run_migrations()
 
 def run_migrations_online():
+    url = config.get_main_option("sqlalchemy.url")
+    options = engine_options(url)
     connectable = create_engine(
-        config.get_main_option("sqlalchemy.url"),
+        url,
         poolclass=pool.NullPool,
-        connect_args={"check_same_thread": False},  # for SQLite
+        connect_args=options.get("connect_args", {}),  # SQLite thread flag / PG statement_timeout
     )
     with connectable.connect() as connection:
         context.configure(connection=connection, target_metadata=target_metadata)
@@ -0,0 +1,41 @@
+"""version audit chain digests
+
+Revision ID: a3d5f8c1e027
+Revises: f7c3b8e5a914
+Create Date: 2026-10-17 09:41:52.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'a3d5f8c1e027'
+down_revision: Union[str, Sequence[str], None] = 'f7c3b8e5a914'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _chain_columns() -> set:
+    # audit_chain lives wherever audit_logs does (AUDIT_DATABASE_URL); see b7d3e5a1c982.
+    # create_all() may already have built it with digest_version.
+    inspector = sa.inspect(op.get_bind())
+    if 'audit_chain' not in inspector.get_table_names():
+        return set()
+    return {col['name'] for col in inspector.get_columns('audit_chain')}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing links were hashed without tenant_id: they keep version 1 and
+    # verify as written, new links are hashed with version 2.
+    columns = _chain_columns()
+    if columns and 'digest_version' not in columns:
+        op.add_column('audit_chain', sa.Column('digest_version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if 'digest_version' in _chain_columns():
+        op.drop_column('audit_chain', 'digest_version')
@@ -0,0 +1,35 @@
+"""create audit outbox
+
+Revision ID: a4c7e2f9d315
+Revises: f3a6d1e8b024
+Create Date: 2026-10-16 20:41:37.208416
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = 'a4c7e2f9d315'
+down_revision: Union[str, Sequence[str], None] = 'f3a6d1e8b024'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # AUDIT_WRITE_MODE=outbox, AUDIT_OUTBOX_DURABILITY=transactional (app/audit_outbox.py)
+    if 'audit_outbox' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            'audit_outbox',
+            sa.Column('seq', sa.Integer(), nullable=False),
+            sa.Column('payload', sa.JSON().with_variant(postgresql.JSONB(), 'postgresql'), nullable=False),
+            sa.PrimaryKeyConstraint('seq'),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('audit_outbox', if_exists=True)
@@ -0,0 +1,63 @@
+"""create audit hash chain
+
+Revision ID: b7d3e5a1c982
+Revises: a4c7e2f9d315
+Create Date: 2026-10-16 23:05:12.418230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'b7d3e5a1c982'
+down_revision: Union[str, Sequence[str], None] = 'a4c7e2f9d315'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # AUDIT_HASH_CHAIN (app/audit_chain.py); existing audit rows stay unchained
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    if 'audit_chain' not in tables:
+        # The baseline only has audit_log; audit_logs (and so the foreign key)
+        # exists where create_all() built it
+        constraints = [sa.PrimaryKeyConstraint('seq')]
+        if 'audit_logs' in tables:
+            constraints.append(sa.ForeignKeyConstraint(['audit_log_id'], ['audit_logs.id']))
+        op.create_table(
+            'audit_chain',
+            sa.Column('seq', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('audit_log_id', sa.String(), nullable=False),
+            sa.Column('chain_hash', sa.String(length=64), nullable=False),
+            *constraints,
+        )
+        op.create_index('ux_audit_chain_audit_log_id', 'audit_chain', ['audit_log_id'], unique=True)
+    if 'audit_chain_head' not in tables:
+        head = op.create_table(
+            'audit_chain_head',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('seq', sa.Integer(), nullable=False),
+            sa.Column('chain_hash', sa.String(length=64), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.bulk_insert(head, [{'id': 1, 'seq': 0, 'chain_hash': '0' * 64}])
+    if 'audit_checkpoints' not in tables:
+        op.create_table(
+            'audit_checkpoints',
+            sa.Column('seq', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('chain_hash', sa.String(length=64), nullable=False),
+            sa.Column('merkle_root', sa.String(length=64), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('seq'),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('audit_checkpoints', if_exists=True)
+    op.drop_table('audit_chain_head', if_exists=True)
+    op.drop_index('ux_audit_chain_audit_log_id', table_name='audit_chain', if_exists=True)
+    op.drop_table('audit_chain', if_exists=True)
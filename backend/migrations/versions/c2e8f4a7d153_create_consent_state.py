@@ -0,0 +1,70 @@
+"""create consent_state
+
+Revision ID: c2e8f4a7d153
+Revises: b7d3e5a1c982
+Create Date: 2026-10-16 23:48:37.120514
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'c2e8f4a7d153'
+down_revision: Union[str, Sequence[str], None] = 'b7d3e5a1c982'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Current consent per (tenant, subject, product, purpose); see app/consent_state.py
+    inspector = sa.inspect(op.get_bind())
+    if 'consent_state' in inspector.get_table_names():
+        return
+    op.create_table(
+        'consent_state',
+        sa.Column('tenant_id', sa.String(), nullable=False),
+        sa.Column('subject_id', sa.String(), nullable=False),
+        sa.Column('product_id', sa.String(), nullable=False),
+        sa.Column('purpose', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('consent_id', sa.String(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.ForeignKeyConstraint(['consent_id'], ['consents.id']),
+        sa.PrimaryKeyConstraint('tenant_id', 'subject_id', 'product_id', 'purpose'),
+    )
+    # Backfill: per key, the newest granted consent, else the newest one.
+    # Skipped when consents lacks the scope columns (a database built by this
+    # history alone, before create_all() added them): there is nothing to key.
+    columns = {col['name'] for col in inspector.get_columns('consents')}
+    if not {'tenant_id', 'product_id'} <= columns:
+        return
+    op.execute(
+        """
+        INSERT INTO consent_state (tenant_id, subject_id, product_id, purpose, status, consent_id)
+        SELECT tenant_id, subject_id, product_id, purpose,
+               CASE WHEN status = 'granted' THEN 'granted' ELSE 'revoked' END, id
+        FROM (
+            SELECT COALESCE(tenant_id, '') AS tenant_id,
+                   COALESCE(subject_id, '') AS subject_id,
+                   COALESCE(product_id, '') AS product_id,
+                   COALESCE(purpose, '') AS purpose,
+                   status, id,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY COALESCE(tenant_id, ''), COALESCE(subject_id, ''),
+                                    COALESCE(product_id, ''), COALESCE(purpose, '')
+                       ORDER BY CASE WHEN status = 'granted' THEN 0 ELSE 1 END,
+                                created_at DESC, id DESC
+                   ) AS rank
+            FROM consents
+        ) ranked
+        WHERE rank = 1
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('consent_state', if_exists=True)
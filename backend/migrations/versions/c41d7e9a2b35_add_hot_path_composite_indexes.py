@@ -0,0 +1,57 @@
+"""add composite indexes for hot lookup paths
+
+Revision ID: c41d7e9a2b35
+Revises: b06f365657a7
+Create Date: 2026-10-16 10:12:03.418220
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'c41d7e9a2b35'
+down_revision: Union[str, Sequence[str], None] = 'b06f365657a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns) – must match __table_args__ in app/models.py
+INDEXES = [
+    # GET /consents keyset pages, export_consents_csv subject filter
+    ('ix_consents_created_at_id', 'consents', ['created_at', 'id']),
+    ('ix_consents_subject_id_created_at', 'consents', ['subject_id', 'created_at', 'id']),
+    # export_consents_csv date range semi-join
+    ('ix_audit_logs_timestamp_consent_id', 'audit_logs', ['timestamp', 'consent_id']),
+    # routes_audit: global feed + per consent / mobile / application timelines
+    ('ix_audit_logs_timestamp_id', 'audit_logs', ['timestamp', 'id']),
+    ('ix_audit_logs_consent_id_timestamp', 'audit_logs', ['consent_id', 'timestamp', 'id']),
+    ('ix_audit_logs_mobile_number_timestamp', 'audit_logs', ['mobile_number', 'timestamp', 'id']),
+    ('ix_audit_logs_application_number_timestamp', 'audit_logs', ['application_number', 'timestamp', 'id']),
+    # routes_ingest._get_active_template, create_consent_template
+    ('ix_consent_templates_active_lookup', 'consent_templates', ['product_id', 'purpose', 'is_active', 'version', 'tenant_id']),
+    ('ix_consent_templates_family_version', 'consent_templates', ['tenant_id', 'product_id', 'purpose', 'template_type', 'version']),
+]
+
+
+def _existing_tables() -> set:
+    # Older databases were built with create_all() rather than this history,
+    # so only touch tables that are actually there.
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    tables = _existing_tables()
+    for name, table, columns in INDEXES:
+        if table in tables:
+            op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    tables = _existing_tables()
+    for name, table, _ in reversed(INDEXES):
+        if table in tables:
+            op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,50 @@
+"""index consents by mobile and application number
+
+Revision ID: d8a2f4c61e07
+Revises: c41d7e9a2b35
+Create Date: 2026-10-16 14:41:27.902113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'd8a2f4c61e07'
+down_revision: Union[str, Sequence[str], None] = 'c41d7e9a2b35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, column) on consents
+INDEXES = [
+    ('ix_consents_mobile_number', 'mobile_number'),
+    ('ix_consents_application_number', 'application_number'),
+]
+
+
+def _consent_columns() -> set:
+    # The customer identifier columns came from create_all(), not from this
+    # history, so a database built by `alembic upgrade` alone may lack them.
+    inspector = sa.inspect(op.get_bind())
+    if 'consents' not in inspector.get_table_names():
+        return set()
+    return {col['name'] for col in inspector.get_columns('consents')}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # POST /consents/bulk-revoke selects by these customer identifiers
+    columns = _consent_columns()
+    for name, column in INDEXES:
+        if column in columns:
+            op.create_index(name, 'consents', [column], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    columns = _consent_columns()
+    for name, column in reversed(INDEXES):
+        if column in columns:
+            op.drop_index(name, table_name='consents', if_exists=True)
@@ -0,0 +1,36 @@
+"""index consent_state scope
+
+Revision ID: d9f1b3c6e402
+Revises: c2e8f4a7d153
+Create Date: 2026-10-17 00:31:54.208716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'd9f1b3c6e402'
+down_revision: Union[str, Sequence[str], None] = 'c2e8f4a7d153'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # app/consent_index.py loads a (tenant, product, purpose) scope and refreshes it by updated_at
+    if 'consent_state' in sa.inspect(op.get_bind()).get_table_names():
+        op.create_index(
+            'ix_consent_state_scope_updated_at',
+            'consent_state',
+            ['tenant_id', 'product_id', 'purpose', 'updated_at'],
+            unique=False,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if 'consent_state' in sa.inspect(op.get_bind()).get_table_names():
+        op.drop_index('ix_consent_state_scope_updated_at', table_name='consent_state', if_exists=True)
@@ -0,0 +1,64 @@
+"""create audit rollups
+
+Revision ID: e1a7c4d9b2f6
+Revises: d9f1b3c6e402
+Create Date: 2026-10-17 01:12:40.518302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'e1a7c4d9b2f6'
+down_revision: Union[str, Sequence[str], None] = 'd9f1b3c6e402'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    # Audit events snapshot the consent's tenant (rollups are grouped by it)
+    tables = inspector.get_table_names()
+    if 'audit_logs' in tables and 'tenant_id' not in {col['name'] for col in inspector.get_columns('audit_logs')}:
+        op.add_column('audit_logs', sa.Column('tenant_id', sa.String(), nullable=True))
+        # Backfilled from consents when they share the database; a separate
+        # AUDIT_DATABASE_URL (migrated with DATABASE_URL pointing at it) has none
+        if 'consents' in tables:
+            op.execute(
+                "UPDATE audit_logs SET tenant_id = "
+                "(SELECT consents.tenant_id FROM consents WHERE consents.id = audit_logs.consent_id)"
+            )
+
+    # Hourly / daily / monthly event counts for GET /audit/stats; see app/audit_rollups.py.
+    # Filled from audit_logs by the app on its first start (rebuild_if_empty).
+    if 'audit_rollups' in tables:
+        return
+    op.create_table(
+        'audit_rollups',
+        sa.Column('granularity', sa.String(), nullable=False),
+        sa.Column('bucket', sa.DateTime(), nullable=False),
+        sa.Column('tenant_id', sa.String(), nullable=False),
+        sa.Column('product_id', sa.String(), nullable=False),
+        sa.Column('purpose', sa.String(), nullable=False),
+        sa.Column('action', sa.String(), nullable=False),
+        sa.Column('source_channel', sa.String(), nullable=False),
+        sa.Column('actor_type', sa.String(), nullable=False),
+        sa.Column('events', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint(
+            'granularity', 'bucket', 'tenant_id', 'product_id', 'purpose', 'action', 'source_channel', 'actor_type'
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('audit_rollups', if_exists=True)
+    inspector = sa.inspect(op.get_bind())
+    if 'audit_logs' in inspector.get_table_names() and 'tenant_id' in {
+        col['name'] for col in inspector.get_columns('audit_logs')
+    }:
+        with op.batch_alter_table('audit_logs') as batch_op:
+            batch_op.drop_column('tenant_id')
@@ -0,0 +1,47 @@
+"""drop redundant primary key indexes
+
+Revision ID: e5b9c0d3f218
+Revises: d8a2f4c61e07
+Create Date: 2026-10-16 17:05:44.120937
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'e5b9c0d3f218'
+down_revision: Union[str, Sequence[str], None] = 'd8a2f4c61e07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# index=True on primary keys added a second index on columns the primary key
+# already covers; every insert paid for both.
+INDEXES = [
+    ('ix_consents_id', 'consents'),
+    ('ix_audit_logs_id', 'audit_logs'),
+    ('ix_consent_templates_id', 'consent_templates'),
+    ('ix_otp_transactions_id', 'otp_transactions'),
+]
+
+
+def _existing_tables() -> set:
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    tables = _existing_tables()
+    for name, table in INDEXES:
+        if table in tables:
+            op.drop_index(name, table_name=table, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    tables = _existing_tables()
+    for name, table in reversed(INDEXES):
+        if table in tables:
+            op.create_index(name, table, ['id'], unique=False, if_not_exists=True)
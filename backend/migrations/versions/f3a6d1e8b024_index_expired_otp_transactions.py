@@ -0,0 +1,36 @@
+"""index expired otp transactions
+
+Revision ID: f3a6d1e8b024
+Revises: e5b9c0d3f218
+Create Date: 2026-10-16 18:22:10.553108
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'f3a6d1e8b024'
+down_revision: Union[str, Sequence[str], None] = 'e5b9c0d3f218'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # app/janitor.py purges "consent_id IS NULL AND expires_at < cutoff" in batches
+    if 'otp_transactions' in sa.inspect(op.get_bind()).get_table_names():
+        op.create_index(
+            'ix_otp_transactions_consent_id_expires_at',
+            'otp_transactions',
+            ['consent_id', 'expires_at'],
+            unique=False,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if 'otp_transactions' in sa.inspect(op.get_bind()).get_table_names():
+        op.drop_index('ix_otp_transactions_consent_id_expires_at', table_name='otp_transactions', if_exists=True)
@@ -0,0 +1,53 @@
+"""index consent identifiers by created_at
+
+Revision ID: f7c3b8e5a914
+Revises: e1a7c4d9b2f6
+Create Date: 2026-10-17 02:03:18.664027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'f7c3b8e5a914'
+down_revision: Union[str, Sequence[str], None] = 'e1a7c4d9b2f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (new composite index, column, single-column index it replaces) on consents
+INDEXES = [
+    ('ix_consents_mobile_number_created_at', 'mobile_number', 'ix_consents_mobile_number'),
+    ('ix_consents_application_number_created_at', 'application_number', 'ix_consents_application_number'),
+]
+
+
+def _consent_columns() -> set:
+    # Databases built by this history alone lack the identifier columns
+    # (they came from create_all()); see d8a2f4c61e07.
+    inspector = sa.inspect(op.get_bind())
+    if 'consents' not in inspector.get_table_names():
+        return set()
+    return {col['name'] for col in inspector.get_columns('consents')}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Subject timelines by mobile / application number page consents newest
+    # first; the composite indexes also serve bulk-revoke's equality lookups.
+    columns = _consent_columns()
+    for name, column, replaced in INDEXES:
+        if column in columns:
+            op.create_index(name, 'consents', [column, 'created_at', 'id'], unique=False, if_not_exists=True)
+            op.drop_index(replaced, table_name='consents', if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    columns = _consent_columns()
+    for name, column, replaced in reversed(INDEXES):
+        if column in columns:
+            op.create_index(replaced, 'consents', [column], unique=False, if_not_exists=True)
+            op.drop_index(name, table_name='consents', if_exists=True)
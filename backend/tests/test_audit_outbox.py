@@ -0,0 +1,63 @@
+# backend/tests/test_audit_outbox.py
+"""Outbox relay into segment files: rollups commit with the outbox delete."""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.pool import StaticPool
+
+from app.audit_outbox import AuditWriter
+from app.audit_segments import SegmentStore
+from app.database import Base
+from app.ids import new_id
+from app.models import AuditOutbox, AuditRollup
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine, tables=[AuditOutbox.__table__, AuditRollup.__table__])
+    return engine
+
+
+def _events(n):
+    return [
+        {"payload": {"id": new_id(), "consent_id": "c1", "action": "granted",
+                     "timestamp": datetime(2025, 1, 1, 10, i).isoformat()}}
+        for i in range(n)
+    ]
+
+
+def _hour_count(engine) -> int:
+    with engine.connect() as conn:
+        return conn.execute(select(AuditRollup.events).where(AuditRollup.granularity == "hour")).scalar() or 0
+
+
+@pytest.mark.parametrize("durability, separate_target", [("memory", False), ("transactional", True)])
+def test_rollups_with_segments_refuse_non_transactional_setups(engine, tmp_path, durability, separate_target):
+    target = create_engine("sqlite://") if separate_target else engine
+    with pytest.raises(ValueError, match="AUDIT_ROLLUPS"):
+        AuditWriter(durability=durability, source_engine=engine, target_engine=target, segments=SegmentStore(str(tmp_path)))
+
+
+def test_replayed_segment_batch_is_counted_once(engine, tmp_path):
+    segments = SegmentStore(str(tmp_path))
+    writer = AuditWriter(durability="transactional", source_engine=engine, target_engine=engine, segments=segments)
+    with engine.begin() as conn:
+        conn.execute(insert(AuditOutbox), _events(3))
+
+    # Crash after the segment append, before the relay transaction commits
+    def fail_delete(conn, clauseelement, multiparams, params, execution_options):
+        if clauseelement.is_dml and clauseelement.table.name == "audit_outbox" and clauseelement.is_delete:
+            raise RuntimeError("crash")
+
+    event.listen(engine, "before_execute", fail_delete)
+    with pytest.raises(RuntimeError):
+        writer.flush()
+    event.remove(engine, "before_execute", fail_delete)
+    assert _hour_count(engine) == 0
+
+    assert writer.flush() == 3
+    assert _hour_count(engine) == 3
+    assert len(list(segments.scan())) == 3
+    segments.close()
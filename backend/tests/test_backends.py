@@ -0,0 +1,64 @@
+# backend/tests/test_backends.py
+"""Pluggable backends: OTP stores and consent_state's portable upsert."""
+from typing import Optional
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app import consent_state
+from app.database import Base
+from app.ids import new_id
+from app.models import Consent, ConsentState
+from app.otp_store import MemoryOtpStore, OtpStore, RedisOtpStore, SqlOtpStore
+
+
+def test_incomplete_otp_store_fails_on_creation():
+    class NoRateLimit(OtpStore):
+        async def create(self, db, txn):
+            pass
+
+        async def get(self, db, transaction_id):
+            return None
+
+        async def mark_verified(self, db, transaction_id, verified_at):
+            return True
+
+        async def link_consent(self, db, transaction_id, consent_id):
+            return True
+
+    with pytest.raises(TypeError, match="hit_rate_limit"):
+        NoRateLimit()
+
+    class Complete(NoRateLimit):
+        async def hit_rate_limit(self, mobile_number: str) -> Optional[int]:
+            return None
+
+    Complete()
+
+
+@pytest.mark.parametrize("store", [SqlOtpStore, MemoryOtpStore, RedisOtpStore])
+def test_builtin_otp_stores_are_complete(store):
+    # RedisOtpStore needs the optional redis package to construct; check the class
+    assert not store.__abstractmethods__
+
+
+@pytest.mark.parametrize("dialect", ["sqlite", "generic"])
+def test_consent_state_upsert(dialect):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine, tables=[Consent.__table__, ConsentState.__table__])
+    if dialect == "generic":
+        # Any backend without ON CONFLICT takes the update-then-insert path
+        engine.dialect.name = "generic"
+
+    first, second = (
+        {"id": new_id(), "subject_id": "s1", "tenant_id": "T", "product_id": "LOAN", "purpose": "marketing"}
+        for _ in range(2)
+    )
+    with Session(engine) as db:
+        db.execute(insert(Consent), [first, second])
+        consent_state.record_grants(db, [first])
+        consent_state.record_grants(db, [second])
+        db.commit()
+        rows = db.execute(select(ConsentState.status, ConsentState.consent_id)).all()
+    assert rows == [("granted", second["id"])]
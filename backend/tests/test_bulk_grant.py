@@ -0,0 +1,69 @@
+# backend/tests/test_bulk_grant.py
+"""POST /consents/bulk: all-or-nothing by default, per-chunk commits with atomic=false."""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app import audit_chain
+from app.api.v1.routes_consent import router
+from app.database import Base
+from app.deps import get_db
+from app.models import Consent
+
+# Item 3 ("boom") is refused by the database; item 2 fails validation
+ITEMS = [
+    {"subject_id": "s0", "purpose": "marketing"},
+    {"subject_id": "s1", "purpose": "marketing"},
+    {"subject_id": "s2"},
+    {"subject_id": "boom", "purpose": "marketing"},
+    {"subject_id": "s4", "purpose": "marketing"},
+]
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    audit_chain.ensure_chain_head(engine)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TRIGGER refuse_boom BEFORE INSERT ON consents WHEN NEW.subject_id = 'boom' "
+            "BEGIN SELECT RAISE(ABORT, 'refused'); END"
+        ))
+    return engine
+
+
+@pytest.fixture
+def client(engine):
+    def db():
+        with Session(engine) as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(router, prefix="/consents")
+    app.dependency_overrides[get_db] = db
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def _committed(engine) -> int:
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(Consent)).scalar()
+
+
+def test_failed_chunk_rolls_back_the_whole_upload(client, engine):
+    response = client.post("/consents/bulk?chunk_size=2", json=ITEMS)
+    assert response.status_code == 500
+    assert _committed(engine) == 0
+
+
+def test_non_atomic_upload_reports_where_to_resume(client, engine):
+    response = client.post("/consents/bulk?chunk_size=2&atomic=false", json=ITEMS)
+    assert response.status_code == 207
+    body = response.json()
+    # Chunk [0, 1] committed; chunk [3, 4] rolled back, so resume from item 3
+    assert body["inserted"] == 2 and body["failed_at"] == 3 and body["chunk_error"] == "IntegrityError"
+    assert [e["index"] for e in body["errors"]] == [2]
+    assert _committed(engine) == 2
@@ -0,0 +1,199 @@
+# backend/tests/test_postgres.py
+"""
+The PostgreSQL-only code paths, against an embedded PostgreSQL (pgserver:
+a private server in a temp directory, no container): engine options, JSONB
+columns, planner-estimated totals, ON CONFLICT upserts and the outbox relay's
+SKIP LOCKED batches.
+
+Skipped when pgserver is not installed (pip install -r requirements-dev.txt).
+"""
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import inspect, insert, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+pgserver = pytest.importorskip("pgserver")
+
+from app import audit_chain, audit_rollups, consent_state  # noqa: E402
+from app.audit_outbox import AuditWriter  # noqa: E402
+from app.database import Base, create_async_engines, create_engines  # noqa: E402
+from app.ids import new_id  # noqa: E402
+from app.models import AuditLog, AuditOutbox, AuditRollup, Consent, ConsentState  # noqa: E402
+from app.pagination import estimate_total, keyset_page  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def pg_url(tmp_path_factory):
+    server = pgserver.get_server(tmp_path_factory.mktemp("pgdata"), cleanup_mode="stop")
+    url = make_url(server.get_uri()).set(drivername="postgresql+psycopg")
+    yield url.render_as_string(hide_password=False)
+    server.cleanup()
+
+
+@pytest.fixture
+def pg_engine(pg_url):
+    engine, read_engine = create_engines(pg_url)
+    assert read_engine is engine
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    audit_chain.ensure_chain_head(engine)
+    yield engine
+    engine.dispose()
+
+
+def _consent(**fields):
+    return {
+        "id": new_id(),
+        "subject_id": "s1",
+        "tenant_id": "DEMO_BANK",
+        "product_id": "LOAN",
+        "purpose": "marketing",
+        "status": "granted",
+        "meta": {"channel": "web", "tags": ["a", "b"]},
+        **fields,
+    }
+
+
+def test_engine_options_apply_statement_timeout(pg_engine):
+    with pg_engine.connect() as conn:
+        assert conn.execute(text("SHOW statement_timeout")).scalar() not in ("0", None)
+
+
+def test_json_columns_are_jsonb(pg_engine):
+    types = {col["name"]: col["type"] for col in inspect(pg_engine).get_columns("consents")}
+    assert type(types["meta"]).__name__ == "JSONB"
+
+    row = _consent()
+    with Session(pg_engine) as db:
+        db.execute(insert(Consent), [row])
+        db.commit()
+        assert db.get(Consent, row["id"]).meta == row["meta"]
+        # JSONB operators work on the column
+        assert db.execute(text("SELECT meta->>'channel' FROM consents")).scalar() == "web"
+
+
+def test_keyset_page_and_planner_estimate(pg_engine):
+    with Session(pg_engine) as db:
+        db.execute(insert(Consent), [_consent() for _ in range(5)])
+        db.commit()
+        q = db.query(Consent).filter(Consent.subject_id == "s1")
+        rows, cursor = keyset_page(q, ts_col=Consent.created_at, id_col=Consent.id, cursor=None, limit=3, descending=True)
+        rest, end = keyset_page(q, ts_col=Consent.created_at, id_col=Consent.id, cursor=cursor, limit=3, descending=True)
+        assert len(rows) == 3 and len(rest) == 2 and end is None
+        assert {c.id for c in rows}.isdisjoint(c.id for c in rest)
+        # EXPLAIN-based: a row estimate, never a capped "N+" count
+        assert estimate_total(q).isdigit()
+
+
+def test_consent_state_upsert_on_conflict(pg_engine):
+    first, second = _consent(), _consent()
+    with Session(pg_engine) as db:
+        db.execute(insert(Consent), [first, second])
+        consent_state.record_grants(db, [first])
+        consent_state.record_grants(db, [second])
+        db.commit()
+        states = db.execute(select(ConsentState)).scalars().all()
+        assert [(s.status, s.consent_id) for s in states] == [("granted", second["id"])]
+
+
+def test_rollups_upsert_on_conflict(pg_engine):
+    event = {
+        "timestamp": datetime(2025, 1, 1, 10, 30),
+        "tenant_id": "DEMO_BANK",
+        "product_id": "LOAN",
+        "purpose": "marketing",
+        "action": "granted",
+        "source_channel": None,
+        "actor_type": "customer",
+    }
+    with pg_engine.begin() as conn:
+        audit_rollups.record_rollups(conn, [event, event])
+    with pg_engine.begin() as conn:
+        audit_rollups.record_rollups(conn, [event])
+    with pg_engine.connect() as conn:
+        counts = dict(conn.execute(select(AuditRollup.granularity, AuditRollup.events)).all())
+    assert counts == {"hour": 3, "day": 3, "month": 3}
+
+
+def test_outbox_relay_skips_locked_rows(pg_engine):
+    consent = _consent()
+    with pg_engine.begin() as conn:
+        conn.execute(insert(Consent), [consent])
+        conn.execute(
+            insert(AuditOutbox),
+            [
+                {"payload": {"id": new_id(), "consent_id": consent["id"], "action": "granted",
+                             "timestamp": datetime(2025, 1, 1, 10, i).isoformat()}}
+                for i in range(2)
+            ],
+        )
+    writer = AuditWriter(durability="transactional", source_engine=pg_engine, target_engine=pg_engine, segments=None)
+
+    # Another writer holds the first outbox row: this one takes the rest, without waiting
+    with pg_engine.connect() as other:
+        other.begin()
+        other.execute(select(AuditOutbox.seq).order_by(AuditOutbox.seq).limit(1).with_for_update())
+        assert writer.flush() == 1
+        other.rollback()
+    assert writer.flush() == 1
+
+    with pg_engine.connect() as conn:
+        assert len(conn.execute(select(AuditLog.id)).all()) == 2
+        assert conn.execute(select(AuditOutbox.seq)).first() is None
+
+
+def test_async_engine(pg_url):
+    async def run():
+        engine, read_engine = create_async_engines(pg_url)
+        try:
+            async with engine.connect() as conn:
+                return await conn.scalar(text("SELECT 1"))
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(run()) == 1
+
+
+def test_open_audit_transaction_does_not_hold_the_chain_head(pg_engine):
+    from app.audit import audit_row, write_audit_rows
+    from app.audit_chain import verify_range
+
+    consents = [_consent(), _consent()]
+    with pg_engine.begin() as conn:
+        conn.execute(insert(Consent), consents)
+
+    with Session(pg_engine) as slow, Session(pg_engine) as fast:
+        # An upload that has written audit rows but not committed yet...
+        write_audit_rows(slow, [audit_row(consents[0], action="granted", actor="bulk")])
+        # ...does not block another request's commit (lock_timeout fails fast if it did)
+        fast.execute(text("SET LOCAL lock_timeout = '2s'"))
+        write_audit_rows(fast, [audit_row(consents[1], action="granted", actor="web")])
+        fast.commit()
+        slow.commit()
+
+    with pg_engine.connect() as conn:
+        report = verify_range(conn)
+    assert report.verified and report.rows_checked == 2
+
+
+def test_migrations_upgrade_empty_database(pg_url):
+    from app.migrate import upgrade
+
+    url = make_url(pg_url)
+    admin, _ = create_engines(pg_url)
+    with admin.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("DROP DATABASE IF EXISTS migrations_empty"))
+        conn.execute(text("CREATE DATABASE migrations_empty"))
+    admin.dispose()
+
+    # The baseline has audit_log, not audit_logs: later migrations must cope
+    empty = url.set(database="migrations_empty").render_as_string(hide_password=False)
+    upgrade(empty)
+    engine, _ = create_engines(empty)
+    try:
+        assert "audit_chain" in inspect(engine).get_table_names()
+    finally:
+        engine.dispose()
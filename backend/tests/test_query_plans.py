@@ -0,0 +1,21 @@
+# backend/tests/test_query_plans.py
+"""
+The hot query paths (app/check_query_plans.py) must stay on their indexes:
+no full table scan, no sort of the whole result for ORDER BY.
+"""
+import pytest
+
+from app.check_query_plans import CASES, explain_cases
+
+
+@pytest.fixture(scope="module")
+def plans():
+    # EXPLAINed once per run, inside the tests: a failing query fails them
+    # instead of breaking collection
+    return {name: (details, bad) for name, details, bad in explain_cases()}
+
+
+@pytest.mark.parametrize("name", sorted(name for name, _ in CASES))
+def test_query_uses_index(plans, name):
+    details, bad = plans[name]
+    assert not bad, f"{name}: " + " | ".join(details)
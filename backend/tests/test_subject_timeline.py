@@ -0,0 +1,67 @@
+# backend/tests/test_subject_timeline.py
+"""Subject timelines answer If-None-Match before loading the page."""
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+
+from app.api.v1.routes_subjects import _timeline
+from app.audit import audit_row
+from app.database import Base, create_async_engines
+from app.ids import new_id
+from app.models import AuditLog, Consent
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'timeline.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    consent = {"id": new_id(), "subject_id": "s1", "tenant_id": "DEMO_BANK", "product_id": "LOAN",
+               "purpose": "marketing", "status": "granted"}
+    with engine.begin() as conn:
+        conn.execute(insert(Consent), [consent])
+        conn.execute(insert(AuditLog), [audit_row(consent, action="granted", actor="web")])
+    engine.dispose()
+    return url
+
+
+def _get(url, if_none_match=None, *, new_event=False):
+    """(status, ETag, statements run) of one timeline request for subject s1."""
+    async def run():
+        engine, _ = create_async_engines(url)
+        statements = []
+        event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+        request = Request({"type": "http", "method": "GET", "headers": headers})
+        try:
+            async with AsyncSession(engine) as db:
+                if new_event:
+                    consent = (await db.scalars(select(Consent))).one()
+                    await db.execute(insert(AuditLog), [audit_row(consent, action="revoked", actor="web")])
+                    await db.commit()
+                    statements.clear()
+                response = await _timeline(request, Consent.subject_id, "s1", None, 10, db, db)
+        finally:
+            await engine.dispose()
+        return response.status_code, response.headers["etag"], statements
+
+    return asyncio.run(run())
+
+
+def test_not_modified_skips_the_page_queries(db_url):
+    status, etag, full = _get(db_url)
+    assert status == 200
+
+    status, same, cheap = _get(db_url, etag)
+    assert status == 304 and same == etag
+    # Only the validator lookups: neither the consent rows nor the events are loaded
+    assert len(cheap) == 2 and len(full) == 4
+
+
+def test_new_event_changes_the_etag(db_url):
+    _, etag, _ = _get(db_url)
+    status, changed, _ = _get(db_url, etag, new_event=True)
+    assert status == 200 and changed != etag
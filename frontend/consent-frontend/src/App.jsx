@@ -7,6 +7,7 @@ import {
   listConsents,
   revokeConsent,
   listAudit,
+  getSubjectTimeline,
   exportConsentsCSV,
   listAuditForSubject,
 } from "./api";
@@ -287,7 +288,11 @@ export default function App() {
     setErr("");
     setMsg("");
     try {
-      const list = await listConsents(subjectId);
+      // A subject's timeline carries each consent's audit events, so grant
+      // times come with it instead of one audit request per consent
+      const list = subjectId
+        ? await getSubjectTimeline(subjectId)
+        : await listConsents(subjectId);
       setConsents(list);
       setMsg(`Loaded ${list.length} consents for "${subjectId}"`);
 
@@ -298,50 +303,21 @@ export default function App() {
         );
       }
 
-      // Fallback: if consent lacks created_at, derive from its audit (first grant)
-      const needs = list
-        .filter((c) => {
-          const createdRaw =
-            c.created_at ??
-            c.createdAt ??
-            c.created ??
-            c.timestamp ??
-            c.updated_at ??
-            c.updatedAt ??
-            null;
-          return !createdRaw && !(c.id in grantAtById);
-        })
-        .map((c) => c.id);
-
-      if (needs.length) {
-        const entries = await Promise.all(
-          needs.map(async (id) => {
-            try {
-              const events = await listAudit(id);
-              let chosen = null;
-              if (Array.isArray(events) && events.length) {
-                const grants = events.filter((e) =>
-                  String(e.action || "")
-                    .toLowerCase()
-                    .includes("grant"),
-                );
-                chosen = grants[0] || events[0] || null;
-              }
-              const t =
-                chosen?.timestamp ||
-                chosen?.time ||
-                chosen?.created_at ||
-                null;
-              return [id, t];
-            } catch {
-              return [id, null];
-            }
-          }),
+      // Grant time from the consent's audit (first grant), else created_at
+      const merged = {};
+      list.forEach((c) => {
+        const events = Array.isArray(c.events) ? c.events : [];
+        const grants = events.filter((e) =>
+          String(e.action || "")
+            .toLowerCase()
+            .includes("grant"),
         );
-        const merged = Object.fromEntries(entries.filter(([, v]) => !!v));
-        if (Object.keys(merged).length) {
-          setGrantAtById((prev) => ({ ...prev, ...merged }));
-        }
+        const chosen = grants[0] || events[0] || null;
+        const t = chosen?.timestamp || c.created_at || null;
+        if (t) merged[c.id] = t;
+      });
+      if (Object.keys(merged).length) {
+        setGrantAtById((prev) => ({ ...prev, ...merged }));
       }
     } catch (e) {
       setErr(String(e.message || e));
@@ -58,6 +58,24 @@ export async function listConsents(subject_id) {
   return res.json();
 }
 
+// Every consent of the subject, newest first, each with its audit events:
+// follows X-Next-Cursor through all timeline pages.
+export async function getSubjectTimeline(subject_id) {
+  const consents = [];
+  let cursor = null;
+  do {
+    const page = new URLSearchParams({ limit: "1000" });
+    if (cursor) page.set("cursor", cursor);
+    const res = await fetch(
+      `${BASE}/subjects/${encodeURIComponent(subject_id)}/timeline?${page.toString()}`,
+    );
+    if (!res.ok) throw new Error(`Timeline failed: ${res.status}`);
+    consents.push(...(await res.json()));
+    cursor = res.headers.get("X-Next-Cursor");
+  } while (cursor);
+  return consents;
+}
+
 export async function revokeConsent(id) {
   const res = await fetch(`${BASE}/consents/${id}/revoke`, { method: "PATCH" });
   if (!res.ok) {
@@ -67,13 +85,27 @@ export async function revokeConsent(id) {
   return res.json();
 }
 
+// Every audit event matching params, oldest first: follows X-Next-Cursor
+// through all keyset pages (the server returns at most `limit` per page).
+async function listAuditAllPages(params) {
+  const events = [];
+  let cursor = null;
+  do {
+    const page = new URLSearchParams(params);
+    page.set("limit", "1000");
+    if (cursor) page.set("cursor", cursor);
+    const res = await fetch(`${BASE}/audit?${page.toString()}`);
+    if (!res.ok) throw new Error(`Audit list failed: ${res.status}`);
+    events.push(...(await res.json()));
+    cursor = res.headers.get("X-Next-Cursor");
+  } while (cursor);
+  return events;
+}
+
 export async function listAudit(consent_id) {
-  const url = consent_id
-    ? `${BASE}/audit?consent_id=${encodeURIComponent(consent_id)}`
-    : `${BASE}/audit`;
-  const res = await fetch(url);
-  if (!res.ok) throw new Error(`Audit list failed: ${res.status}`);
-  return res.json();
+  const params = new URLSearchParams();
+  if (consent_id) params.set("consent_id", consent_id);
+  return listAuditAllPages(params);
 }
 
 /**
@@ -304,22 +336,46 @@ export async function listAuditForSubject(mobileNumber, applicationNumber) {
   const params = new URLSearchParams();
   if (mobileNumber) params.set("mobile_number", mobileNumber);
   if (applicationNumber) params.set("application_number", applicationNumber);
-
-  const url = `${BASE}/audit${params.toString() ? "?" + params.toString() : ""}`;
-  const res = await fetch(url);
-  if (!res.ok) throw new Error(`Audit list failed: ${res.status}`);
-  return res.json();
+  return listAuditAllPages(params);
 }
 
-// Global audit list (for Regulator CMP)
-export async function listAuditGlobal() {
-  // Use the same base URL pattern you use for other endpoints.
-  // Example (adapt to your file):
-  // const res = await fetch(`${API_BASE}/audit`);
-  const res = await fetch(`${BASE}/audit`);
+// Global audit list (for Regulator CMP), one keyset page at a time.
+// Filters are applied server-side ({ action, actor_type, product_id, purpose,
+// source_channel, start_date, end_date, ... }); pass the returned nextCursor
+// back to fetch the following page.
+export async function listAuditGlobal(filters = {}, cursor = null) {
+  const params = new URLSearchParams();
+  Object.entries(filters).forEach(([k, v]) => {
+    if (v) params.set(k, v);
+  });
+  if (cursor) params.set("cursor", cursor);
+
+  const res = await fetch(
+    `${BASE}/audit${params.toString() ? "?" + params.toString() : ""}`,
+  );
   if (!res.ok) {
     throw new Error("Failed to load global audit events");
   }
+  const events = await res.json();
+  return { events, nextCursor: res.headers.get("X-Next-Cursor") };
+}
+
+// Pre-aggregated audit counts (server-side rollups), same filters as
+// listAuditGlobal. groupBy: any of tenant_id, product_id, purpose, action,
+// source_channel, actor_type; interval: "hour" | "day" | "month" for a
+// time series, omitted for totals. Returns { total, rows: [{ ...dims, events }] }.
+export async function getAuditStats(filters = {}, groupBy = [], interval = null) {
+  const params = new URLSearchParams();
+  Object.entries(filters).forEach(([k, v]) => {
+    if (v) params.set(k, v);
+  });
+  groupBy.forEach((g) => params.append("group_by", g));
+  if (interval) params.set("interval", interval);
+
+  const res = await fetch(`${BASE}/audit/stats?${params.toString()}`);
+  if (!res.ok) {
+    throw new Error("Failed to load audit stats");
+  }
   return res.json();
 }
 
@@ -1,5 +1,5 @@
 import { useEffect, useState } from "react";
-import { listAuditGlobal } from "../api";
+import { getAuditStats, listAuditGlobal } from "../api";
 import AuditTimeline from "./AuditTimeline";
 
 export default function RegulatorAudit() {
@@ -7,6 +7,9 @@ export default function RegulatorAudit() {
   const [loading, setLoading] = useState(false);
   const [err, setErr] = useState("");
   const [msg, setMsg] = useState("");
+  const [nextCursor, setNextCursor] = useState(null);
+  // Server-side counts for the dropdown/date filters (not limited to loaded pages)
+  const [stats, setStats] = useState(null);
 
   const [filters, setFilters] = useState({
     product: "",
@@ -81,15 +84,47 @@ export default function RegulatorAudit() {
   const filteredCount = filteredEvents.length;
 
 
-  async function loadAudit() {
+  async function loadAudit(more = false) {
     setLoading(true);
     setErr("");
     setMsg("");
     try {
-      const data = await listAuditGlobal();
-      setEvents(Array.isArray(data) ? data : []);
+      // Dropdown/date filters run server-side; "mobile contains" stays client-side
+      const serverFilters = {
+        product_id: filters.product,
+        purpose: filters.purpose,
+        actor_type: filters.actorType,
+        action: filters.eventType,
+        start_date: filters.from,
+        end_date: filters.to,
+      };
+      const { events: page, nextCursor: cursor } = await listAuditGlobal(
+        serverFilters,
+        more ? nextCursor : null,
+      );
+      if (!more) {
+        // Stats are optional (409 when the server runs without rollups):
+        // without them the panel is hidden, the events still load
+        try {
+          setStats(
+            await getAuditStats(serverFilters, [
+              "action",
+              "actor_type",
+              "source_channel",
+            ]),
+          );
+        } catch {
+          setStats(null);
+        }
+      }
+      const list = Array.isArray(page) ? page : [];
+      const merged = more ? [...events, ...list] : list;
+      setEvents(merged);
+      setNextCursor(cursor);
       setMsg(
-        `Loaded ${Array.isArray(data) ? data.length : 0} audit events (global).`
+        `Loaded ${merged.length} audit events (global)${
+          cursor ? " – more available" : ""
+        }.`
       );
     } catch (e) {
       setErr(String(e.message || e));
@@ -167,6 +202,19 @@ export default function RegulatorAudit() {
     );
   }
 
+  // Totals per value of one dimension, from the grouped stats rows
+  function statsBy(field) {
+    const totals = {};
+    (stats?.rows || []).forEach((row) => {
+      const key = row[field] || "(none)";
+      totals[key] = (totals[key] || 0) + row.events;
+    });
+    return Object.entries(totals)
+      .sort((a, b) => b[1] - a[1])
+      .map(([key, n]) => `${key} ${n}`)
+      .join(", ");
+  }
+
   // Build filter option sets from audit events themselves
   const productSet = new Set();
   const purposeSet = new Set();
@@ -257,7 +305,7 @@ export default function RegulatorAudit() {
         <div style={{ display: "flex", gap: 8 }}>
           <button
             type="button"
-            onClick={loadAudit}
+            onClick={() => loadAudit(false)}
             disabled={loading}
             style={{
               padding: "4px 10px",
@@ -466,7 +514,35 @@ export default function RegulatorAudit() {
         )}
       </div>
 
+      {stats && (
+        <div style={{ fontSize: 12, color: "#555", marginBottom: 8 }}>
+          <span style={{ fontWeight: 600 }}>{stats.total}</span> audit events
+          in total for these filters. By action: {statsBy("action")}. By
+          actor type: {statsBy("actor_type")}. By channel:{" "}
+          {statsBy("source_channel")}.
+        </div>
+      )}
+
       <AuditTimeline events={filteredEvents} />
+
+      {nextCursor && (
+        <button
+          type="button"
+          onClick={() => loadAudit(true)}
+          disabled={loading}
+          style={{
+            marginTop: 8,
+            padding: "4px 10px",
+            borderRadius: 6,
+            border: "1px solid #d4d4d4",
+            background: "#ffffff",
+            fontSize: 12,
+            cursor: "pointer",
+          }}
+        >
+          Load more
+        </button>
+      )}
     </div>
   );
 }